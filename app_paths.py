@@ -0,0 +1,31 @@
+# app_paths.py —— 应用数据 / 缓存目录
+import os
+import sys
+
+APP_NAME = "myPlayer"
+
+
+def _base_dir(kind: str) -> str:
+    if sys.platform == "win32":
+        root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+        return os.path.join(root, APP_NAME, kind)
+    if sys.platform == "darwin":
+        sub = "Caches" if kind == "cache" else "Application Support"
+        return os.path.join(os.path.expanduser("~/Library"), sub, APP_NAME)
+    env = "XDG_CACHE_HOME" if kind == "cache" else "XDG_DATA_HOME"
+    default = "~/.cache" if kind == "cache" else "~/.local/share"
+    return os.path.join(os.environ.get(env) or os.path.expanduser(default), APP_NAME)
+
+
+def data_dir(*parts: str) -> str:
+    """持久数据（数据库等）目录，不存在时创建。"""
+    path = os.path.join(_base_dir("data"), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_dir(*parts: str) -> str:
+    """可随时删除的缓存目录，不存在时创建。"""
+    path = os.path.join(_base_dir("cache"), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
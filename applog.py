@@ -0,0 +1,406 @@
+# applog.py —— 非阻塞日志管线：有界队列 + 后台写线程，按模块分级、重复限流、滚动文件
+"""
+mpv 事件线程、渲染循环和 GL 调试回调里不能直接 print：print 会拿控制台锁，
+Windows 控制台输出慢时整帧被卡住。这里的 emit() 只做一次级别查询和 deque.append，
+格式化与所有 I/O 都在后台写线程完成。
+
+    log = applog.get_logger("player")
+    log.warning("无法打开 %s", path)
+
+模块名用 '/' 分层（mpv/ffmpeg/video → mpv/ffmpeg → mpv → 默认级别），
+set_level() 随时生效；mpv 的日志级别会通过监听器同步给 mpv，无需重启核心。
+环境变量 MYPLAYER_LOG 可预设级别，例如 "info,mpv=warn,mpv/vo=debug,gl=debug"。
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+TRACE = 5
+DEBUG = 10
+VERBOSE = 15
+INFO = 20
+WARN = 30
+ERROR = 40
+FATAL = 50
+OFF = 100
+
+LEVEL_NAMES = {TRACE: 'trace', DEBUG: 'debug', VERBOSE: 'v', INFO: 'info', WARN: 'warn',
+               ERROR: 'error', FATAL: 'fatal', OFF: 'no'}
+_LEVELS_BY_NAME = {name: level for level, name in LEVEL_NAMES.items()}
+_LEVELS_BY_NAME.update({'verbose': VERBOSE, 'warning': WARN, 'status': INFO, 'off': OFF})
+
+LOG_ENV = "MYPLAYER_LOG"
+
+
+def parse_level(value) -> int:
+    if isinstance(value, int):
+        return value
+    try:
+        return _LEVELS_BY_NAME[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError(f"未知的日志级别：{value!r}") from None
+
+
+@dataclass
+class LogStats:
+    accepted: int = 0    # 进入队列的条目
+    filtered: int = 0    # 低于模块级别、在调用线程直接丢弃
+    dropped: int = 0     # 队列已满被丢弃
+    suppressed: int = 0  # 重复消息被限流
+    written: int = 0     # 写线程已输出
+
+
+class _RotatingFile:
+    """超过 max_bytes 时把 name.log 依次改名为 name.log.1 … name.log.<backups>。"""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+
+    def write(self, text: str):
+        data_len = len(text.encode('utf-8'))
+        if self._size and self._size + data_len > self.max_bytes:
+            self._rotate()
+        self._file.write(text)
+        self._size += data_len
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._size = 0
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class LogPipeline:
+    """
+    调用线程：级别过滤 → 重复限流 → deque.append（不加锁，队列满时丢弃并计数）。
+    写线程：每 POLL_INTERVAL 秒取空队列，格式化后写控制台和滚动文件。
+    """
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, capacity: int = 8192, default_level: int = INFO,
+                 burst: int = 5, window: float = 1.0):
+        self.capacity = capacity
+        self._levels = {'': default_level}
+        self._effective = {}     # 模块名 -> 生效级别的缓存，set_level 时整体替换
+        self._listeners = []
+        self._queue = deque()
+        self._burst = burst      # 同一条消息每个窗口内最多输出的次数
+        self._window = window
+        self._recent = {}        # (模块, 文本) -> [窗口起点, 窗口内次数, 级别]
+        self._stats = LogStats()
+        self._console_level = INFO
+        self._file = None
+        self._json_lines = False
+        self._flush_waiters = deque()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop = False
+
+    # --- 级别 ---
+
+    def set_level(self, module: str, level):
+        """module 为 '' 或 '*' 时设置默认级别。立即生效，并通知监听器（例如同步给 mpv）。"""
+        module = '' if module == '*' else module.strip('/')
+        levels = dict(self._levels)
+        levels[module] = parse_level(level)
+        self._levels = levels
+        self._effective = {}
+        for listener in list(self._listeners):
+            listener()
+
+    def reset_level(self, module: str):
+        if module in self._levels and module:
+            levels = dict(self._levels)
+            del levels[module]
+            self._levels = levels
+            self._effective = {}
+            for listener in list(self._listeners):
+                listener()
+
+    def levels(self) -> dict:
+        return dict(self._levels)
+
+    def level(self, module: str) -> int:
+        cached = self._effective.get(module)
+        if cached is not None:
+            return cached
+        levels = self._levels
+        name = module
+        while name not in levels:
+            name = name.rpartition('/')[0]
+        self._effective[module] = levels[name]
+        return levels[name]
+
+    def enabled(self, module: str, level: int) -> bool:
+        return level >= self.level(module)
+
+    def min_level(self, prefix: str) -> int:
+        """prefix 及其所有子模块中最详细的级别，用于决定向 mpv 请求哪一级日志。"""
+        levels = self._levels
+        result = self.level(prefix)
+        for name, level in levels.items():
+            if name.startswith(prefix + '/'):
+                result = min(result, level)
+        return result
+
+    def add_level_listener(self, fn):
+        self._listeners.append(fn)
+
+    def remove_level_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    # --- 输出配置 ---
+
+    def configure(self, console_level=None, path: str = None, max_bytes: int = 5 * 1024 * 1024,
+                  backups: int = 3, json_lines: bool = None):
+        """设置控制台输出级别、滚动日志文件（path 为 None 时不改动）和文件格式。"""
+        if console_level is not None:
+            self._console_level = parse_level(console_level)
+        if json_lines is not None:
+            self._json_lines = json_lines
+        if path is not None:
+            old, self._file = self._file, _RotatingFile(path, max_bytes, backups)
+            if old is not None:
+                old.close()
+
+    # --- 写入（任意线程） ---
+
+    def emit(self, module: str, level: int, text: str):
+        if level < self.level(module):
+            self._stats.filtered += 1
+            return
+        now = time.monotonic()
+        key = (module, text)
+        entry = self._recent.get(key)
+        if entry is not None and now - entry[0] < self._window:
+            entry[1] += 1
+            if entry[1] > self._burst:
+                self._stats.suppressed += 1
+                return
+        else:
+            if entry is not None and entry[1] > self._burst:
+                self._enqueue(self._suppressed_record(module, entry))
+            self._recent[key] = [now, 1, level]
+        self._enqueue((time.time(), level, module, text))
+
+    def _enqueue(self, record):
+        if len(self._queue) >= self.capacity:
+            self._stats.dropped += 1
+            return
+        self._queue.append(record)
+        self._stats.accepted += 1
+        if self._thread is None:
+            self._start()
+
+    def stats(self) -> LogStats:
+        return LogStats(**vars(self._stats))
+
+    def reset_stats(self):
+        self._stats = LogStats()
+
+    # --- 写线程 ---
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is not None or self._stop:
+                return
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        last_sweep = time.monotonic()
+        while True:
+            stopping = self._stop
+            wrote = self._drain()
+            now = time.monotonic()
+            if now - last_sweep >= self._window:
+                last_sweep = now
+                self._sweep(now)
+            while self._flush_waiters and not self._queue:
+                self._flush_waiters.popleft().set()
+            if stopping:
+                break
+            if not wrote:
+                time.sleep(self.POLL_INTERVAL)
+
+    def _drain(self) -> bool:
+        queue = self._queue
+        if not queue:
+            return False
+        console = sys.stderr  # pythonw 下为 None
+        lines = []
+        while queue:
+            lines.append(queue.popleft())
+        for record in lines:
+            if console is not None and record[1] >= self._console_level:
+                console.write(self._format_text(record))
+            if self._file is not None:
+                self._file.write(self._format_json(record) if self._json_lines else self._format_text(record))
+        self._stats.written += len(lines)
+        if console is not None:
+            console.flush()
+        if self._file is not None:
+            self._file.flush()
+        return True
+
+    def _sweep(self, now: float):
+        """补发已结束窗口里被省略的条数，并清掉过期的限流条目。"""
+        for key, entry in list(self._recent.items()):
+            if now - entry[0] < self._window:
+                continue
+            self._recent.pop(key, None)
+            if entry[1] > self._burst:
+                self._enqueue(self._suppressed_record(key[0], entry))
+
+    def _suppressed_record(self, module: str, entry):
+        return (time.time(), entry[2], module, f"（上一窗口内另有 {entry[1] - self._burst} 条相同消息被省略）")
+
+    @staticmethod
+    def _timestamp(t: float) -> str:
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t)) + f".{int(t % 1 * 1000):03d}"
+
+    def _format_text(self, record) -> str:
+        t, level, module, text = record
+        return f"{self._timestamp(t)} {LEVEL_NAMES.get(level, level):<5} [{module}] {text}\n"
+
+    def _format_json(self, record) -> str:
+        t, level, module, text = record
+        return json.dumps({'time': self._timestamp(t), 'level': LEVEL_NAMES.get(level, level),
+                           'module': module, 'message': text}, ensure_ascii=False) + "\n"
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """等写线程把当前队列写完。"""
+        if self._thread is None or not self._thread.is_alive():
+            return not self._queue
+        done = threading.Event()
+        self._flush_waiters.append(done)
+        return done.wait(timeout)
+
+    def close(self):
+        self._stop = True
+        if self._thread is not None:
+            self._thread.join(2.0)
+        else:
+            self._drain()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Logger:
+    """绑定模块名的轻量包装；消息参数只在通过级别过滤后才格式化。"""
+    __slots__ = ('module', '_pipeline')
+
+    def __init__(self, module: str, pipeline: LogPipeline):
+        self.module = module
+        self._pipeline = pipeline
+
+    def log(self, level: int, msg: str, *args):
+        if level < self._pipeline.level(self.module):
+            self._pipeline._stats.filtered += 1
+            return
+        self._pipeline.emit(self.module, level, msg % args if args else msg)
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self._pipeline.enabled(self.module, level)
+
+    def trace(self, msg, *args):
+        self.log(TRACE, msg, *args)
+
+    def debug(self, msg, *args):
+        self.log(DEBUG, msg, *args)
+
+    def verbose(self, msg, *args):
+        self.log(VERBOSE, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(WARN, msg, *args)
+
+    def error(self, msg, *args):
+        self.log(ERROR, msg, *args)
+
+
+# --- 进程内的默认管线 ---
+
+_pipeline = LogPipeline()
+_pipeline.set_level('mpv', WARN)  # mpv 默认只转发警告及以上，详细日志按需打开
+atexit.register(_pipeline.close)
+
+
+def pipeline() -> LogPipeline:
+    return _pipeline
+
+
+def get_logger(module: str) -> Logger:
+    return Logger(module, _pipeline)
+
+
+def set_level(module: str, level):
+    _pipeline.set_level(module, level)
+
+
+def configure(**kwargs):
+    _pipeline.configure(**kwargs)
+
+
+def stats() -> LogStats:
+    return _pipeline.stats()
+
+
+def configure_from_env(default_file: str = None):
+    """
+    读取 MYPLAYER_LOG（逗号分隔，"级别" 设默认，"模块=级别" 设模块），
+    default_file 不为 None 时同时写入该滚动日志文件。
+    """
+    for item in filter(None, (s.strip() for s in os.environ.get(LOG_ENV, "").split(','))):
+        module, sep, level = item.rpartition('=')
+        try:
+            _pipeline.set_level(module if sep else '', level)
+        except ValueError as e:
+            get_logger("log").warning("%s: %s", LOG_ENV, e)
+    if default_file is not None:
+        _pipeline.configure(path=default_file)
+
+
+# --- mpv ---
+
+_MPV_LEVEL_ORDER = (TRACE, DEBUG, VERBOSE, INFO, WARN, ERROR, FATAL)
+
+
+def mpv_log_level() -> str:
+    """按 mpv 及其子模块中最详细的级别，返回要向 mpv 请求的日志级别名。"""
+    level = _pipeline.min_level('mpv')
+    for candidate in _MPV_LEVEL_ORDER:
+        if candidate >= level:
+            return LEVEL_NAMES[candidate]
+    return 'no'
+
+
+def mpv_log_handler(level: str, prefix: str, text: str):
+    """python-mpv / MpvIpcPlayer 的 log_handler，在 mpv 事件线程调用。"""
+    _pipeline.emit(f"mpv/{prefix}", _LEVELS_BY_NAME.get(level, INFO), text.rstrip('\n'))
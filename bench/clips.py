@@ -0,0 +1,69 @@
+# bench/clips.py —— 用 ffmpeg / mpv 的 lavfi 源即时生成测试片段
+import os
+import shutil
+import subprocess
+import tempfile
+
+RESOLUTIONS = {
+    '480p': (854, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '2160p': (3840, 2160),
+}
+
+DEFAULT_CLIP_DIR = os.path.join(tempfile.gettempdir(), 'myplayer-bench-clips')
+
+
+def ensure_clip(width: int, height: int, seconds: int = 10, fps: int = 30,
+                gop: int = 60, clip_dir: str = None) -> str:
+    """
+    返回一个 testsrc2 + 正弦音的 H.264 片段路径，不存在时生成。
+    gop 决定关键帧间隔，用来区分关键帧 seek 与精确 seek 的开销。
+    """
+    clip_dir = clip_dir or DEFAULT_CLIP_DIR
+    os.makedirs(clip_dir, exist_ok=True)
+    name = f"testsrc2_{width}x{height}_{fps}fps_{seconds}s_g{gop}.mkv"
+    path = os.path.join(clip_dir, name)
+    if os.path.exists(path):
+        return path
+
+    tmp = path + '.part.mkv'
+    video_src = f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}"
+    ffmpeg = shutil.which('ffmpeg')
+    mpv_bin = shutil.which('mpv')
+    if ffmpeg:
+        cmd = [ffmpeg, '-v', 'error', '-y',
+               '-f', 'lavfi', '-i', video_src,
+               '-f', 'lavfi', '-i', f"sine=frequency=440:duration={seconds}",
+               '-c:v', 'libx264', '-preset', 'ultrafast', '-g', str(gop), '-pix_fmt', 'yuv420p',
+               '-c:a', 'aac', '-shortest', tmp]
+    elif mpv_bin:
+        cmd = [mpv_bin, '--really-quiet', f"av://lavfi:{video_src}", f"--o={tmp}",
+               '--ovc=libx264', f"--ovcopts=g={gop},preset=ultrafast", '--no-audio']
+    else:
+        raise RuntimeError("生成测试片段需要 PATH 中有 ffmpeg 或 mpv")
+
+    subprocess.run(cmd, check=True)
+    os.replace(tmp, path)
+    return path
+
+
+def ensure_audio_clip(seconds: int = 3600, clip_dir: str = None) -> str:
+    """
+    返回一个只有音频的长片段（调幅正弦 + 周期性静音），用于波形概览基准。
+    用 Opus 编码保持文件小，解码开销与真实录音相近。
+    """
+    clip_dir = clip_dir or DEFAULT_CLIP_DIR
+    os.makedirs(clip_dir, exist_ok=True)
+    path = os.path.join(clip_dir, f"speech_like_{seconds}s.opus")
+    if os.path.exists(path):
+        return path
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        raise RuntimeError("生成音频片段需要 PATH 中有 ffmpeg")
+    tmp = path + '.part.opus'
+    source = f"aevalsrc='sin(440*2*PI*t)*(0.2+0.8*abs(sin(0.3*t)))*gt(mod(t\\,20)\\,3)':s=48000:d={seconds}"
+    subprocess.run([ffmpeg, '-v', 'error', '-y', '-f', 'lavfi', '-i', source,
+                    '-c:a', 'libopus', '-b:a', '32k', tmp], check=True)
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,90 @@
+# bench/harness.py —— 结果收集、JSON 读写与基线对比
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass
+class Metric:
+    value: float
+    unit: str
+    better: str  # 'lower' 或 'higher'
+
+
+@dataclass
+class BenchResults:
+    meta: dict = field(default_factory=dict)
+    metrics: dict = field(default_factory=dict)
+
+    def add(self, name: str, value: float, unit: str, better: str = 'lower'):
+        self.metrics[name] = Metric(round(float(value), 4), unit, better)
+
+    def add_samples(self, name: str, samples, unit: str, better: str = 'lower'):
+        """把一组样本记为 median / p95 / max 三个指标。"""
+        if not samples:
+            return
+        ordered = sorted(samples)
+        self.add(f"{name}.median", statistics.median(ordered), unit, better)
+        self.add(f"{name}.p95", ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], unit, better)
+        self.add(f"{name}.max", ordered[-1], unit, better)
+
+    def to_dict(self) -> dict:
+        return {'meta': self.meta, 'metrics': {k: asdict(v) for k, v in self.metrics.items()}}
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> 'BenchResults':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('meta', {}), {k: Metric(**v) for k, v in data.get('metrics', {}).items()})
+
+
+def default_meta(**extra) -> dict:
+    meta = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+    meta.update(extra)
+    return meta
+
+
+def compare(current: BenchResults, baseline: BenchResults, tolerance: float = 0.10):
+    """
+    逐项与基线比较，返回 (name, baseline, current, change, regressed) 列表。
+    change 为相对变化；朝“更差”方向超过 tolerance 视为回归。
+    """
+    rows = []
+    for name, cur in sorted(current.metrics.items()):
+        base = baseline.metrics.get(name)
+        if base is None or base.value == 0:
+            rows.append((name, None if base is None else base.value, cur.value, None, False))
+            continue
+        change = (cur.value - base.value) / abs(base.value)
+        worse = change > tolerance if cur.better == 'lower' else change < -tolerance
+        rows.append((name, base.value, cur.value, change, worse))
+    return rows
+
+
+def format_comparison(rows) -> str:
+    lines = [f"{'metric':<44} {'baseline':>12} {'current':>12} {'change':>9}"]
+    for name, base, cur, change, regressed in rows:
+        base_s = '-' if base is None else f"{base:.3f}"
+        change_s = '-' if change is None else f"{change * 100:+.1f}%"
+        flag = '  REGRESSION' if regressed else ''
+        lines.append(f"{name:<44} {base_s:>12} {cur:>12.3f} {change_s:>9}{flag}")
+    return "\n".join(lines)
+
+
+class Stopwatch:
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000.0
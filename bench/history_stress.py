@@ -0,0 +1,175 @@
+# bench/history_stress.py —— 观看记录压力测试：高频位置更新、频繁切换条目，核对 GUI 线程没有磁盘 I/O
+"""
+不需要 mpv，在仓库根目录运行：
+    python -m bench.history_stress --files 200 --rate 1000 --seconds 20 --out history.json
+
+用一个只发射 MediaPlayerService 信号的对象驱动 WatchHistory：每秒 --rate 次 position_changed，
+每 --switch 秒切换到下一个文件，中间穿插暂停。写线程上的每条 SQL 都经 sqlite3 跟踪回调记下所在线程，
+结束时报告持续更新速率、写事务数与行数、每次信号处理的最大耗时，以及主线程执行过的 SQL 条数（应为 0）。
+最后把所有文件重新打开一遍，核对续播位置都能查到（包括改名后的文件）。
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QObject, Signal
+
+from bench.run import pump_events
+from watch_history import HistoryStore, WatchHistory
+
+
+class _SignalSource(QObject):
+    """WatchHistory 用到的 MediaPlayerService 信号与方法。"""
+    position_changed = Signal(int)
+    duration_changed = Signal(int)
+    playback_state_changed = Signal(bool)
+    playback_finished = Signal()
+    current_item_changed = Signal(int, str)
+    file_loaded = Signal()
+    core_ready = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.resumed = {}
+
+    def is_ready(self) -> bool:
+        return False
+
+    def get_player_handle(self):
+        return None
+
+    def resume_at(self, position: float):
+        self.resumed[self._path] = position
+
+    def open(self, index: int, path: str):
+        self._path = path
+        self.current_item_changed.emit(index, path)
+
+
+def make_files(root: str, count: int, size: int) -> list:
+    paths = []
+    for i in range(count):
+        path = os.path.join(root, f"clip_{i:04d}.mkv")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="观看记录压力测试")
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--file-size', type=int, default=256 * 1024)
+    parser.add_argument('--rate', type=int, default=1000, help="每秒 position_changed 次数")
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--switch', type=float, default=0.5, help="每隔多少秒切换文件")
+    parser.add_argument('--flush-ms', type=int, default=WatchHistory.FLUSH_INTERVAL_MS)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args(argv)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    main_thread = threading.current_thread().name
+    sql_threads = {}
+    lock = threading.Lock()
+
+    def trace(statement):
+        name = threading.current_thread().name
+        with lock:
+            sql_threads[name] = sql_threads.get(name, 0) + 1
+
+    root = tempfile.mkdtemp(prefix="history_stress_")
+    try:
+        paths = make_files(root, args.files, args.file_size)
+        source = _SignalSource()
+        store = HistoryStore(os.path.join(root, "history.sqlite3"), trace=trace)
+        history = WatchHistory(source, store)
+        history._timer.setInterval(args.flush_ms)
+
+        expected = {}
+        updates = 0
+        max_cost = 0.0
+        index = -1
+        next_switch = 0.0
+        interval = 1.0 / args.rate
+        started = time.monotonic()
+        deadline = started + args.seconds
+        now = started
+        while now < deadline:
+            if now >= next_switch:
+                index = (index + 1) % len(paths)
+                source.open(index, paths[index])
+                pump_events(0.005)  # 让查询结果回到主线程
+                source.duration_changed.emit(3600 * 1000)
+                next_switch = now + args.switch
+                position = 60.0
+            position += 0.1
+            t0 = time.perf_counter()
+            source.position_changed.emit(int(position * 1000))
+            if updates % 5000 == 4999:
+                source.playback_state_changed.emit(False)
+            max_cost = max(max_cost, time.perf_counter() - t0)
+            updates += 1
+            expected[paths[index]] = int(position * 1000) / 1000.0
+            if updates % 100 == 0:
+                app.processEvents(QEventLoop.AllEvents)
+            # 按 --rate 节流
+            target = started + updates * interval
+            now = time.monotonic()
+            if target > now:
+                time.sleep(target - now)
+                now = target
+        elapsed = time.monotonic() - started
+        history.close()  # 写出最后的位置并结束写线程
+        source.current_item_changed.disconnect(history._on_item_changed)
+
+        # 改名一半文件，再用新的 WatchHistory 逐个重新打开，核对续播位置
+        for path in paths[::2]:
+            os.replace(path, path + ".renamed.mkv")
+        verify = WatchHistory(source, HistoryStore(store.path, trace=trace))
+        missing = 0
+        for i, path in enumerate(paths):
+            if path not in expected:
+                continue
+            opened = path + ".renamed.mkv" if i % 2 == 0 else path
+            source.open(i, opened)
+            verify.store().flush()
+            pump_events()
+            got = source.resumed.get(opened)
+            if got is None or abs(got - expected[path]) > 1.0:
+                missing += 1
+        verify.close()
+
+        stats = store.stats
+        report = {
+            'updates': updates,
+            'seconds': round(elapsed, 2),
+            'updates_per_s': round(updates / elapsed, 1),
+            'max_signal_ms': round(max_cost * 1000, 3),
+            'submitted': stats.submitted,
+            'rows_written': stats.written,
+            'write_batches': stats.batches,
+            'write_ms': round(stats.write_s * 1000, 1),
+            'lookups': stats.lookups,
+            'sql_by_thread': sql_threads,
+            'main_thread_sql': sql_threads.get(main_thread, 0),
+            'files_checked': len(expected),
+            'resume_missing': missing,
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    for key, value in report.items():
+        print(f"{key:>16}: {value}")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0 if report['main_thread_sql'] == 0 and report['resume_missing'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# bench/overlay.py —— 悬浮控制层压力测试：控件频繁重画时核对视频只在有新帧时重新渲染
+"""
+需要 GPU 和窗口环境，在仓库根目录运行：
+    python -m bench.overlay --seconds 10 --out overlay.json
+
+PlayerUI 以悬浮控制层模式包住 MPVWidget，先暂停 --seconds 秒、再播放 --seconds 秒。两个阶段里都以
+--rate Hz 推送位置更新（时间标签、进度条）并反复显示 / 隐藏音量条。报告每个阶段的 paintGL 次数、
+其中实际 ctx.render 的次数、控制层各部分的重画次数和 GPU 渲染耗时。
+暂停阶段 ctx.render 应接近 0；播放阶段应接近片段帧率，而不随控件重画次数增长。
+"""
+import argparse
+import json
+import sys
+import time
+
+from PySide6.QtWidgets import QApplication
+
+from bench.clips import RESOLUTIONS, ensure_clip
+from bench.run import pump_events
+from iconmanager.icon_manager import IconManager
+from iconmanager.theme import THEMES
+from media_player import MediaPlayerService
+from media_widgets import PlayerUI
+from mpv_widget import MPVWidget
+from playlist import RepeatMode
+
+
+def run_phase(ui: PlayerUI, widget: MPVWidget, seconds: float, rate: float) -> dict:
+    """推送位置更新、切换音量条 seconds 秒，返回本阶段的计数增量"""
+    before = widget.render_stats()
+    gpu_before = widget.gpu_timing()
+    ui.reset_paint_stats()
+    position = 0
+    interval = 1.0 / rate
+    started = time.monotonic()
+    ticks = 0
+    while time.monotonic() - started < seconds:
+        position += int(interval * 1000)
+        ui.update_slider_position(position)
+        if ticks % max(1, int(rate)) == 0:
+            ui.volume_slider.setVisible(not ui.volume_slider.isVisible())
+        ticks += 1
+        pump_events(interval)
+    after = widget.render_stats()
+    gpu = widget.gpu_timing()
+    renders = after.renders - before.renders
+    gpu_frames = gpu.frames - gpu_before.frames
+    return {
+        'seconds': seconds,
+        'ui_updates': ticks,
+        'paint_calls': renders + after.skipped - before.skipped,
+        'renders': renders,
+        'composited_only': after.skipped - before.skipped,
+        'mpv_frames': after.frames - before.frames,
+        'overlay_paints': vars(ui.paint_stats()),
+        'gpu_ms_avg': round((gpu.total_ms - gpu_before.total_ms) / gpu_frames, 3) if gpu_frames else 0.0,
+        'gpu_ms_max': round(gpu.max_ms, 3),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="悬浮控制层与视频渲染的重画计数")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--rate', type=float, default=30.0, help="每秒位置更新次数")
+    parser.add_argument('--resolution', default='1080p', choices=list(RESOLUTIONS))
+    parser.add_argument('--size', default='1280x720', help="窗口大小")
+    parser.add_argument('--clip-dir', default=None)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    clip = ensure_clip(*RESOLUTIONS[args.resolution], seconds=30, clip_dir=args.clip_dir)
+
+    service = MediaPlayerService()
+    ui = PlayerUI(IconManager(next(iter(THEMES)), prebuild=False))
+    widget = MPVWidget(service)
+    ui.set_video_widget(widget, overlay=True)
+    widget.enable_gpu_timing()
+    ui.resize(*size)
+    ui.show()
+    service.duration_changed.connect(ui.set_slider_range)
+
+    service.set_repeat(RepeatMode.ONE)
+    service.set_media(clip)
+    pump_events(2.0)
+
+    service.get_player_handle().pause = True
+    pump_events(0.5)
+    paused = run_phase(ui, widget, args.seconds, args.rate)
+    service.get_player_handle().pause = False
+    pump_events(0.5)
+    playing = run_phase(ui, widget, args.seconds, args.rate)
+
+    report = {'clip': clip, 'paused': paused, 'playing': playing}
+    for name in ('paused', 'playing'):
+        phase = report[name]
+        print(f"{name:8s} paintGL {phase['paint_calls']:5d}  ctx.render {phase['renders']:5d}  "
+              f"仅合成 {phase['composited_only']:5d}  控制层 {phase['overlay_paints']['layer']:5d}  "
+              f"时间标签 {phase['overlay_paints']['current_time']:4d}  "
+              f"GPU avg {phase['gpu_ms_avg']:.3f} ms  max {phase['gpu_ms_max']:.3f} ms")
+    ui.close()
+    widget.close()
+    service.close()
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
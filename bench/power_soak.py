@@ -0,0 +1,68 @@
+# bench/power_soak.py —— 长时间播放时交替可见 / 最小化，核对 PowerManager 各状态的 CPU 占用
+"""
+需要窗口环境，在仓库根目录运行：
+    python -m bench.power_soak --cycles 10 --visible 20 --hidden 40 --out power.json
+
+每个周期先正常显示 --visible 秒，再最小化 --hidden 秒（超过 AUDIO_ONLY_DELAY 后进入纯音频解码），
+结束时打印各状态的 CPU 占用。--no-manager 时不启用 PowerManager，用同样的节奏得到对照数据。
+"""
+import argparse
+import json
+import sys
+
+from PySide6.QtWidgets import QApplication, QMainWindow
+
+from bench.clips import RESOLUTIONS, ensure_clip
+from bench.run import pump_events
+from media_player import MediaPlayerService
+from mpv_widget import MPVWidget
+from playlist import RepeatMode
+from power_manager import PowerManager
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="PowerManager 长时间功耗测试")
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--visible', type=float, default=20.0)
+    parser.add_argument('--hidden', type=float, default=40.0)
+    parser.add_argument('--resolution', default='1080p', choices=list(RESOLUTIONS))
+    parser.add_argument('--no-manager', action='store_true', help="不启用 PowerManager，作为对照")
+    parser.add_argument('--clip-dir', default=None)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    clip = ensure_clip(*RESOLUTIONS[args.resolution], seconds=60, clip_dir=args.clip_dir)
+
+    window = QMainWindow()
+    service = MediaPlayerService()
+    widget = MPVWidget(service)
+    window.setCentralWidget(widget)
+    window.resize(1280, 720)
+    window.show()
+    manager = PowerManager(window, widget, service, enforce=not args.no_manager)
+
+    service.set_repeat(RepeatMode.ONE)
+    service.set_media(clip)
+    pump_events(2.0)
+    manager.reset_report()
+    for cycle in range(args.cycles):
+        window.showNormal()
+        pump_events(args.visible)
+        window.showMinimized()
+        pump_events(args.hidden)
+        print(f"周期 {cycle + 1}/{args.cycles} 完成")
+    window.showNormal()
+    pump_events(1.0)
+
+    print(manager.format_report())
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'clip': clip, 'manager': not args.no_manager, 'states': manager.report()}, f, indent=2)
+    window.close()
+    service.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# bench/profiles.py —— 经限速 HTTP 服务播放，比较各播放配置的卡顿次数与 seek 延迟
+"""
+在仓库根目录运行（vo=null，不需要 GPU）：
+    python -m bench.profiles --bandwidth 60 --latency 30 --resolution 2160p --out profiles.json
+
+每个配置打开同一个片段的 HTTP 地址，先播放 --play 秒，再做 --seeks 次固定种子的随机 seek，
+每次 seek 后继续播放 --dwell 秒。卡顿次数为首帧之后 paused-for-cache 变为 yes 的次数；
+seek 延迟为发出 seek 到 playback-restart 的时间，包含等待缓存的时间。
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+
+from PySide6.QtCore import QCoreApplication
+
+from bench.clips import RESOLUTIONS, ensure_clip
+from bench.harness import BenchResults, Stopwatch, default_meta
+from bench.run import TIMEOUT, HeadlessPlayer, pump_events
+from bench.throttled_http import ThrottledHTTPServer
+from playback_profiles import PROFILES
+
+
+class RebufferCounter:
+    """在 mpv 事件线程里统计 paused-for-cache 的上升沿。"""
+
+    def __init__(self, player):
+        self._lock = threading.Lock()
+        self._stalled = False
+        self.armed = False
+        self.count = 0
+        player.observe_property('paused-for-cache', self._on_change)
+
+    def _on_change(self, name, value):
+        with self._lock:
+            if value and not self._stalled and self.armed:
+                self.count += 1
+            self._stalled = bool(value)
+
+
+def run_profile(name: str, url: str, args, duration: float) -> dict:
+    hp = HeadlessPlayer('null')
+    player = hp.player
+    counter = RebufferCounter(player)
+    try:
+        sw = Stopwatch()
+        with player.prepare_and_wait_for_event('playback_restart', timeout=TIMEOUT):
+            hp.service.set_media(url, profile=name)
+        first_frame_ms = sw.ms()
+        counter.armed = True
+        pump_events(args.play)
+
+        rng = random.Random(1234)  # 每个配置使用同一组 seek 位置
+        seek_ms = []
+        for _ in range(args.seeks):
+            position = rng.uniform(1.0, duration - args.dwell - 1.0)
+            sw = Stopwatch()
+            with player.prepare_and_wait_for_event('playback_restart', timeout=TIMEOUT):
+                hp.service.seek(position, 'keyframes')
+            seek_ms.append(sw.ms())
+            pump_events(args.dwell)
+        return {'first_frame_ms': first_frame_ms, 'seek_ms': seek_ms, 'rebuffers': counter.count}
+    finally:
+        hp.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="播放配置对比：限速 HTTP 来源下的卡顿与 seek 延迟")
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--bandwidth', type=float, default=60.0, help="链路带宽（Mbit/s）")
+    parser.add_argument('--latency', type=float, default=30.0, help="每个请求的延迟（毫秒）")
+    parser.add_argument('--resolution', default='2160p', choices=list(RESOLUTIONS))
+    parser.add_argument('--clip-seconds', type=int, default=60)
+    parser.add_argument('--play', type=float, default=10.0, help="首帧后连续播放的秒数")
+    parser.add_argument('--seeks', type=int, default=10)
+    parser.add_argument('--dwell', type=float, default=3.0, help="每次 seek 后继续播放的秒数")
+    parser.add_argument('--clip-dir', default=None)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args(argv)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    clip = ensure_clip(*RESOLUTIONS[args.resolution], seconds=args.clip_seconds, clip_dir=args.clip_dir)
+    server = ThrottledHTTPServer(os.path.dirname(clip), args.bandwidth, args.latency).start()
+    url = server.url(os.path.basename(clip))
+
+    results = BenchResults(default_meta(bandwidth_mbps=args.bandwidth, latency_ms=args.latency,
+                                        resolution=args.resolution))
+    print(f"{'配置':<8}{'首帧 ms':>10}{'seek 中位 ms':>14}{'seek 最大 ms':>14}{'卡顿':>6}{'下载 MiB':>10}")
+    try:
+        for name in (p.strip() for p in args.profiles.split(',') if p.strip()):
+            server.reset_stats()
+            r = run_profile(name, url, args, args.clip_seconds)
+            results.add(f'profile.{name}.first_frame_ms', r['first_frame_ms'], 'ms')
+            results.add_samples(f'profile.{name}.seek_ms', r['seek_ms'], 'ms')
+            results.add(f'profile.{name}.rebuffers', r['rebuffers'], 'count')
+            results.add(f'profile.{name}.downloaded_mib', server.stats.bytes_sent / 2**20, 'MiB')
+            ordered = sorted(r['seek_ms']) or [0.0]
+            print(f"{name:<8}{r['first_frame_ms']:>10.0f}{ordered[len(ordered) // 2]:>14.0f}"
+                  f"{ordered[-1]:>14.0f}{r['rebuffers']:>6d}{server.stats.bytes_sent / 2**20:>10.1f}")
+    finally:
+        server.stop()
+    if args.out:
+        results.save(args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
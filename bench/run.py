@@ -0,0 +1,325 @@
+# bench/run.py —— 无界面性能基准：启动、加载、seek、渲染吞吐与属性回调开销
+"""
+在仓库根目录运行：
+    python -m bench.run --out bench_results.json
+    python -m bench.run --baseline bench_results.json --tolerance 0.10
+
+--render null 使用 vo=null（只解码不渲染），--render sw 走软件渲染路径，
+两者都不需要 GPU。与基线比较时，任何指标朝坏的方向变化超过容差都会使退出码为 1。
+gui_latency 场景的 ipc 后端需要命令行 mpv（PATH 中或由 MYPLAYER_MPV 指定）。
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, Qt, QTimer
+
+from bench.clips import RESOLUTIONS, ensure_audio_clip, ensure_clip
+from bench.harness import BenchResults, Stopwatch, compare, default_meta, format_comparison
+from media_player import MediaPlayerService, PropertyBridge
+from playlist import RepeatMode
+
+TIMEOUT = 20
+
+
+def pump_events(seconds: float = 0.0):
+    """在给定时间内处理 Qt 事件（至少一轮），让 PropertyBridge 的排队信号和定时器得以执行。"""
+    app = QCoreApplication.instance()
+    deadline = time.monotonic() + seconds
+    while True:
+        app.processEvents(QEventLoop.AllEvents, 20)
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(0.001)
+
+
+class HeadlessPlayer:
+    """
+    MediaPlayerService 加可选的软件渲染器。
+    render='null' 时以 playback-restart 事件作为“第一帧”，'sw' 时以第一次 sw 渲染完成为准。
+    frames 是单调递增的帧数：'sw' 时数渲染次数，'null' 时累加 estimated-frame-number 的增量
+    （循环播放时它在每次回到开头时归零）。
+    """
+
+    def __init__(self, render: str = 'null', size=(1280, 720), **mpv_options):
+        options = {'vo': 'null'} if render == 'null' else {'vo': 'libmpv'}
+        options.update(mpv_options)
+        self.service = MediaPlayerService(**options)
+        self.player = self.service.get_player_handle()
+        self.frames = 0
+        self._frame_number = None
+        self._frame_event = threading.Event()
+        self._renderer = None
+        if render == 'null':
+            self.player.observe_property('estimated-frame-number', self._on_frame_number)
+        if render == 'sw':
+            from mpv_sw_widget import SoftwareRenderer
+            self._renderer = SoftwareRenderer(self.player, self._on_frame)
+            self._renderer.start()
+            self._renderer.resize(*size)
+            # resize 会先渲染一帧空白画面，等它完成后再开始计时
+            self._frame_event.wait(1.0)
+
+    def _on_frame(self):
+        self.frames += 1
+        self._frame_event.set()
+
+    def _on_frame_number(self, name, value):
+        # mpv 线程；数值变小说明循环回到了开头，新的计数本身就是回绕后的帧数
+        if value is None:
+            return
+        last = self._frame_number
+        if last is not None:
+            self.frames += value - last if value >= last else value
+        self._frame_number = value
+
+    def frame_count(self) -> int:
+        return self.frames
+
+    def load(self, path: str) -> float:
+        """加载文件并等待第一帧，返回耗时（毫秒）。"""
+        self._frame_event.clear()
+        sw = Stopwatch()
+        if self._renderer is None:
+            with self.player.prepare_and_wait_for_event('playback_restart', timeout=TIMEOUT):
+                self.service.set_media(path)
+        else:
+            self.service.set_media(path)
+            if not self._frame_event.wait(TIMEOUT):
+                raise TimeoutError(f"{path}: {TIMEOUT}s 内没有渲染出第一帧")
+        return sw.ms()
+
+    def seek(self, position: float, precision: str) -> float:
+        sw = Stopwatch()
+        with self.player.prepare_and_wait_for_event('playback_restart', timeout=TIMEOUT):
+            self.player.seek(position, reference='absolute', precision=precision)
+        return sw.ms()
+
+    def close(self):
+        if self._renderer is not None:
+            self._renderer.stop()
+        self.service.close()
+
+
+def bench_startup(results: BenchResults, clip: str, render: str, repeats: int):
+    create_ms, first_frame_ms = [], []
+    for _ in range(repeats):
+        sw = Stopwatch()
+        hp = HeadlessPlayer(render)
+        create_ms.append(sw.ms())
+        try:
+            first_frame_ms.append(hp.load(clip))
+        finally:
+            hp.close()
+    results.add_samples('startup.create_player_ms', create_ms, 'ms')
+    results.add_samples('startup.first_frame_ms', first_frame_ms, 'ms')
+
+
+def bench_seek(results: BenchResults, clip: str, render: str, count: int, duration: float):
+    hp = HeadlessPlayer(render)
+    try:
+        hp.load(clip)
+        hp.player.pause = True
+        rng = random.Random(1234)  # 固定种子，保证每次运行的 seek 位置一致
+        positions = [rng.uniform(0.5, duration - 0.5) for _ in range(count)]
+        for precision in ('keyframes', 'exact'):
+            samples = [hp.seek(pos, precision) for pos in positions]
+            results.add_samples(f'seek.{precision}_ms', samples, 'ms')
+    finally:
+        hp.close()
+
+
+def bench_fps(results: BenchResults, clips: dict, render: str, seconds: float):
+    for label, (clip, size) in clips.items():
+        # untimed：不按时钟等待，测出解码+渲染的持续吞吐
+        hp = HeadlessPlayer(render, size=size, untimed=True, aid='no')
+        hp.service.set_repeat(RepeatMode.ONE)  # 构造参数里的 loop_file 会被加载时的循环模式覆盖
+        try:
+            hp.load(clip)
+            start_frames = hp.frame_count()
+            sw = Stopwatch()
+            time.sleep(seconds)
+            elapsed = sw.ms() / 1000.0
+            results.add(f'render.{label}.fps', (hp.frame_count() - start_frames) / elapsed, 'fps', 'higher')
+        finally:
+            hp.close()
+
+
+def bench_property_bridge(results: BenchResults, clip: str, seconds: float, pushes: int = 200_000):
+    # 1) 单次 push 的开销：在工作线程里连续推送，模拟 mpv 事件线程
+    bridge = PropertyBridge({'time-pos': 100})
+    sw = Stopwatch()
+    worker = threading.Thread(target=lambda: [bridge.push('time-pos', i * 0.001) for i in range(pushes)])
+    worker.start()
+    worker.join()
+    results.add('property.push_ns', sw.ms() * 1e6 / pushes, 'ns')
+    pump_events(0.2)
+
+    # 2) 实际播放时，mpv 回调次数与主线程唤醒次数之比
+    hp = HeadlessPlayer('null')
+    hp.service.set_repeat(RepeatMode.ONE)
+    try:
+        hp.load(clip)
+        stats_bridge = hp.service.get_property_bridge()
+        stats_bridge.reset_stats()
+        pump_events(seconds)
+        stats = stats_bridge.stats()
+    finally:
+        hp.close()
+    results.add('property.callbacks_per_s', stats.received / seconds, '1/s', 'higher')
+    results.add('property.gui_wakeups_per_s', stats.wakeups / seconds, '1/s')
+    results.add('property.gui_flushes_per_s', stats.flushes / seconds, '1/s')
+    if stats.received:
+        results.add('property.merged_ratio', stats.merged / stats.received, 'ratio', 'higher')
+
+
+def bench_playlist(results: BenchResults, clip: str, items: int = 4):
+    """连续播放同一短片段 items 次，测量相邻条目之间的切换延迟。"""
+    hp = HeadlessPlayer('null')
+    finished = []
+    hp.service.playback_finished.connect(lambda: finished.append(True))
+    try:
+        hp.service.set_playlist([clip] * items)
+        deadline = time.monotonic() + TIMEOUT * items
+        while not finished and time.monotonic() < deadline:
+            pump_events(0.1)
+        samples = hp.service.transition_latencies()[1:]  # 第一项是初次加载
+    finally:
+        hp.close()
+    results.add_samples('playlist.transition_ms', samples, 'ms')
+
+
+def bench_waveform(results: BenchResults, clip: str, audio_seconds: int):
+    """长音频的波形概览：流式解码 + 分箱的吞吐，以及命中缓存时的加载耗时。"""
+    from waveform import WaveformData, build_waveform
+
+    sw = Stopwatch()
+    data = build_waveform(clip, WaveformData())
+    elapsed = sw.ms() / 1000.0
+    results.add('waveform.bins_per_s', data.filled / elapsed, 'bins/s', 'higher')
+    results.add('waveform.realtime_factor', audio_seconds / elapsed, 'x', 'higher')
+
+    path = clip + '.bench.wfm'
+    data.save(path)
+    sw = Stopwatch()
+    WaveformData.load(path)
+    results.add('waveform.cache_load_ms', sw.ms(), 'ms')
+    sw = Stopwatch()
+    data.columns(1920)
+    results.add('waveform.columns_1920_ms', sw.ms(), 'ms')
+
+
+def measure_gui_lag(seconds: float, interval_ms: int = 5):
+    """
+    在 GUI 线程上跑一个精确定时器，记录每次触发比预定时刻晚了多少毫秒。
+    GUI 线程被属性回调或 GIL 争用拖住时，延迟会直接体现在这里。
+    """
+    app = QCoreApplication.instance()
+    timer = QTimer()
+    timer.setTimerType(Qt.PreciseTimer)
+    timer.setInterval(interval_ms)
+    lags = []
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        lags.append(max(0.0, (now - last[0]) * 1000.0 - interval_ms))
+        last[0] = now
+
+    timer.timeout.connect(tick)
+    loop = QEventLoop(app)
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    timer.start()
+    loop.exec()
+    timer.stop()
+    return lags
+
+
+def bench_gui_latency(results: BenchResults, clip: str, seconds: float, backends):
+    """同一片段分别用进程内和子进程后端播放，比较 GUI 线程的定时器延迟与属性投递量。"""
+    results.add_samples('gui_latency.idle_ms', measure_gui_lag(seconds), 'ms')
+    for backend in backends:
+        # 解码不限速，尽量放大 mpv 回调对 GUI 线程的干扰
+        service = MediaPlayerService(backend=backend, vo='null', untimed=True)
+        service.set_repeat(RepeatMode.ONE)
+        restarted = []
+        service.seek_finished.connect(restarted.append)
+        try:
+            service.set_media(clip)
+            deadline = time.monotonic() + TIMEOUT
+            while not restarted and time.monotonic() < deadline:
+                pump_events(0.05)
+            if not restarted:
+                raise TimeoutError(f"{backend}: {TIMEOUT}s 内没有开始播放")
+            bridge = service.get_property_bridge()
+            bridge.reset_stats()
+            lags = measure_gui_lag(seconds)
+            stats = bridge.stats()
+        finally:
+            service.close()
+        results.add_samples(f'gui_latency.{backend}_ms', lags, 'ms')
+        results.add(f'gui_latency.{backend}.property_callbacks_per_s', stats.received / seconds, '1/s', 'higher')
+
+
+SCENARIOS = ('startup', 'seek', 'fps', 'property', 'playlist', 'waveform', 'gui_latency')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="myPlayer 无界面性能基准")
+    parser.add_argument('--render', choices=('null', 'sw'), default='null')
+    parser.add_argument('--only', default=','.join(SCENARIOS), help="逗号分隔的场景：" + ','.join(SCENARIOS))
+    parser.add_argument('--resolutions', default='480p,720p,1080p')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seeks', type=int, default=20)
+    parser.add_argument('--seconds', type=float, default=3.0, help="吞吐与属性场景的采样时长")
+    parser.add_argument('--audio-seconds', type=int, default=3600, help="波形场景的音频时长")
+    parser.add_argument('--backends', default='inprocess,ipc', help="GUI 延迟场景比较的播放后端")
+    parser.add_argument('--clip-dir', default=None)
+    parser.add_argument('--out', default=None, help="结果 JSON 输出路径")
+    parser.add_argument('--baseline', default=None, help="与之比较的基线 JSON")
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    only = {s.strip() for s in args.only.split(',') if s.strip()}
+    clip_seconds = 10
+    base_clip = ensure_clip(1280, 720, seconds=clip_seconds, gop=60, clip_dir=args.clip_dir)
+
+    results = BenchResults(default_meta(render=args.render))
+    if 'startup' in only:
+        bench_startup(results, base_clip, args.render, args.repeats)
+    if 'seek' in only:
+        bench_seek(results, base_clip, args.render, args.seeks, clip_seconds)
+    if 'fps' in only:
+        clips = {}
+        for label in args.resolutions.split(','):
+            w, h = RESOLUTIONS[label.strip()]
+            clips[label.strip()] = (ensure_clip(w, h, seconds=clip_seconds, clip_dir=args.clip_dir), (w, h))
+        bench_fps(results, clips, args.render, args.seconds)
+    if 'property' in only:
+        bench_property_bridge(results, base_clip, args.seconds)
+    if 'playlist' in only:
+        bench_playlist(results, ensure_clip(1280, 720, seconds=3, clip_dir=args.clip_dir))
+    if 'waveform' in only:
+        bench_waveform(results, ensure_audio_clip(args.audio_seconds, clip_dir=args.clip_dir), args.audio_seconds)
+    if 'gui_latency' in only:
+        bench_gui_latency(results, base_clip, args.seconds, [b.strip() for b in args.backends.split(',') if b.strip()])
+
+    for name, metric in sorted(results.metrics.items()):
+        print(f"{name:<44} {metric.value:>12.3f} {metric.unit}")
+    if args.out:
+        results.save(args.out)
+
+    if args.baseline:
+        rows = compare(results, BenchResults.load(args.baseline), args.tolerance)
+        print()
+        print(format_comparison(rows))
+        if any(r[4] for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# bench/throttled_http.py —— 限速、加延迟的本地 HTTP 文件服务，模拟 NAS / 网络流来源
+"""
+单独运行（在仓库根目录）：
+    python -m bench.throttled_http --dir /path/to/clips --bandwidth 40 --latency 30
+
+支持 Range 请求（mpv 靠它 seek）。带宽是所有连接共享的一条链路（Mbit/s），
+延迟加在每个请求返回响应头之前，相当于一次往返。
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK = 64 * 1024
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    range_requests: int = 0
+    bytes_sent: int = 0
+
+
+class Link:
+    """令牌桶：所有连接共享 bandwidth 字节/秒；bandwidth 为 0 表示不限速。"""
+
+    def __init__(self, bandwidth: float):
+        self.bandwidth = bandwidth
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    def consume(self, nbytes: int):
+        if self.bandwidth <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + nbytes / self.bandwidth
+            wait = self._next_free - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: 'ThrottledHTTPServer'
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _serve(self, body: bool):
+        server = self.server
+        path = os.path.join(server.root, urllib.parse.unquote(self.path.split('?', 1)[0]).lstrip('/'))
+        if not os.path.isfile(path) or os.path.commonpath([server.root, os.path.abspath(path)]) != server.root:
+            self.send_error(404)
+            return
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = _RANGE.match(self.headers.get('Range', ''))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        with server.stats_lock:
+            server.stats.requests += 1
+            server.stats.range_requests += bool(match)
+        if server.latency > 0:
+            time.sleep(server.latency)
+
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if match:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if not body:
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = f.read(min(CHUNK, remaining))
+                if not data:
+                    break
+                server.link.consume(len(data))
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    return  # mpv seek 时会直接断开旧连接
+                remaining -= len(data)
+                with server.stats_lock:
+                    server.stats.bytes_sent += len(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThrottledHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, root: str, bandwidth_mbps: float = 0.0, latency_ms: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.root = os.path.abspath(root)
+        self.link = Link(bandwidth_mbps * 1e6 / 8)
+        self.latency = latency_ms / 1000.0
+        self.stats = ServerStats()
+        self.stats_lock = threading.Lock()
+        self._thread = None
+
+    def url(self, filename: str) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/{urllib.parse.quote(filename)}"
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = ServerStats()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="throttled-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="限速 HTTP 文件服务")
+    parser.add_argument('--dir', default='.')
+    parser.add_argument('--bandwidth', type=float, default=40.0, help="Mbit/s，0 表示不限速")
+    parser.add_argument('--latency', type=float, default=30.0, help="每个请求的延迟（毫秒）")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+    server = ThrottledHTTPServer(args.dir, args.bandwidth, args.latency, port=args.port)
+    print(f"serving {server.root} at http://127.0.0.1:{server.server_address[1]}/ "
+          f"({args.bandwidth} Mbit/s, {args.latency} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# bench/wall.py —— 视频墙容量测试：逐级增加格子数，记录整体与每格的帧时序
+"""
+需要 GPU 和窗口环境，在仓库根目录运行：
+    python -m bench.wall --tiles 4,9,16 --seconds 10 --out wall.json
+
+每一级打开一个 VideoWall，全部格子播放同一个测试片段（循环），
+预热后统计 --seconds 秒。每格实际帧率低于 --min-fps 时认为这一级超出了本机能力。
+"""
+import argparse
+import json
+import sys
+
+from PySide6.QtWidgets import QApplication
+
+from bench.clips import RESOLUTIONS, ensure_clip
+from bench.run import pump_events
+from playlist import RepeatMode
+from video_wall import VideoWall
+
+
+def run_level(clip: str, tiles: int, seconds: float, warmup: float, size) -> dict:
+    wall = VideoWall(count=tiles)
+    wall.resize(*size)
+    wall.show()
+    for tile in wall.tiles:
+        tile.service.set_repeat(RepeatMode.ONE)
+    wall.set_sources([clip] * tiles)
+    pump_events(warmup)
+    for tile in wall.tiles:
+        tile.timing.reset()
+    wall.timing.reset()
+    pump_events(seconds)
+    result = wall.timings()
+    wall.close()
+    pump_events(0.5)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="myPlayer 视频墙容量测试")
+    parser.add_argument('--tiles', default='4,9,16')
+    parser.add_argument('--resolution', default='1080p', choices=list(RESOLUTIONS))
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--min-fps', type=float, default=24.0, help="每格最低可接受帧率")
+    parser.add_argument('--size', default='1920x1080', help="窗口大小")
+    parser.add_argument('--clip-dir', default=None)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    clip = ensure_clip(*RESOLUTIONS[args.resolution], seconds=30, clip_dir=args.clip_dir)
+
+    levels = []
+    for tiles in (int(n) for n in args.tiles.split(',')):
+        result = run_level(clip, tiles, args.seconds, args.warmup, size)
+        # REDUCED 格子被有意限到 VideoWall.REDUCED_FPS，按各自的目标帧率判断
+        worst = min((t['fps'] / (VideoWall.REDUCED_FPS if t['quality'] == 'reduced' else args.min_fps)
+                     for t in result['per_tile']), default=0.0)
+        result['ok'] = worst >= 1.0
+        levels.append(result)
+        agg = result['aggregate']
+        print(f"{tiles:3d} 格  节拍 {agg['fps']:6.1f} fps  合成 p95 {agg['render_ms']['p95']:6.2f} ms  "
+              f"最差格子 {worst * 100:5.1f}%  {'OK' if result['ok'] else '超出'}")
+        for t in result['per_tile']:
+            print(f"      #{t['index']:<2d} {t['size'][0]}x{t['size'][1]} {t['quality'] or '-':8s} "
+                  f"{t['fps']:6.1f} fps  丢帧 {t['dropped_frames']}")
+
+    passed = [lv['tiles'] for lv in levels if lv['ok']]
+    print(f"本机可承载的最大格子数：{max(passed) if passed else '无'}")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'clip': clip, 'levels': levels}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
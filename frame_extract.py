@@ -0,0 +1,404 @@
+# frame_extract.py —— 无界面批量抽帧：排序合并定位、直接渲染进 NumPy 数组、线程池编码、多文件进程池
+"""
+命令行（在仓库根目录）：
+    python frame_extract.py a.mkv --times 1.5,10,42.2 --out frames/
+    python frame_extract.py a.mkv b.mkv --every 5 --width 640 --format jpg --out frames/ --processes 2
+    python frame_extract.py a.mkv --scenes 0.3 --format npy --out frames/
+
+程序内：
+    with FrameExtractor(width=640) as ex:
+        times, frames = ex.extract('a.mkv', [1.5, 10, 42.2])   # frames: (N, h, w, 4) uint8，RGBX
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+import applog
+from keyframe_index import KeyframeIndex, load_cached, read_keyframes, save_cached
+from subprocess_util import NO_WINDOW
+
+_log = applog.get_logger("extract")
+
+ALIGN = 64
+# 没有关键帧索引时，目标在当前帧之后这么多帧以内才用 frame-step 逐帧前进
+STEP_LIMIT_WITHOUT_INDEX = 4
+# 有索引时逐帧前进的上限：每一步是一次命令往返，太远时 seek 过去更快
+MAX_STEP_FRAMES = 48
+
+
+@dataclass
+class ExtractStats:
+    files: int = 0
+    frames: int = 0
+    seeks: int = 0
+    steps: int = 0        # 用 frame-step 代替 seek 得到的帧
+    missed: int = 0       # 超时没有得到画面的时间点
+    decode_s: float = 0.0  # 定位、解码与渲染的时间
+    elapsed_s: float = 0.0
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def merge(self, other: 'ExtractStats'):
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def summary(self) -> str:
+        return (f"{self.files} 个文件 {self.frames} 帧，{self.elapsed_s:.1f} s，{self.fps:.1f} 帧/秒"
+                f"（seek {self.seeks}，逐帧 {self.steps}，失败 {self.missed}）")
+
+
+# --- 时间点 ---
+
+def timestamps_every(duration: float, step: float, start: float = 0.0) -> list:
+    count = int((duration - start) / step) + 1 if duration > start else 0
+    return [start + i * step for i in range(count) if start + i * step < duration]
+
+
+def detect_scenes(path: str, threshold: float = 0.3, ffmpeg: str = 'ffmpeg') -> list:
+    """
+    用 ffmpeg 的 scene 评分找镜头切换点（秒），总是包含 0。
+    先缩到 160 像素宽再评分，解码之外的开销可以忽略。
+    """
+    cmd = [ffmpeg, '-nostdin', '-v', 'info', '-i', path, '-an', '-sn',
+           '-vf', f"scale=160:-2,select='gt(scene,{threshold})',showinfo", '-f', 'null', '-']
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          creationflags=NO_WINDOW, check=True)
+    times = [0.0]
+    for match in re.finditer(rb'showinfo.*?pts_time:\s*([0-9.]+)', proc.stderr):
+        times.append(float(match.group(1)))
+    return times
+
+
+def load_keyframes(path: str, ffprobe: str = 'ffprobe'):
+    """读取（必要时构建并缓存）关键帧索引；没有 ffprobe 时返回 None。"""
+    index = load_cached(path)
+    if index is not None:
+        return index
+    try:
+        times = read_keyframes(path, ffprobe)
+    except OSError:
+        return None
+    if not times:
+        return None
+    index = KeyframeIndex(times)
+    try:
+        save_cached(path, index)
+    except OSError:
+        pass
+    return index
+
+
+def plan_extraction(times, keyframes: KeyframeIndex = None, fps: float = None) -> list:
+    """
+    时间点去重、排序后决定每一个怎么到达，返回 [(秒, 'seek' | 'step', 步数)]。
+
+    精确 seek 要从目标之前的关键帧开始解码；目标就在上一帧后面不远时，
+    frame-step 逐帧前进解码的帧更少。有关键帧索引时按两者要解码的帧数比较，
+    同一个 GOP 里的多个时间点因此只解码一遍。
+    """
+    plan = []
+    previous = None
+    for t in sorted({max(0.0, float(t)) for t in times}):
+        action, count = 'seek', 0
+        if previous is not None and fps:
+            step_frames = round((t - previous) * fps)
+            if keyframes is not None and len(keyframes):
+                seek_frames = round((t - keyframes.floor(t)) * fps) + 1
+                if 0 < step_frames <= min(seek_frames, MAX_STEP_FRAMES):
+                    action, count = 'step', step_frames
+            elif 0 < step_frames <= STEP_LIMIT_WITHOUT_INDEX:
+                action, count = 'step', step_frames
+        plan.append((t, action, count))
+        previous = t
+    return plan
+
+
+# --- 帧缓冲 ---
+
+class FrameBlock:
+    """
+    N 帧连续分配的像素块，每帧行跨度按 64 字节对齐。mpv 直接把每一帧渲染进对应的位置，
+    frames 是 (N, h, w, 4) 的 RGBX 视图，交给调用方时不再拷贝。
+    """
+
+    def __init__(self, count: int, width: int, height: int):
+        self.width, self.height = width, height
+        self.stride = (width * 4 + ALIGN - 1) // ALIGN * ALIGN
+        frame_bytes = self.stride * height
+        raw = np.empty(count * frame_bytes + ALIGN, dtype=np.uint8)
+        offset = (-raw.ctypes.data) % ALIGN
+        self.rows = raw[offset:offset + count * frame_bytes].reshape(count, height, self.stride)
+        self.frames = self.rows[:, :, :width * 4].reshape(count, height, width, 4)
+
+    def address(self, i: int) -> int:
+        return self.rows[i].ctypes.data
+
+
+# --- 抽帧 ---
+
+class FrameExtractor:
+    """
+    一个无界面的 MediaPlayerService 加 'sw' 渲染上下文，可以连续处理多个文件。
+    width / height 都不给时输出原始显示尺寸，只给一个时按宽高比计算另一个。
+    需要 QCoreApplication（或在进程池工作进程中由 extract_file 创建）。
+    """
+    TIMEOUT = 10.0
+
+    def __init__(self, width: int = None, height: int = None, ffprobe: str = 'ffprobe', **mpv_options):
+        from media_player import MediaPlayerService
+        import mpv
+        import mpv_sw_widget  # noqa: F401  注册 sw 渲染参数
+
+        self._size = (width, height)
+        self._ffprobe = ffprobe
+        options = dict(vo='libmpv', aid='no', sid='no', ytdl=False, keep_open='yes',
+                       hr_seek='yes', hr_seek_framedrop=True)
+        options.update(mpv_options)
+        self.service = MediaPlayerService(**options)
+        self.player = self.service.get_player_handle()
+        self._frame = threading.Event()
+        self._ctx = mpv.MpvRenderContext(self.player, 'sw')
+        self._ctx.update_cb = self._frame.set
+        self.stats = ExtractStats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._ctx is not None:
+            self._ctx.update_cb = None
+            self._ctx.free()
+            self._ctx = None
+        self.service.close()
+
+    def open(self, path: str) -> float:
+        """加载文件并暂停，返回时长（秒）。"""
+        with self.player.prepare_and_wait_for_event('playback_restart', timeout=self.TIMEOUT):
+            self.service.set_media(path)
+        self.player.pause = True
+        self.stats.files += 1
+        return self.player.duration or 0.0
+
+    def output_size(self):
+        width, height = self._size
+        src_w, src_h = self.player.dwidth or 0, self.player.dheight or 0
+        if not src_w or not src_h:
+            raise RuntimeError("文件没有视频轨")
+        if width and not height:
+            height = max(2, round(src_h * width / src_w / 2) * 2)
+        elif height and not width:
+            width = max(2, round(src_w * height / src_h / 2) * 2)
+        return width or src_w, height or src_h
+
+    def _wait_frame(self, timeout: float) -> bool:
+        while self._frame.wait(timeout):
+            self._frame.clear()
+            if self._ctx.update():
+                return True
+        return False
+
+    def _seek(self, t: float) -> bool:
+        self._frame.clear()
+        try:
+            with self.player.prepare_and_wait_for_event('playback_restart', timeout=self.TIMEOUT):
+                self.service.seek(t, 'exact')
+        except TimeoutError:
+            return False
+        self.stats.seeks += 1
+        return self._wait_frame(1.0)
+
+    def _step(self, count: int, render) -> bool:
+        """
+        逐帧前进 count 帧。vo=libmpv 下 mpv 在帧被渲染之前不会继续（flip_page 等待），
+        所以每个中间帧都要 render()；它们画进同一个目标格子，最后一帧覆盖之前的。
+        """
+        for _ in range(count):
+            self._frame.clear()
+            self.player.command('frame-step')
+            if not self._wait_frame(1.0):
+                return False
+            render()
+        self.stats.steps += 1
+        return True
+
+    def extract(self, path: str, times=None, every: float = None, block: FrameBlock = None):
+        """
+        返回 (实际时间列表, (N, h, w, 4) 数组)，按时间排序、去重；没取到的帧实际时间为 None，像素不确定。
+        every 不为 None 时忽略 times，按打开后得到的时长每隔 every 秒取一帧。
+        block 可传入预先分配好的 FrameBlock 以复用内存。
+        """
+        started = time.perf_counter()
+        duration = self.open(path)
+        if every is not None:
+            times = timestamps_every(duration, every)
+        keyframes = load_keyframes(path, self._ffprobe) if os.path.isfile(path) else None
+        plan = plan_extraction([t for t in times if t < duration or not duration], keyframes,
+                               self.player.container_fps)
+        width, height = self.output_size()
+        if block is None or block.frames.shape[:3] != (len(plan), height, width):
+            block = FrameBlock(len(plan), width, height)
+        actual = []
+        for i, (t, action, count) in enumerate(plan):
+            def render(i=i):
+                self._ctx.render(sw_size={'w': width, 'h': height}, sw_format='rgb0',
+                                 sw_stride={'stride': block.stride}, sw_pointer=block.address(i))
+
+            stepped = action == 'step' and self._step(count, render)
+            if not stepped:
+                # 逐帧前进失败（例如到了文件末尾）时退回 seek
+                if not self._seek(t):
+                    self.stats.missed += 1
+                    actual.append(None)
+                    continue
+                render()
+            actual.append(self.player.time_pos)
+            self.stats.frames += 1
+        self.stats.decode_s += time.perf_counter() - started
+        return actual, block.frames
+
+
+# --- 编码 ---
+
+def encode_frames(frames, times, out_dir: str, stem: str, fmt: str = 'png', quality: int = 90,
+                  pool: ThreadPoolExecutor = None) -> list:
+    """
+    把 (N, h, w, 4) 的帧编码成 PNG / JPEG，文件名带毫秒时间戳；在线程池里并行，返回写出的路径。
+    QImage 直接包装数组内存，不做格式转换拷贝。
+    """
+    from PySide6.QtGui import QImage
+
+    os.makedirs(out_dir, exist_ok=True)
+    own_pool = pool is None
+    pool = pool or ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="encode")
+    qt_format = 'JPEG' if fmt in ('jpg', 'jpeg') else 'PNG'
+    ext = 'jpg' if qt_format == 'JPEG' else 'png'
+
+    def encode(i: int, t: float) -> str:
+        frame = frames[i]
+        height, width = frame.shape[:2]
+        if frame.strides[1:] != (4, 1):
+            frame = np.ascontiguousarray(frame)
+        # FrameBlock 的帧每行带对齐填充，按行跨度把整帧当作一段连续内存交给 QImage
+        buffer = as_strided(frame, shape=(height * frame.strides[0],), strides=(1,))
+        image = QImage(buffer, width, height, frame.strides[0], QImage.Format_RGBX8888)
+        out = os.path.join(out_dir, f"{stem}_{int(round(t * 1000)):09d}.{ext}")
+        if not image.save(out, qt_format, quality if qt_format == 'JPEG' else -1):
+            raise OSError(f"无法写入 {out}")
+        return out
+
+    try:
+        futures = [pool.submit(encode, i, t) for i, t in enumerate(times) if t is not None]
+        return [f.result() for f in futures]
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+
+def save_npy(frames, times, out_dir: str, stem: str) -> str:
+    """所有帧存成一个 (N, h, w, 3) 的 .npy，时间戳存在同名 .times.npy。"""
+    os.makedirs(out_dir, exist_ok=True)
+    keep = [i for i, t in enumerate(times) if t is not None]
+    out = os.path.join(out_dir, f"{stem}.npy")
+    np.save(out, frames[keep, :, :, :3])
+    np.save(os.path.join(out_dir, f"{stem}.times.npy"), np.array([times[i] for i in keep]))
+    return out
+
+
+# --- 多文件 ---
+
+_worker_extractor = None
+
+
+def extract_file(path: str, out_dir: str, times=None, every: float = None, scenes: float = None,
+                 width: int = None, height: int = None, fmt: str = 'png', quality: int = 90) -> ExtractStats:
+    """
+    抽取一个文件并写到 out_dir，返回这个文件的统计。可在进程池工作进程中运行：
+    每个进程复用一个 FrameExtractor（一个 mpv），编码在线程池里与 mpv 的解码线程并行。
+    """
+    global _worker_extractor
+    from PySide6.QtCore import QCoreApplication
+
+    QCoreApplication.instance() or QCoreApplication([])
+    if _worker_extractor is None or _worker_extractor._size != (width, height):
+        if _worker_extractor is not None:
+            _worker_extractor.close()
+        _worker_extractor = FrameExtractor(width, height)
+    extractor = _worker_extractor
+    extractor.stats = ExtractStats()
+
+    started = time.perf_counter()
+    if scenes is not None:
+        times = detect_scenes(path, scenes)
+    actual, frames = extractor.extract(path, times or [], every=every)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if fmt == 'npy':
+        save_npy(frames, actual, out_dir, stem)
+    else:
+        encode_frames(frames, actual, out_dir, stem, fmt, quality)
+    stats = extractor.stats
+    stats.elapsed_s = time.perf_counter() - started
+    return stats
+
+
+def extract_many(paths, out_dir: str, processes: int = 1, **options) -> ExtractStats:
+    """把多个文件分给 processes 个工作进程（每个进程一个 mpv），返回汇总统计，elapsed_s 为墙钟时间。"""
+    total = ExtractStats()
+    started = time.perf_counter()
+    if processes <= 1:
+        for path in paths:
+            total.merge(extract_file(path, out_dir, **options))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {pool.submit(extract_file, path, out_dir, **options): path for path in paths}
+            for future, path in futures.items():
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    _log.error("%s 抽帧失败：%s", path, e)
+                    continue
+                _log.info("%s：%s", path, stats.summary())
+                total.merge(stats)
+    total.elapsed_s = time.perf_counter() - started
+    return total
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="无界面批量抽帧")
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--out', required=True, help="输出目录")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--times', help="逗号分隔的时间点（秒）")
+    source.add_argument('--every', type=float, help="每隔多少秒一帧")
+    source.add_argument('--scenes', type=float, metavar='THRESHOLD', help="镜头切换点（ffmpeg scene 阈值，约 0.3）")
+    parser.add_argument('--width', type=int, default=None)
+    parser.add_argument('--height', type=int, default=None)
+    parser.add_argument('--format', choices=('png', 'jpg', 'npy'), default='png')
+    parser.add_argument('--quality', type=int, default=90, help="JPEG 质量")
+    parser.add_argument('--processes', type=int, default=1, help="并行处理文件的进程数")
+    args = parser.parse_args(argv)
+
+    applog.configure_from_env()
+    times = [float(t) for t in args.times.split(',')] if args.times else None
+    stats = extract_many(args.paths, args.out, args.processes, times=times, every=args.every,
+                         scenes=args.scenes, width=args.width, height=args.height,
+                         fmt=args.format, quality=args.quality)
+    print(stats.summary())
+    return 0 if stats.frames else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# iconmanager/icon_cache.py —— 图标栅格缓存：内存（QPixmapCache）+ 磁盘（PNG 遮罩）两级
+import hashlib
+import os
+import sys
+import threading
+
+from PySide6.QtCore import QObject, QRect, QRectF, QSize, Qt, Signal
+from PySide6.QtGui import QColor, QImage, QPainter, QPixmap, QPixmapCache
+from PySide6.QtSvg import QSvgRenderer
+
+from app_paths import cache_dir
+
+try:
+    import numpy as np
+except ImportError:  # 没有 NumPy 时退回 QImage.setAlphaChannel 着色
+    np = None
+
+# 渲染方式变化时递增，旧的磁盘缓存自然失效
+# v2：磁盘上只存与颜色无关的灰度遮罩，着色在内存中完成
+CACHE_VERSION = 2
+
+
+def render_mask(svg_path: str, px_size: QSize) -> QImage:
+    """
+    把 SVG 渲染成指定像素尺寸的 8 位灰度遮罩（灰度值即不透明度）。
+    只用 QImage 绘制，可以在非 GUI 线程调用。
+    """
+    image = QImage(px_size, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    renderer = QSvgRenderer(svg_path)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    renderer.render(painter, QRectF(0, 0, px_size.width(), px_size.height()))
+    painter.end()
+    alpha = image.convertToFormat(QImage.Format_Alpha8)
+    # Alpha8 与 Grayscale8 内存布局相同，直接按灰度解释，便于存成 PNG
+    return QImage(alpha.constBits(), alpha.width(), alpha.height(),
+                  alpha.bytesPerLine(), QImage.Format_Grayscale8).copy()
+
+
+def tint_mask(mask: QImage, color: QColor) -> QImage:
+    """用单一颜色给灰度遮罩着色，返回预乘 ARGB32 图像（整张图一次处理）。"""
+    w, h = mask.width(), mask.height()
+    if np is None:
+        image = QImage(w, h, QImage.Format_ARGB32_Premultiplied)
+        image.fill(color)
+        image.setAlphaChannel(mask)
+        return image
+    alpha = np.frombuffer(mask.constBits(), dtype=np.uint8).reshape(h, mask.bytesPerLine())[:, :w]
+    r, g, b, a = color.red(), color.green(), color.blue(), color.alpha()
+    # ARGB32 在小端机器上的字节序为 B,G,R,A；预乘后 c' = c * (m*a/255) / 255
+    order = (b, g, r, 255) if sys.byteorder == 'little' else (255, r, g, b)
+    k = np.array(order, dtype=np.uint32) * a
+    out = ((alpha[..., None].astype(np.uint32) * k + 32512) // 65025).astype(np.uint8)
+    image = QImage(out.data, w, h, w * 4, QImage.Format_ARGB32_Premultiplied)
+    image.ndarray = out  # QImage 不持有 NumPy 缓冲，挂在对象上防止被回收
+    return image
+
+
+class IconAtlas:
+    """
+    把所有遮罩横向拼成一张灰度图。换主题时整张图一次着色，
+    再按矩形切出各个图标，不需要重新解析任何 SVG。
+    """
+
+    def __init__(self, masks: dict):
+        self.rects = {}
+        x = 0
+        height = max((m.height() for m in masks.values()), default=1)
+        for key, m in masks.items():
+            self.rects[key] = QRect(x, 0, m.width(), m.height())
+            x += m.width()
+        self.mask = QImage(max(1, x), height, QImage.Format_Grayscale8)
+        self.mask.fill(0)
+        # 按行拷贝字节；QPainter 在灰度图上的合成规则与遮罩语义不符，这里不用它
+        dst = self.mask.bits()
+        dst_bpl = self.mask.bytesPerLine()
+        for key, m in masks.items():
+            rect = self.rects[key]
+            src = m.constBits()
+            src_bpl = m.bytesPerLine()
+            for y in range(m.height()):
+                start = y * dst_bpl + rect.x()
+                dst[start:start + m.width()] = src[y * src_bpl:y * src_bpl + m.width()]
+
+    def tint(self, color: QColor) -> dict:
+        """返回 key -> 已着色 QImage。"""
+        sheet = tint_mask(self.mask, color)
+        return {key: sheet.copy(rect) for key, rect in self.rects.items()}
+
+
+class IconRasterCache(QObject):
+    """
+    第一级：QPixmapCache，键为 (svg, 颜色, 逻辑尺寸, devicePixelRatio)；
+    第二级：磁盘 PNG 遮罩，文件名由 SVG 内容哈希和像素尺寸组成，跨进程、跨主题复用。
+    prebuild() 在工作线程里批量准备遮罩，GUI 线程只需着色并转换成 QPixmap。
+    """
+    prebuild_finished = Signal(int)  # 本次预构建的遮罩数
+
+    def __init__(self, directory: str = None, parent=None):
+        super().__init__(parent)
+        self.directory = directory or cache_dir("icons")
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._digests = {}   # svg_path -> (mtime, size, digest)
+        self._masks = {}     # 磁盘文件名 -> QImage（QImage 隐式共享，取用不拷贝）
+        self._pending = {}   # 正在准备的文件名 -> threading.Event
+        self._thread = None
+        self._cancel = False
+        self.disk_hits = 0
+        self.renders = 0
+
+    # --- 键 ---
+
+    def _digest(self, svg_path: str) -> str:
+        st = os.stat(svg_path)
+        with self._lock:
+            cached = self._digests.get(svg_path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        with open(svg_path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:16]
+        with self._lock:
+            self._digests[svg_path] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def _file_name(self, svg_path: str, px_size: QSize) -> str:
+        return f"v{CACHE_VERSION}_{self._digest(svg_path)}_{px_size.width()}x{px_size.height()}.png"
+
+    @staticmethod
+    def pixmap_key(svg_path: str, color: QColor, size: QSize, dpr: float) -> str:
+        return f"icon:{svg_path}:{color.name(QColor.HexArgb)}:{size.width()}x{size.height()}@{dpr:g}"
+
+    # --- 查找 ---
+
+    def mask(self, svg_path: str, px_size: QSize) -> QImage:
+        """
+        按像素尺寸取遮罩：进程内已有 → 磁盘 → 渲染并写盘。线程安全；
+        同一张遮罩正在被另一个线程准备时等待其结果，而不是重复渲染。
+        """
+        name = self._file_name(svg_path, px_size)
+        with self._lock:
+            mask = self._masks.get(name)
+            if mask is not None:
+                return mask
+            pending = self._pending.get(name)
+            owner = pending is None
+            if owner:
+                pending = self._pending[name] = threading.Event()
+        if not owner:
+            pending.wait()
+            with self._lock:
+                mask = self._masks.get(name)
+            return mask if mask is not None else render_mask(svg_path, px_size)
+        try:
+            mask = self._load_or_render(name, svg_path, px_size)
+            with self._lock:
+                self._masks[name] = mask
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+            pending.set()
+        return mask
+
+    def _load_or_render(self, name: str, svg_path: str, px_size: QSize) -> QImage:
+        path = os.path.join(self.directory, name)
+        mask = QImage(path) if os.path.exists(path) else QImage()
+        if not mask.isNull():
+            self.disk_hits += 1
+            return mask.convertToFormat(QImage.Format_Grayscale8)
+        mask = render_mask(svg_path, px_size)
+        self.renders += 1
+        # 先写临时文件再改名，避免其他进程读到半个 PNG
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if mask.save(tmp, "PNG"):
+            os.replace(tmp, path)
+        return mask
+
+    def pixmap(self, svg_path: str, color: QColor, size: QSize, dpr: float = 1.0) -> QPixmap:
+        """GUI 线程调用。size 为逻辑尺寸，返回设置好 devicePixelRatio 的 QPixmap。"""
+        key = self.pixmap_key(svg_path, color, size, dpr)
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        px_size = QSize(round(size.width() * dpr), round(size.height() * dpr))
+        return self.insert_pixmap(key, tint_mask(self.mask(svg_path, px_size), color), dpr)
+
+    @staticmethod
+    def insert_pixmap(key: str, image: QImage, dpr: float) -> QPixmap:
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(dpr)
+        QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def atlas(self, entries) -> IconAtlas:
+        """entries 为 (key, svg_path, 像素尺寸 QSize)，用已缓存的遮罩拼出图集。"""
+        return IconAtlas({key: self.mask(svg_path, px_size) for key, svg_path, px_size in entries})
+
+    # --- 预构建 ---
+
+    def prebuild(self, jobs):
+        """
+        jobs 为 (svg_path, 像素尺寸 QSize) 的可迭代对象。
+        在后台线程中把磁盘缓存中已有的遮罩读入内存，缺失的渲染并写盘。
+        """
+        jobs = list(jobs)
+        self.cancel()
+        self._cancel = False
+        self._thread = threading.Thread(target=self._run_prebuild, args=(jobs,),
+                                        name="icon-prebuild", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        if self._thread is not None:
+            self._cancel = True
+            self._thread.join()
+            self._thread = None
+
+    def _run_prebuild(self, jobs):
+        done = 0
+        for svg_path, px_size in jobs:
+            if self._cancel:
+                break
+            if not os.path.exists(svg_path):
+                continue
+            self.mask(svg_path, px_size)
+            done += 1
+        self.prebuild_finished.emit(done)
@@ -1,30 +1,124 @@
-from PySide6.QtSvg import QSvgRenderer
-from PySide6.QtGui import (QColor, QIcon, QPainter, QPixmap)
+from PySide6.QtGui import (QColor, QGuiApplication, QIcon)
 import os
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import QSize
+from iconmanager.icon_cache import IconRasterCache
 from iconmanager.theme import THEMES
+import applog
+
+_log = applog.get_logger("ui/icons")
+
+# QIcon 在按钮、菜单、工具栏上常用的逻辑尺寸
+ICON_SIZES = (16, 24, 32)
+
+# 预构建顺序：PlayerUI 启动时就要用的排在前面
+ICON_NAMES = (
+    'play.svg', 'pause.svg', 'volume_high.svg', 'volume_off.svg',
+    'add.svg', 'delete.svg', 'edit.svg', 'save.svg', 'file_open.svg', 'warning.svg',
+)
 
 class IconManager:
     """
     一个集中管理和着色应用程序图标的类。
     """
-    def __init__(self, theme_name: str, base_path: str = 'icons'):
+    def __init__(self, theme_name: str, base_path: str = 'icons',
+                 raster_cache: IconRasterCache = None, prebuild: bool = True):
         """
         初始化图标管理器。
         :param theme: 主题名称。
         :param base_path: 存放SVG文件的基础路径。
+        :param raster_cache: 共享的栅格缓存，默认新建一个（磁盘目录在应用缓存目录下）。
+        :param prebuild: 是否立即在后台线程预构建所有图标。
         """
+        self.base_path = base_path
+        self._icon_cache = {}  # 用于缓存已创建的图标
+        self._theme_listeners = []
+        self._atlas = None
+        self.raster_cache = raster_cache or IconRasterCache()
+        self.theme_name, self.icon_color = self._resolve_theme(theme_name)
+        if prebuild:
+            self.prebuild()
+
+    @staticmethod
+    def _resolve_theme(theme_name: str):
         # 如果传入的是带.xml后缀的文件名，先清理一下
         if theme_name.endswith('.xml'):
             theme_name = theme_name[:-4]
 
         color_key = 'secondaryTextColor'
-            
+
         icon_color = THEMES[theme_name]['colors'][color_key]
+        return theme_name, QColor(icon_color)
 
-        self.icon_color = QColor(icon_color)
-        self.base_path = base_path
-        self._icon_cache = {}  # 用于缓存已创建的图标
+    @staticmethod
+    def available_themes():
+        return sorted(THEMES)
+
+    @staticmethod
+    def _device_pixel_ratios():
+        """所有屏幕的 devicePixelRatio（含 1.0），多显示器混合 DPI 时每种都准备一份。"""
+        ratios = {1.0}
+        if QGuiApplication.instance() is not None:
+            ratios.update(screen.devicePixelRatio() for screen in QGuiApplication.screens())
+        return sorted(ratios)
+
+    def _variants(self, svg_names):
+        """(svg_path, 逻辑尺寸, dpr, 像素尺寸) 的全部组合。"""
+        for name in svg_names:
+            svg_path = os.path.join(self.base_path, name)
+            for size in ICON_SIZES:
+                for dpr in self._device_pixel_ratios():
+                    px = round(size * dpr)
+                    yield svg_path, QSize(size, size), dpr, QSize(px, px)
+
+    def prebuild(self, svg_names=ICON_NAMES):
+        """在工作线程里批量准备 QIcon 需要的全部遮罩，GUI 线程随后只做着色和 QPixmap 转换。"""
+        self.raster_cache.prebuild((svg_path, px) for svg_path, _, _, px in self._variants(svg_names))
+
+    # --- 主题切换 ---
+
+    def add_theme_listener(self, callback):
+        """callback(theme_name) 在图标重新着色之后调用，用来给控件重新 setIcon。"""
+        if callback not in self._theme_listeners:
+            self._theme_listeners.append(callback)
+
+    def remove_theme_listener(self, callback):
+        if callback in self._theme_listeners:
+            self._theme_listeners.remove(callback)
+
+    def _ensure_atlas(self):
+        if self._atlas is None:
+            entries = [((svg_path, size.width(), dpr), svg_path, px)
+                       for svg_path, size, dpr, px in self._variants(ICON_NAMES)
+                       if os.path.exists(svg_path)]
+            self._atlas = self.raster_cache.atlas(entries)
+        return self._atlas
+
+    def set_theme(self, theme_name: str):
+        """
+        运行时切换主题：遮罩图集整张着色一次，切出全部已创建图标的新像素图，
+        然后通知监听者。不重新解析 SVG。
+        """
+        theme_name, color = self._resolve_theme(theme_name)
+        if theme_name == self.theme_name:
+            return
+        self.theme_name, self.icon_color = theme_name, color
+        if self._icon_cache:
+            images = self._ensure_atlas().tint(color)
+            for svg_name in list(self._icon_cache):
+                svg_path = os.path.join(self.base_path, svg_name)
+                icon = QIcon()
+                for size in ICON_SIZES:
+                    for dpr in self._device_pixel_ratios():
+                        image = images.get((svg_path, size, dpr))
+                        key = self.raster_cache.pixmap_key(svg_path, color, QSize(size, size), dpr)
+                        if image is None:  # 不在图集里（例如新接入的屏幕 DPR），单独着色
+                            pixmap = self.raster_cache.pixmap(svg_path, color, QSize(size, size), dpr)
+                        else:
+                            pixmap = self.raster_cache.insert_pixmap(key, image, dpr)
+                        icon.addPixmap(pixmap)
+                self._icon_cache[svg_name] = icon
+        for callback in list(self._theme_listeners):
+            callback(theme_name)
 
     def _create_colored_icon(self, svg_name: str) -> QIcon:
         """
@@ -36,19 +130,15 @@ class IconManager:
             return self._icon_cache[svg_name]
 
         svg_path = os.path.join(self.base_path, svg_name)
-        
-        renderer = QSvgRenderer(svg_path)
-        pixmap = QPixmap(renderer.defaultSize())
-        pixmap.fill(Qt.transparent)
-        
-        painter = QPainter(pixmap)
-        renderer.render(painter)
-        
-        painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
-        painter.fillRect(pixmap.rect(), self.icon_color)
-        painter.end()
-        
-        icon = QIcon(pixmap)
+        if not os.path.exists(svg_path):
+            _log.warning("找不到图标文件 %s", svg_path)
+            return QIcon()
+
+        # 按实际像素尺寸栅格化，QIcon 会根据控件尺寸和屏幕 DPR 选最合适的一张
+        icon = QIcon()
+        for size in ICON_SIZES:
+            for dpr in self._device_pixel_ratios():
+                icon.addPixmap(self.raster_cache.pixmap(svg_path, self.icon_color, QSize(size, size), dpr))
         self._icon_cache[svg_name] = icon  # 将新创建的图标存入缓存
         return icon
 
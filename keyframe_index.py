@@ -0,0 +1,166 @@
+# keyframe_index.py —— 每个文件的关键帧时间索引（ffprobe 后台构建，磁盘缓存）
+import hashlib
+import os
+import subprocess
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from PySide6.QtCore import QObject, Signal
+
+import applog
+from app_paths import cache_dir
+from subprocess_util import NO_WINDOW
+
+_log = applog.get_logger("scrub/keyframes")
+
+# 索引文件格式变化时递增
+INDEX_VERSION = 2
+
+
+class KeyframeIndex:
+    """已排序的关键帧时间（秒）。"""
+
+    def __init__(self, times: array):
+        self.times = times
+
+    def __len__(self):
+        return len(self.times)
+
+    def floor(self, t: float):
+        """t 之前（含）最近的关键帧，也就是 keyframes 精度 seek 实际落到的位置。"""
+        i = bisect_right(self.times, t)
+        return self.times[i - 1] if i else (self.times[0] if self.times else None)
+
+    def nearest(self, t: float):
+        if not self.times:
+            return None
+        i = bisect_left(self.times, t)
+        if i == 0:
+            return self.times[0]
+        if i == len(self.times):
+            return self.times[-1]
+        before, after = self.times[i - 1], self.times[i]
+        return before if t - before <= after - t else after
+
+
+def read_keyframes(path: str, ffprobe: str = 'ffprobe', cancel: threading.Event = None) -> array:
+    """
+    只读包头、不解码：列出第一个视频流中带 K 标记的包的时间戳。
+    时间减去容器的 start_time，与 mpv 默认（rebase-start-time=yes）的 time-pos 在同一条时间轴上；
+    MPEG-TS / m2ts 的起点通常不是 0。cancel 被置位时终止 ffprobe 并返回 None。
+    """
+    cmd = [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+           '-show_entries', 'packet=pts_time,flags:format=start_time', '-of', 'csv=p=0', path]
+    times = array('d')
+    start = 0.0
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            creationflags=NO_WINDOW)
+    try:
+        for line in proc.stdout:
+            if cancel is not None and cancel.is_set():
+                proc.kill()
+                return None
+            pts, comma, flags = line.strip().partition(b',')
+            if not comma:
+                # format 段在所有包之后输出，只有 start_time 一列
+                if pts and pts != b'N/A':
+                    start = float(pts)
+            elif b'K' in flags and pts and pts != b'N/A':
+                times.append(float(pts))
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    # 包按解码顺序输出，带 B 帧时不一定单调
+    return array('d', sorted(t - start for t in times))
+
+
+def _cache_path(path: str) -> str:
+    st = os.stat(path)
+    key = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode('utf-8', 'surrogatepass')
+    return os.path.join(cache_dir("keyframes"), f"v{INDEX_VERSION}_{hashlib.sha1(key).hexdigest()}.kf")
+
+
+def load_cached(path: str):
+    """磁盘缓存命中时返回 KeyframeIndex，否则 None。文件改动后（大小 / mtime）自动失效。"""
+    try:
+        with open(_cache_path(path), 'rb') as f:
+            times = array('d')
+            times.frombytes(f.read())
+        return KeyframeIndex(times)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(path: str, index: KeyframeIndex):
+    target = _cache_path(path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        index.times.tofile(f)
+    os.replace(tmp, target)
+
+
+class KeyframeIndexer(QObject):
+    """
+    按需为文件构建关键帧索引：先查内存和磁盘缓存，未命中时在后台线程运行 ffprobe。
+    同一时间只为一个文件工作，请求新文件会取消正在进行的构建。
+    index_ready 从工作线程发射，连接到 GUI 时自动排队。
+    """
+    index_ready = Signal(str, object)  # 路径, KeyframeIndex
+
+    MEMORY_ENTRIES = 16
+
+    def __init__(self, ffprobe: str = 'ffprobe', parent=None):
+        super().__init__(parent)
+        self._ffprobe = ffprobe
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._cancel = threading.Event()
+
+    def cached(self, path: str):
+        with self._lock:
+            return self._memory.get(path)
+
+    def request(self, path: str):
+        index = self.cached(path)
+        if index is None and os.path.isfile(path):
+            index = load_cached(path)
+            if index is not None:
+                self._remember(path, index)
+        if index is not None:
+            self.index_ready.emit(path, index)
+            return
+        self.cancel()
+        if not os.path.isfile(path):  # 网络流等没有本地文件，不建索引
+            return
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(path, self._cancel),
+                                        name="keyframe-index", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _remember(self, path: str, index: KeyframeIndex):
+        with self._lock:
+            self._memory.pop(path, None)
+            self._memory[path] = index
+            while len(self._memory) > self.MEMORY_ENTRIES:
+                self._memory.pop(next(iter(self._memory)))
+
+    def _run(self, path: str, cancel: threading.Event):
+        try:
+            times = read_keyframes(path, self._ffprobe, cancel)
+        except OSError as e:
+            _log.warning("无法运行 ffprobe：%s", e)
+            return
+        if times is None or cancel.is_set() or not times:
+            return
+        index = KeyframeIndex(times)
+        try:
+            save_cached(path, index)
+        except OSError as e:
+            _log.warning("写入缓存失败：%s", e)
+        self._remember(path, index)
+        self.index_ready.emit(path, index)
@@ -0,0 +1,115 @@
+# library/index.py —— 媒体库 SQLite 索引（WAL 模式）
+import os
+import sqlite3
+import time
+from array import array
+
+from app_paths import data_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    id          INTEGER PRIMARY KEY,
+    path        TEXT NOT NULL UNIQUE,
+    dir         TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime       REAL NOT NULL,
+    duration    REAL,
+    width       INTEGER,
+    height      INTEGER,
+    vcodec      TEXT,
+    acodec      TEXT,
+    streams     INTEGER,
+    probe_error TEXT,
+    scanned_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS media_dir ON media(dir);
+CREATE INDEX IF NOT EXISTS media_name ON media(name COLLATE NOCASE);
+"""
+
+COLUMNS = ('id', 'path', 'dir', 'name', 'size', 'mtime', 'duration',
+           'width', 'height', 'vcodec', 'acodec', 'streams', 'probe_error')
+
+
+def default_index_path() -> str:
+    return os.path.join(data_dir(), "library.sqlite3")
+
+
+class LibraryIndex:
+    """
+    每个线程各自创建一个 LibraryIndex（SQLite 连接不跨线程共享）。
+    WAL 模式下扫描线程写入时，GUI 线程的读取不会被阻塞。
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or default_index_path()
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # --- 扫描线程使用 ---
+    def known_files(self, root: str) -> dict:
+        """返回 root 下已索引文件的 {path: (size, mtime)}，用于增量扫描。"""
+        prefix = os.path.join(root, '')
+        rows = self._conn.execute(
+            "SELECT path, size, mtime FROM media WHERE path >= ? AND path < ?",
+            (prefix, prefix + '\U0010ffff'))
+        return {path: (size, mtime) for path, size, mtime in rows}
+
+    def upsert_many(self, entries):
+        """entries: probe_file 的结果并补充 size / mtime。"""
+        now = time.time()
+        rows = [(e['path'], os.path.dirname(e['path']), os.path.basename(e['path']),
+                 e['size'], e['mtime'], e['duration'], e['width'], e['height'],
+                 e['vcodec'], e['acodec'], e['streams'], e['error'], now) for e in entries]
+        with self._conn:
+            self._conn.executemany("""
+                INSERT INTO media (path, dir, name, size, mtime, duration, width, height,
+                                   vcodec, acodec, streams, probe_error, scanned_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size=excluded.size, mtime=excluded.mtime, duration=excluded.duration,
+                    width=excluded.width, height=excluded.height, vcodec=excluded.vcodec,
+                    acodec=excluded.acodec, streams=excluded.streams,
+                    probe_error=excluded.probe_error, scanned_at=excluded.scanned_at
+            """, rows)
+
+    def remove_paths(self, paths):
+        with self._conn:
+            self._conn.executemany("DELETE FROM media WHERE path = ?", ((p,) for p in paths))
+
+    # --- 列表模型使用 ---
+    @staticmethod
+    def _where(text: str):
+        if not text:
+            return "", ()
+        # 转义通配符，按字面匹配用户输入的 % 和 _
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        like = f"%{escaped}%"
+        return " WHERE name LIKE ? ESCAPE '\\' OR vcodec LIKE ? ESCAPE '\\'", (like, like)
+
+    def ids(self, text: str = "") -> array:
+        """按名称排序的 id 列表，模型只保存这份紧凑数组，行数据按页读取。"""
+        where, params = self._where(text)
+        cur = self._conn.execute(f"SELECT id FROM media{where} ORDER BY name COLLATE NOCASE", params)
+        out = array('q')
+        while True:
+            chunk = cur.fetchmany(8192)
+            if not chunk:
+                return out
+            out.extend(r[0] for r in chunk)
+
+    def rows_by_id(self, ids) -> dict:
+        ids = list(ids)
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        cur = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM media WHERE id IN ({marks})", ids)
+        return {row[0]: row for row in cur}
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
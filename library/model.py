@@ -0,0 +1,130 @@
+# library/model.py —— 媒体库的虚拟化列表模型与面板
+from collections import OrderedDict
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, Signal
+from PySide6.QtWidgets import QHeaderView, QLineEdit, QTableView, QVBoxLayout, QWidget
+
+from library.index import COLUMNS, LibraryIndex
+
+
+def _fmt_duration(seconds):
+    if seconds is None:
+        return ""
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+class LibraryModel(QAbstractTableModel):
+    """
+    只保存过滤后的 id 数组（每行 8 字节），行数据按页从 SQLite 读取并做 LRU 缓存，
+    视图只会请求可见行，因此 10 万条时滚动和过滤仍然流畅。
+    """
+    HEADERS = ("名称", "时长", "分辨率", "视频", "音频", "目录")
+    PAGE = 256
+    MAX_PAGES = 64
+    PATH_ROLE = Qt.UserRole + 1
+
+    def __init__(self, index: LibraryIndex, parent=None):
+        super().__init__(parent)
+        self._index = index
+        self._filter = ""
+        self._ids = index.ids()
+        self._pages = OrderedDict()
+        self._col = {name: i for i, name in enumerate(COLUMNS)}
+
+    def set_filter(self, text: str):
+        self._filter = text.strip()
+        self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self._ids = self._index.ids(self._filter)
+        self._pages.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def _row(self, row: int):
+        page_no = row // self.PAGE
+        page = self._pages.get(page_no)
+        if page is None:
+            start = page_no * self.PAGE
+            ids = self._ids[start:start + self.PAGE]
+            by_id = self._index.rows_by_id(ids)
+            page = [by_id.get(i) for i in ids]
+            self._pages[page_no] = page
+            if len(self._pages) > self.MAX_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_no)
+        return page[row % self.PAGE]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        rec = self._row(index.row())
+        if rec is None:
+            return None
+        c = self._col
+        if role == self.PATH_ROLE:
+            return rec[c['path']]
+        if role == Qt.ToolTipRole:
+            return rec[c['probe_error']] or rec[c['path']]
+        if role != Qt.DisplayRole:
+            return None
+        col = index.column()
+        if col == 0:
+            return rec[c['name']]
+        if col == 1:
+            return _fmt_duration(rec[c['duration']])
+        if col == 2:
+            return f"{rec[c['width']]}x{rec[c['height']]}" if rec[c['width']] else ""
+        if col == 3:
+            return rec[c['vcodec']] or ""
+        if col == 4:
+            return rec[c['acodec']] or ""
+        return rec[c['dir']]
+
+
+class LibraryPanel(QWidget):
+    """过滤框 + 表格视图，双击条目发出 file_activated。"""
+    file_activated = Signal(str)
+
+    def __init__(self, index: LibraryIndex, parent=None):
+        super().__init__(parent)
+        self.model = LibraryModel(index, self)
+
+        self.filter_edit = QLineEdit(self)
+        self.filter_edit.setPlaceholderText("过滤名称 / 编码")
+        self.view = QTableView(self)
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QTableView.SelectRows)
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(22)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.doubleClicked.connect(
+            lambda idx: self.file_activated.emit(self.model.data(idx, LibraryModel.PATH_ROLE)))
+
+        # 输入停顿后再过滤，避免每个按键都重新查询
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(200)
+        self._filter_timer.timeout.connect(lambda: self.model.set_filter(self.filter_edit.text()))
+        self.filter_edit.textChanged.connect(self._filter_timer.start)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.filter_edit)
+        layout.addWidget(self.view)
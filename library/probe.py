@@ -0,0 +1,46 @@
+# library/probe.py —— 用 ffprobe 读取媒体信息（在进程池的工作进程中运行）
+import json
+import os
+import subprocess
+
+from subprocess_util import NO_WINDOW
+
+MEDIA_EXTENSIONS = frozenset({
+    '.mp4', '.mkv', '.avi', '.mov', '.webm', '.m4v', '.ts', '.m2ts', '.mts',
+    '.wmv', '.flv', '.mpg', '.mpeg', '.mp3', '.flac', '.m4a', '.ogg', '.opus', '.wav',
+})
+
+
+def is_media_file(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS
+
+
+def probe_file(path: str, ffprobe: str = 'ffprobe', timeout: float = 30.0) -> dict:
+    """
+    返回 {'path', 'duration', 'width', 'height', 'vcodec', 'acodec', 'streams', 'error'}。
+    失败时 error 非空，其余字段为 None，不抛异常，方便进程池批量处理。
+    """
+    info = {'path': path, 'duration': None, 'width': None, 'height': None,
+            'vcodec': None, 'acodec': None, 'streams': 0, 'error': None}
+    cmd = [ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path]
+    try:
+        out = subprocess.run(cmd, capture_output=True, timeout=timeout, check=True,
+                             creationflags=NO_WINDOW).stdout
+        data = json.loads(out or b'{}')
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        info['error'] = f"{type(e).__name__}: {e}"[:500]
+        return info
+
+    streams = data.get('streams', [])
+    info['streams'] = len(streams)
+    duration = data.get('format', {}).get('duration')
+    info['duration'] = float(duration) if duration not in (None, 'N/A') else None
+    for s in streams:
+        kind = s.get('codec_type')
+        if kind == 'video' and info['vcodec'] is None and not s.get('disposition', {}).get('attached_pic'):
+            info['vcodec'] = s.get('codec_name')
+            info['width'] = s.get('width')
+            info['height'] = s.get('height')
+        elif kind == 'audio' and info['acodec'] is None:
+            info['acodec'] = s.get('codec_name')
+    return info
@@ -0,0 +1,131 @@
+# library/scanner.py —— 后台目录扫描与增量索引
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from PySide6.QtCore import QObject, Signal
+
+from library.index import LibraryIndex
+from library.probe import is_media_file, probe_file
+
+
+def walk_media(root: str):
+    """递归列出 root 下的媒体文件，产出 (path, size, mtime)；用 scandir 避免额外 stat。"""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file() and is_media_file(entry.name):
+                            st = entry.stat()
+                            yield entry.path, st.st_size, st.st_mtime
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+class LibraryScanner(QObject):
+    """
+    在后台线程遍历目录树，只把新增或 mtime/size 变化的文件交给进程池探测，
+    结果分批写入 LibraryIndex。信号从工作线程发射，连接到 GUI 时自动排队。
+    """
+    progress = Signal(int, int)      # 已探测数, 待探测总数
+    batch_indexed = Signal(int)      # 本批写入条数
+    finished = Signal(dict)          # 统计：seen / unchanged / probed / removed
+
+    BATCH = 200
+    IN_FLIGHT = 4      # 每个工作进程最多排队的探测数；取消时只需丢弃这么多
+    CANCEL_POLL = 0.2  # 等待探测结果时检查取消的间隔（秒）
+
+    def __init__(self, index_path: str = None, workers: int = None, parent=None):
+        super().__init__(parent)
+        self._index_path = index_path
+        self._workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._thread = None
+        self._cancel = threading.Event()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def scan(self, root: str):
+        if self.is_running():
+            return
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, args=(os.path.abspath(root),),
+                                        name="library-scan", daemon=True)
+        self._thread.start()
+
+    def cancel(self, timeout: float = 1.0):
+        """
+        请求停止扫描，最多等 timeout 秒，不会让调用方（GUI）一直挂起。
+        已经在运行的 ffprobe 不等它结束；取消后不发射 finished。
+        """
+        self._cancel.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, root: str):
+        index = LibraryIndex(self._index_path)
+        try:
+            known = index.known_files(root)
+            stats = {'seen': 0, 'unchanged': 0, 'probed': 0, 'removed': 0}
+            todo = []
+            seen = set()
+            for path, size, mtime in walk_media(root):
+                if self._cancel.is_set():
+                    return
+                stats['seen'] += 1
+                seen.add(path)
+                if known.get(path) == (size, mtime):
+                    stats['unchanged'] += 1
+                    continue
+                todo.append((path, size, mtime))
+
+            stale = [p for p in known if p not in seen]
+            if stale:
+                index.remove_paths(stale)
+                stats['removed'] = len(stale)
+
+            self.progress.emit(0, len(todo))
+            batch = []
+            # 逐个提交并限制在途数量，而不是 pool.map：取消时不必等排好的整块探测做完
+            pool = ProcessPoolExecutor(max_workers=self._workers)
+            pending = {}
+            queued = iter(todo)
+            try:
+                while True:
+                    while len(pending) < self._workers * self.IN_FLIGHT:
+                        item = next(queued, None)
+                        if item is None:
+                            break
+                        pending[pool.submit(probe_file, item[0])] = item
+                    if not pending:
+                        break
+                    done, _ = wait(pending, timeout=self.CANCEL_POLL, return_when=FIRST_COMPLETED)
+                    if self._cancel.is_set():
+                        return
+                    for future in done:
+                        path, size, mtime = pending.pop(future)
+                        info = future.result()
+                        info['size'], info['mtime'] = size, mtime
+                        batch.append(info)
+                        stats['probed'] += 1
+                    if len(batch) >= self.BATCH:
+                        index.upsert_many(batch)
+                        self.batch_indexed.emit(len(batch))
+                        self.progress.emit(stats['probed'], len(todo))
+                        batch = []
+            finally:
+                pool.shutdown(wait=not self._cancel.is_set(), cancel_futures=True)
+            if batch:
+                index.upsert_many(batch)
+                self.batch_indexed.emit(len(batch))
+            self.progress.emit(stats['probed'], len(todo))
+            self.finished.emit(stats)
+        finally:
+            index.close()
@@ -1,51 +1,260 @@
 # main.py
+import startup_timeline  # 最先导入：时间线以此为零点
+import os
 import sys
-from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog
-from PySide6.QtCore import Slot # 导入 Slot
 
-from media_player import MediaPlayerService
-from mpv_widget import MPVWidget
-from set_default_gl_format import enable_debug_gl_default_format
+with startup_timeline.span("imports"):
+    import applog
+    from app_paths import data_dir
+    from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QDockWidget, QMessageBox
+    from PySide6.QtCore import Qt, QTimer, Slot # 导入 Slot
+    from PySide6.QtGui import QActionGroup
+
+    # 这些模块都不会在导入时加载 libmpv；mpv 核心和软件渲染后端按需加载
+    from media_player import MediaPlayerService
+    from mpv_widget import MPVWidget
+    from set_default_gl_format import enable_debug_gl_default_format
+    from tools.debug_gl import DiagLevel
+    from playlist import RepeatMode
+
+_log = applog.get_logger("app")
+
+# MYPLAYER_FAST_STARTUP=0 时恢复为构造窗口前同步创建 mpv 核心
+FAST_STARTUP = os.environ.get("MYPLAYER_FAST_STARTUP", "1") != "0"
 
 class VideoPlayerWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, diag_level: DiagLevel = DiagLevel.OFF, fast_startup: bool = False):
         super().__init__()
         self.setWindowTitle("第一步验证：MPV 渲染核心")
 
-        self.media_player_service = MediaPlayerService()
-        self.mpv_widget = MPVWidget(self.media_player_service)
+        # 快速启动：先显示窗口，mpv 核心在 showEvent 之后于后台线程创建
+        self._fast_startup = fast_startup
+        # 播放核心：MYPLAYER_PLAYER_BACKEND=ipc 时在子进程中运行 mpv，画面直接画进原生子窗口
+        player_backend = os.environ.get("MYPLAYER_PLAYER_BACKEND", "inprocess").lower()
+        self.media_player_service = MediaPlayerService(lazy=fast_startup, backend=player_backend)
+        self.media_player_service.core_failed.connect(self._on_core_failed)
+        # 渲染后端：MYPLAYER_RENDER_BACKEND=sw 强制软件渲染，否则优先 OpenGL
+        if player_backend == "ipc":
+            from mpv_ipc import MpvIpcWidget
+            self.mpv_widget = MpvIpcWidget(self.media_player_service)
+        elif os.environ.get("MYPLAYER_RENDER_BACKEND", "opengl").lower() == "sw":
+            from mpv_sw_widget import MPVSoftwareWidget
+            self.mpv_widget = MPVSoftwareWidget(self.media_player_service)
+        else:
+            self.mpv_widget = MPVWidget(self.media_player_service, diag_level=diag_level)
+            # initializeGL 中不能替换控件，排队到下一轮事件循环
+            self.mpv_widget.gl_init_failed.connect(self._fallback_to_software, Qt.QueuedConnection)
         
         self.setCentralWidget(self.mpv_widget)
         
-        self._set_menu_bar()
+        self._library_dock = None
+        self._library_scanner = None
+
+        self._set_menu_bar(diag_level)
         self.connect_signals()
+        # 最小化 / 隐藏时暂停渲染，长时间只听声音时切换为纯音频解码
+        from power_manager import PowerManager
+        self._power_manager = PowerManager(self, self.mpv_widget, self.media_player_service)
+        # 续播位置、音轨 / 字幕轨与音量；定时和暂停时批量写入，退出时写出最后的位置
+        from watch_history import WatchHistory
+        self._watch_history = WatchHistory(self.media_player_service)
+        # 无人值守部署：MYPLAYER_METRICS_PORT 设置时定时采样播放指标，并在本机端口上提供 /metrics
+        self._metrics_sampler = None
+        self._metrics_server = None
+        metrics_port = os.environ.get("MYPLAYER_METRICS_PORT")
+        if metrics_port:
+            self._start_metrics(int(metrics_port))
 
+    def _start_metrics(self, port: int):
+        from playback_metrics import MetricsSampler, MetricsServer
+        self._metrics_sampler = MetricsSampler(self.media_player_service)
+        self._metrics_sampler.start()
+        try:
+            self._metrics_server = MetricsServer(self._metrics_sampler, port)
+        except OSError as e:
+            _log.error("指标端点无法监听端口 %d: %s", port, e)
+            return
+        self._metrics_server.start()
 
-    def _set_menu_bar(self):
+
+    def _set_menu_bar(self, diag_level: DiagLevel):
         menu_bar = self.menuBar()
         file_menu = menu_bar.addMenu("文件")
         open_action = file_menu.addAction("打开视频")
         open_action.triggered.connect(self.open_file)
+        playback_menu = menu_bar.addMenu("播放")
+        playback_menu.addAction("上一个").triggered.connect(self.media_player_service.previous)
+        playback_menu.addAction("下一个").triggered.connect(self.media_player_service.next)
+        shuffle_action = playback_menu.addAction("随机播放")
+        shuffle_action.setCheckable(True)
+        shuffle_action.toggled.connect(self.media_player_service.set_shuffle)
+        repeat_menu = playback_menu.addMenu("循环")
+        repeat_group = QActionGroup(self)
+        for mode, label in ((RepeatMode.OFF, "不循环"), (RepeatMode.ONE, "单个循环"), (RepeatMode.ALL, "列表循环")):
+            action = repeat_menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(mode == RepeatMode.OFF)
+            action.triggered.connect(lambda _=False, m=mode: self.media_player_service.set_repeat(m))
+            repeat_group.addAction(action)
+
+        library_action = file_menu.addAction("扫描媒体库目录")
+        library_action.triggered.connect(self.scan_library)
+
+        debug_menu = menu_bar.addMenu("调试")
+        hud_action = debug_menu.addAction("帧时序 HUD")
+        hud_action.setCheckable(True)
+        hud_action.toggled.connect(self.toggle_frame_timing)
+        dump_action = debug_menu.addAction("导出帧时序 JSON")
+        dump_action.triggered.connect(self.dump_frame_timing)
+
+        # GL 诊断级别（DebugContext 在启动时由 MYPLAYER_GL_DEBUG 决定）
+        diag_menu = debug_menu.addMenu("GL 诊断")
+        diag_group = QActionGroup(self)
+        for level in DiagLevel:
+            action = diag_menu.addAction(level.name.lower())
+            action.setCheckable(True)
+            action.setChecked(level == diag_level)
+            action.triggered.connect(lambda _=False, lv=level: self.set_gl_diagnostics_level(lv))
+            diag_group.addAction(action)
+        diag_menu.addAction("打印去重的 GL 消息").triggered.connect(self.print_gl_messages)
+        debug_menu.addAction("打印启动时间线").triggered.connect(
+            lambda: print(startup_timeline.format_timeline()))
+        # 运行时切换 mpv 日志级别，mpv 核心会收到新的请求级别，无需重启
+        mpv_log_action = debug_menu.addAction("mpv 详细日志")
+        mpv_log_action.setCheckable(True)
+        mpv_log_action.toggled.connect(lambda on: applog.set_level("mpv", "v" if on else "warn"))
+        debug_menu.addAction("打印日志统计").triggered.connect(lambda: print(applog.stats()))
+        debug_menu.addAction("打印各状态 CPU 占用").triggered.connect(
+            lambda: print(self._power_manager.format_report()))
 
     def open_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "打开视频", ".", "视频文件 (*.mp4 *.mkv *.avi)")
-        if file_path:
+        # 选择多个文件时按顺序组成播放列表
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "打开视频", ".", "视频文件 (*.mp4 *.mkv *.avi)")
+        if file_paths:
 
-            if self.mpv_widget.ctx:
-                self.media_player_service.set_media(file_path)
+            # 核心尚未就绪时服务会把调用排队，就绪后再播放
+            if self.mpv_widget.ctx or not self.media_player_service.is_ready():
+                self.media_player_service.set_playlist(file_paths)
     
+    # --- 媒体库 ---
+    def _ensure_library(self):
+        if self._library_dock is not None:
+            return
+        # 媒体库模块只在使用时导入
+        from library.index import LibraryIndex
+        from library.model import LibraryPanel
+        from library.scanner import LibraryScanner
+
+        self._library_panel = LibraryPanel(LibraryIndex(), self)
+        self._library_panel.file_activated.connect(self.play_file)
+        self._library_dock = QDockWidget("媒体库", self)
+        self._library_dock.setWidget(self._library_panel)
+        self.addDockWidget(Qt.LeftDockWidgetArea, self._library_dock)
+
+        self._library_scanner = LibraryScanner(parent=self)
+        # 扫描期间最多每秒刷新一次列表
+        self._library_refresh = QTimer(self)
+        self._library_refresh.setSingleShot(True)
+        self._library_refresh.setInterval(1000)
+        self._library_refresh.timeout.connect(self._library_panel.model.reload)
+        self._library_scanner.batch_indexed.connect(
+            lambda _n: self._library_refresh.isActive() or self._library_refresh.start())
+        self._library_scanner.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"媒体库：已探测 {done}/{total}"))
+        self._library_scanner.finished.connect(self._on_library_scanned)
+
+    def scan_library(self):
+        root = QFileDialog.getExistingDirectory(self, "选择媒体库目录", ".")
+        if not root:
+            return
+        self._ensure_library()
+        self._library_dock.show()
+        self._library_scanner.scan(root)
+
+    def _on_library_scanned(self, stats: dict):
+        self._library_panel.model.reload()
+        self.statusBar().showMessage(
+            f"媒体库扫描完成：{stats['seen']} 个文件，{stats['probed']} 个已更新，"
+            f"{stats['unchanged']} 个未变化，{stats['removed']} 个已移除", 10000)
+
+    def play_file(self, file_path: str):
+        if file_path and (self.mpv_widget.ctx or not self.media_player_service.is_ready()):
+            self.media_player_service.set_media(file_path)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._fast_startup and not self.media_player_service.is_ready():
+            # 排到窗口首次绘制之后，再开始创建 mpv 核心
+            QTimer.singleShot(0, self.media_player_service.start)
+
+    @Slot(str)
+    def _on_core_failed(self, message: str):
+        QMessageBox.critical(self, "无法启动播放核心", f"mpv 播放核心创建失败：\n{message}")
+
+    @Slot(str)
+    def _fallback_to_software(self, reason: str):
+        from mpv_sw_widget import MPVSoftwareWidget
+        _log.warning("OpenGL 不可用（%s），切换到软件渲染", reason)
+        self.mpv_widget = MPVSoftwareWidget(self.media_player_service)
+        self.setCentralWidget(self.mpv_widget)  # 旧控件随之销毁
+        self.connect_signals()
+        self._power_manager.set_video_widget(self.mpv_widget)
+
+    def _gl_widget(self):
+        """当前使用 OpenGL 后端时返回 MPVWidget，否则为 None"""
+        return self.mpv_widget if isinstance(self.mpv_widget, MPVWidget) else None
+
+    def toggle_frame_timing(self, enabled: bool):
+        if self._gl_widget() is None:
+            return
+        if enabled:
+            self.mpv_widget.enable_frame_timing(hud=True)
+        else:
+            self.mpv_widget.disable_frame_timing()
+
+    def dump_frame_timing(self):
+        if self._gl_widget() is None or self.mpv_widget.frame_timing() is None:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出帧时序", "frame_timing.json", "JSON (*.json)")
+        if file_path:
+            self.mpv_widget.dump_frame_timing(file_path)
+
+    def set_gl_diagnostics_level(self, level: DiagLevel):
+        if self._gl_widget() is not None:
+            self.mpv_widget.set_gl_diagnostics_level(level)
+
+    def print_gl_messages(self):
+        diag = self._gl_widget() and self.mpv_widget.gl_diagnostics()
+        if diag:
+            print(diag.summary() or "[GLDiag] 没有记录到消息")
+
     def connect_signals(self):
         # 2. 新增连接：当播放结束时，调用 mpv_widget 的 disable_updates 方法
         self.media_player_service.playback_finished.connect(self.mpv_widget.disable_updates)
+        self.media_player_service.current_item_changed.connect(self.mpv_widget.enable_updates)
 
     def closeEvent(self, event):
+        if self._library_scanner is not None:
+            self._library_scanner.cancel()
+        # 先释放渲染上下文，再终止 mpv 核心
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+        if self._metrics_sampler is not None:
+            self._metrics_sampler.stop()
+        self._watch_history.close()
+        self.mpv_widget.close()
         self.media_player_service.close()
         super().closeEvent(event)
 
 if __name__ == "__main__":
-    enable_debug_gl_default_format()
-    app = QApplication(sys.argv)
-    window = VideoPlayerWindow()
-    window.resize(800, 600)
-    window.show()
+    # MYPLAYER_LOG 预设各模块级别；日志同时写入数据目录下的滚动文件
+    applog.configure_from_env(os.path.join(data_dir("logs"), "myplayer.log"))
+    diag_level = enable_debug_gl_default_format()
+    with startup_timeline.span("QApplication"):
+        app = QApplication(sys.argv)
+    with startup_timeline.span("window"):
+        window = VideoPlayerWindow(diag_level, fast_startup=FAST_STARTUP)
+        window.resize(800, 600)
+        window.show()
+    startup_timeline.mark("window shown")
     sys.exit(app.exec())
\ No newline at end of file
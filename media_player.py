@@ -1,42 +1,648 @@
 # media_player.py
-import mpv
-from PySide6.QtCore import QObject, Signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import wraps
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal, Slot
+from playlist import Playlist, RepeatMode
+from playback_profiles import DEFAULT_PROFILE, get_profile, guess_profile, mpv_options
+import applog
+import startup_timeline
 import locale
 locale.setlocale(locale.LC_NUMERIC, 'C')
 
+_log = applog.get_logger("player")
+
+# python-mpv 导入时会加载 libmpv，较慢；推迟到第一次创建播放核心时
+mpv = None
+
+
+def _load_mpv():
+    global mpv
+    if mpv is None:
+        with startup_timeline.span("import mpv"):
+            import mpv as _mpv
+        mpv = _mpv
+    return mpv
+
+
+# python-mpv 的 end-file 原因是整数，JSON IPC 后端直接给出字符串；统一成字符串
+_END_FILE_REASONS = {0: 'eof', 1: 'restarted', 2: 'aborted', 3: 'quit', 4: 'error', 5: 'redirect'}
+
+
+def _deferred_until_ready(method):
+    """核心尚未创建（延迟初始化）时，把调用排队到 core_ready 之后执行。"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._player is None:
+            self._pending_calls.append(lambda: method(self, *args, **kwargs))
+            return None
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+@dataclass
+class BridgeStats:
+    received: int = 0   # mpv 线程推入的属性变化次数
+    delivered: int = 0  # 实际交给 GUI 的属性条目数
+    merged: int = 0     # 在投递前被后续变化覆盖（合并掉）的次数
+    wakeups: int = 0    # 跨线程唤醒主线程的次数
+    flushes: int = 0    # 向 GUI 投递快照的批次数
+
+
+class PropertyBridge(QObject):
+    """
+    mpv 事件线程与 Qt 主线程之间的合并式属性桥。
+
+    mpv 线程只调用 push()：把变化写入待投递快照，重复变化直接覆盖；
+    只有当前没有挂起的唤醒时才发一次跨线程信号。主线程按每个属性的
+    投递间隔（毫秒，0 表示立即）批量取出到期的属性，通过 snapshot_ready 交给 GUI。
+    """
+    snapshot_ready = Signal(dict)
+    _wake = Signal()
+
+    def __init__(self, intervals=None, default_interval_ms: int = 0, parent=None):
+        super().__init__(parent)
+        self._intervals = dict(intervals or {})
+        self._default_interval = default_interval_ms / 1000.0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_delivered = {}
+        self._wake_queued = False   # 已有排队中的唤醒信号
+        self._next_due = None       # 定时器负责的下一次投递时刻
+        self._stats = BridgeStats()
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush)
+        # 信号在 mpv 线程发射，接收者在主线程，自动变为排队连接
+        self._wake.connect(self._flush)
+
+    def set_interval(self, name: str, interval_ms: int):
+        """运行时调整某个属性的投递间隔（毫秒）。"""
+        with self._lock:
+            self._intervals[name] = interval_ms
+
+    def push(self, name: str, value):
+        """可在任意线程调用。"""
+        with self._lock:
+            self._stats.received += 1
+            if name in self._pending:
+                self._stats.merged += 1
+            self._pending[name] = value
+            if self._wake_queued:
+                return
+            # 定时器已经会在该属性到期前触发时，无需再唤醒主线程
+            due = self._last_delivered.get(name, 0.0) + self._interval_of(name)
+            if self._next_due is not None and self._next_due <= due:
+                return
+            self._wake_queued = True
+            self._stats.wakeups += 1
+        self._wake.emit()
+
+    def peek(self, name: str, default=None):
+        """还没投递的最新值；已经投递过或从未收到时返回 default。可在任意线程调用。"""
+        with self._lock:
+            return self._pending.get(name, default)
+
+    def stats(self) -> BridgeStats:
+        with self._lock:
+            return BridgeStats(**vars(self._stats))
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = BridgeStats()
+
+    def _interval_of(self, name: str) -> float:
+        ms = self._intervals.get(name)
+        return self._default_interval if ms is None else ms / 1000.0
+
+    @Slot()
+    def _flush(self):
+        now = time.monotonic()
+        batch = {}
+        next_due = None
+        with self._lock:
+            for name in list(self._pending):
+                due = self._last_delivered.get(name, 0.0) + self._interval_of(name)
+                if due <= now:
+                    batch[name] = self._pending.pop(name)
+                    self._last_delivered[name] = now
+                elif next_due is None or due < next_due:
+                    next_due = due
+            # 仍有未到期的属性时，由定时器负责下一次投递
+            self._wake_queued = False
+            self._next_due = next_due
+            if batch:
+                self._stats.delivered += len(batch)
+                self._stats.flushes += 1
+
+        if next_due is not None:
+            remaining = max(0, int((next_due - now) * 1000))
+            if not self._timer.isActive() or self._timer.remainingTime() > remaining:
+                self._timer.start(remaining)
+        if batch:
+            self.snapshot_ready.emit(batch)
+
+
 class MediaPlayerService(QObject):
     playback_finished = Signal()
     position_changed = Signal(int)
     duration_changed = Signal(int)
     playback_state_changed = Signal(bool)
+    current_item_changed = Signal(int, str)  # 播放列表下标, 路径
+    file_loaded = Signal()                   # 当前条目已打开，轨道列表可用（总在 current_item_changed 之后）
+    core_ready = Signal()                    # mpv 核心创建完成（lazy 模式下异步）
+    core_failed = Signal(str)                # start() 创建 mpv 核心失败（例如找不到 libmpv）
+    seek_finished = Signal(bool)             # seek 完成（playback-restart）或失败
+    load_finished = Signal(int, bool)        # load_serial(), 该次加载出了首帧 / 打开失败
+    _core_created = Signal(object)
+    _core_error = Signal(str)
+
+    # 各属性投递到 GUI 的间隔（毫秒）：时钟 10Hz，暂停/结束/切换立即
+    PROPERTY_INTERVALS = {
+        'time-pos': 100,
+        'duration': 0,
+        'pause': 0,
+        'end-file': 0,
+        'start-file': 0,
+        'file-loaded': 0,
+        'playback-restart': 0,
+        'seek-error': 0,
+    }
 
-    def __init__(self, parent=None):
+    # 子进程后端在这段时间内崩溃这么多次就不再重建
+    CORE_RESTART_LIMIT = 3
+    CORE_RESTART_WINDOW = 30.0
+
+    def __init__(self, parent=None, lazy: bool = False, backend: str = 'inprocess',
+                 profile: str = DEFAULT_PROFILE, **mpv_options):
+        """
+        :param lazy: 为 True 时不在构造函数里创建 mpv 核心，需调用 start()
+                     在后台线程创建，完成后发射 core_ready。
+        :param backend: 'inprocess' 通过 python-mpv 在本进程内运行 libmpv；
+                        'ipc' 在子进程中运行 mpv，经 JSON IPC 控制（见 mpv_ipc.py）。
+        :param profile: 本地文件默认使用的缓存配置（见 playback_profiles.py）；
+                        网络流和共享路径按路径自动选择，set_media 可逐次指定。
+        :param mpv_options: 覆盖默认的 mpv 选项，例如无界面基准测试时传入 vo='null'。
+                            缓存相关选项由播放配置在每次加载时设置。
+        """
         super().__init__(parent)
-        self._player = mpv.MPV(
+        self._options = dict(
             vo='libmpv',
             fbo_format='rgba8',
             msg_level = "all=no",
-            log_handler=print # 打印MPV的日志，方便调试
+            # mpv 日志进入非阻塞日志管线；请求级别随 applog 中 mpv/* 的设置变化
+            log_handler=applog.mpv_log_handler,
+            loglevel=applog.mpv_log_level(),
+            # 无缝切换：提前打开播放列表中的下一项，并保持音频输出不重建
+            prefetch_playlist=True,
+            gapless_audio='weak',
         )
-        self._player.observe_property('time-pos', self.on_position_changed)
-        self._player.observe_property('duration', self.on_duration_changed)
-        self._player.observe_property('pause', self.on_pause_state_changed)
+        self._options.update(mpv_options)
+        self._backend = backend
+        self._player = None
+        self._starting = False
+        self._closed = False
+        self._pending_calls = []
+        self._bridge = PropertyBridge(self.PROPERTY_INTERVALS, parent=self)
+        self._bridge.snapshot_ready.connect(self._on_snapshot)
+        self._core_created.connect(self._install_core)
+        self._core_error.connect(self._on_core_error)
+        # 只注册一次：核心重建后 _sync_log_level 作用于新的 self._player
+        applog.pipeline().add_level_listener(self._sync_log_level)
+
+        self._playlist = Playlist()
+        self._preloaded = None        # 已追加到 mpv 播放列表的下一项下标
+        self._manual_load = False     # 下一次 start-file 由我们主动 loadfile 触发
+        self._transition_start = None
+        self._transitions = deque(maxlen=100)
+        self._position = None         # 最近一次播放位置（秒），子进程重建后据此恢复
+        self._resume_at = None
+        self._file_started = False    # 当前文件已经出过首帧（playback-restart）
+        self._load_serial = 0         # _load_current 的次数，用来把 load_finished 对应到具体的加载
+        self._load_pending = False    # 最近一次加载还没有出首帧或失败
+        self._load_started = False    # 它的 start-file 已经到达
+        self._load_issued = 0.0       # 它的 loadfile 发出的时刻；更早的 start-file（例如无缝切换）不算
+        self._source = None           # 实际加载的文件：当前条目本身，或 swap_source 换上的代理
+        self._start_override = False  # swap_source 设置了 start 选项，首帧后恢复
+        self._core_restarts = deque(maxlen=self.CORE_RESTART_LIMIT)
+        self._saved_vid = None        # 关闭视频解码前选中的视频轨
+        self._track_ids = {}          # 观察到的 current-tracks/*/id，代替同步读取
+        get_profile(profile)
+        self._default_profile = profile
+        self._profile_override = None  # set_media / set_playlist 指定的配置，None 表示按路径选择
+        self._applied_profile = None   # 当前核心上已生效的配置（全局选项）
+        self._current_profile = None   # 当前条目实际使用的配置
+        self._preloaded_profile = None
+
+        if not lazy:
+            self._install_core(self._create_core())
+
+    # --- 播放核心的创建 ---
+    def start(self):
+        """在后台线程创建 mpv 核心（lazy 模式），不阻塞窗口显示"""
+        if self._player is not None or self._starting:
+            return
+        self._starting = True
+        if self._backend == 'ipc':
+            # 启动子进程很快，且 IPC 套接字必须属于 GUI 线程
+            self._create_core_for_start()
+            return
+        threading.Thread(target=self._create_core_for_start, name="mpv-create", daemon=True).start()
+
+    def _create_core_for_start(self):
+        # 信号从后台线程发射，_install_core / _on_core_error 在 GUI 线程执行
+        try:
+            player = self._create_core()
+        except Exception as e:
+            _log.error("mpv 核心创建失败：%r", e)
+            self._core_error.emit(str(e) or type(e).__name__)
+            return
+        self._core_created.emit(player)
+
+    @Slot(str)
+    def _on_core_error(self, message: str):
+        # 排队中的调用保留，之后再次 start() 成功时仍会执行
+        self._starting = False
+        self.core_failed.emit(message)
+
+    def is_ready(self) -> bool:
+        return self._player is not None
+
+    def _create_core(self):
+        if self._backend == 'ipc':
+            from mpv_ipc import MpvIpcPlayer
+            with startup_timeline.span("mpv ipc spawn"):
+                player = MpvIpcPlayer(**self._options)
+            # 排队连接：旧核心要在它自己的槽函数返回之后才能释放
+            player.process_lost.connect(self._on_core_lost, Qt.QueuedConnection)
+        else:
+            _load_mpv()
+            with startup_timeline.span("mpv create"):
+                player = mpv.MPV(**self._options)
+        player.observe_property('time-pos', self._bridge.push)
+        player.observe_property('duration', self._bridge.push)
+        player.observe_property('pause', self._bridge.push)
+        for name in ('current-tracks/video/id', 'current-tracks/audio/id'):
+            player.observe_property(name, self._on_track_id)
+        player.event_callback('end-file')(self.on_end_file)
+        player.event_callback('start-file')(self.on_start_file)
+        player.event_callback('file-loaded')(self.on_file_loaded)
+        player.event_callback('playback-restart')(self.on_playback_restart)
+        return player
+
+    @Slot(object)
+    def _install_core(self, player):
+        if self._closed:
+            player.terminate()
+            return
+        self._player = player
+        self._starting = False
+        self._applied_profile = None
+        self._track_ids = {}
+        self.core_ready.emit()
+        pending, self._pending_calls = self._pending_calls, []
+        for call in pending:
+            call()
+
+    @Slot(int)
+    def _on_core_lost(self, exit_code: int):
+        """子进程后端的 mpv 崩溃：重建核心并从原位置继续当前条目，界面无需感知。"""
+        if self._closed:
+            return
+        self._player = None
+        now = time.monotonic()
+        if len(self._core_restarts) == self.CORE_RESTART_LIMIT and now - self._core_restarts[0] < self.CORE_RESTART_WINDOW:
+            _log.error("mpv 子进程反复崩溃（退出码 %s），不再重建", exit_code)
+            self.playback_state_changed.emit(False)
+            self.playback_finished.emit()
+            return
+        self._core_restarts.append(now)
+        resume_at = self._position
+        self._install_core(self._create_core())
+        if self._saved_vid is not None:
+            self._player.vid = 'no'
+        if self._playlist.current is not None:
+            self._resume_at = resume_at
+            self._load_current()
+
+    def _sync_log_level(self):
+        """日志级别改变后，重新向 mpv 请求对应级别的日志消息，无需重建核心。"""
+        if self._player is not None and 'log_handler' in self._options:
+            self._player.set_loglevel(applog.mpv_log_level())
+
+    def backend(self) -> str:
+        return self._backend
 
     def get_player_handle(self):
-        """返回 mpv 实例，供 MPVWidget 使用"""
+        """
+        返回 mpv 实例，供 MPVWidget 使用；lazy 模式下 core_ready 之前为 None。
+        'ipc' 后端返回接口相同的 MpvIpcPlayer，但没有渲染上下文，需配合 MpvIpcWidget。
+        """
         return self._player
 
-    def set_media(self, file_path: str):
-        self._player.play(file_path)
+    def get_property_bridge(self) -> PropertyBridge:
+        """返回属性桥，可用于调整投递频率或读取合并统计"""
+        return self._bridge
+
+    def set_media(self, file_path: str, profile: str = None):
+        """
+        播放单个文件（替换当前播放列表）。
+        profile 为 'local' / 'nas' / 'http' / 'kiosk'，None 时按路径自动选择。
+        """
+        self.set_playlist([file_path], profile=profile)
+
+    # --- 播放列表 ---
+    def playlist(self) -> Playlist:
+        return self._playlist
+
+    @_deferred_until_ready
+    def set_playlist(self, paths, start: int = 0, profile: str = None):
+        """profile 对整个列表生效，None 时每一项按路径自动选择。"""
+        if profile is not None:
+            get_profile(profile)
+        self._profile_override = profile
+        self._playlist.set_items(paths, start)
+        if self._playlist.current is not None:
+            self._load_current()
+
+    @_deferred_until_ready
+    def enqueue(self, paths):
+        was_empty = self._playlist.current is None
+        self._playlist.extend(paths)
+        if was_empty:
+            self._load_current()
+        elif self._preloaded is None:
+            self._preload_next()
+
+    @_deferred_until_ready
+    def next(self):
+        if self._playlist.advance() is not None:
+            self._load_current()
+
+    @_deferred_until_ready
+    def previous(self):
+        if self._playlist.previous() is not None:
+            self._load_current()
+
+    @_deferred_until_ready
+    def play_index(self, index: int):
+        self._playlist.jump(index)
+        self._load_current()
+
+    @_deferred_until_ready
+    def set_shuffle(self, enabled: bool):
+        self._playlist.set_shuffle(enabled)
+        self._preload_next()
+
+    @_deferred_until_ready
+    def set_repeat(self, mode: RepeatMode):
+        self._playlist.repeat = RepeatMode(mode)
+        self._player.loop_file = 'inf' if mode == RepeatMode.ONE else 'no'
+        self._preload_next()
+
+    @_deferred_until_ready
+    def set_video_decoding(self, enabled: bool):
+        """
+        enabled=False 时设置 vid=no，只解码音频；恢复时重新选中原来的视频轨（没有选中时为 auto），
+        mpv 会重新初始化视频解码器并解码当前位置的一帧。
+        """
+        if enabled == (self._saved_vid is None):
+            return
+        if enabled:
+            saved, self._saved_vid = self._saved_vid, None
+            self._player.vid = 'auto'
+            if saved != 'auto':
+                # 轨道号只对当前文件有意义：写成文件局部选项，之后的文件仍按 auto 选择
+                self._player.command('set', 'file-local-options/vid', str(saved))
+        else:
+            self._saved_vid = self._track_ids.get('current-tracks/video/id') or 'auto'
+            self._player.vid = 'no'
+
+    def video_decoding(self) -> bool:
+        return self._saved_vid is None
+
+    def has_audio(self) -> bool:
+        """当前文件是否选中了音轨。"""
+        return self._track_ids.get('current-tracks/audio/id') is not None
+
+    def seek(self, position: float, precision: str = 'exact', callback=None):
+        """
+        异步 seek 到绝对位置（秒），不等待 mpv 执行完毕。
+        precision 为 'exact' 或 'keyframes'；完成后发射 seek_finished。
+        callback(error, result) 在 mpv 受理命令后于 mpv 线程调用，早于对应的 playback-restart 事件。
+        """
+        if self._player is None:
+            # 核心还没建好或正在重建：同样按失败通知，等待 callback 的调用方不会一直挂起
+            self._on_seek_reply("mpv 核心尚未就绪", None, callback)
+            return
+        self._player.command_async('seek', position, f'absolute+{precision}',
+                                   callback=lambda error, result: self._on_seek_reply(error, result, callback))
+
+    def resume_at(self, position: float):
+        """当前文件出首帧后 seek 到 position（秒）；已经在播放时立即 seek。"""
+        if self._file_started:
+            self.seek(position)
+        else:
+            self._resume_at = position
+
+    def _on_seek_reply(self, error, result, callback=None):
+        # mpv 线程；成功时等 playback-restart，失败（例如没有文件）立即通知
+        if error:
+            self._bridge.push('seek-error', str(error))
+        if callback is not None:
+            callback(error, result)
+
+    def load_serial(self) -> int:
+        """最近一次加载（set_media / set_playlist / next / previous / play_index）的编号，与 load_finished 对应。"""
+        return self._load_serial
+
+    def _finish_load(self, ok: bool):
+        self._load_pending = self._load_started = False
+        self.load_finished.emit(self._load_serial, ok)
+
+    def position(self):
+        """最近一次播放位置（秒）；还没有开始播放时为 None。"""
+        return self._position
+
+    def current_source(self):
+        """mpv 实际在播放的文件；与 playlist().current 不同时说明换成了代理。"""
+        return self._source
+
+    @_deferred_until_ready
+    def swap_source(self, path: str, position: float = None):
+        """
+        当前条目换成另一份时间轴相同的文件（代理 / 原片），不改变播放列表，不发射 current_item_changed。
+        通过 start 选项直接从 position（默认当前位置）开始解码，不会先显示第一帧；暂停状态保持不变。
+        """
+        if self._playlist.current is None or path == self._source:
+            return
+        if position is None:
+            # time-pos 以 10 Hz 投递到 GUI，先取桥里还没投递的最新值，换过去的画面与暂停的那一帧一致
+            position = self._bridge.peek('time-pos')
+            if position is None:
+                position = self._position
+        self._manual_load = True
+        if position is not None:
+            self._player['start'] = f'{position:.3f}'
+            self._start_override = True
+        self._source = path
+        self._loadfile(path, 'replace', self._current_profile)
+        # replace 会清空 mpv 的播放列表，重新追加预加载项
+        self._preloaded = None
+        self._append_next()
+
+    def _clear_start_override(self):
+        if self._start_override:
+            self._start_override = False
+            self._player['start'] = 'none'
+
+    def current_profile(self) -> str:
+        """当前条目使用的播放配置名；还没有加载过文件时为 None。"""
+        return self._current_profile
+
+    def _profile_for(self, path: str) -> str:
+        return self._profile_override or guess_profile(path, self._default_profile)
+
+    def _apply_profile(self, name: str):
+        """在 loadfile 之前写入缓存选项，对之后打开的文件生效；配置未变时不重复设置。"""
+        if name == self._applied_profile:
+            return
+        for option, value in mpv_options(get_profile(name)).items():
+            self._player[option] = value
+        self._applied_profile = name
+        _log.debug("播放配置：%s", name)
+
+    def _loadfile(self, path: str, mode: str, profile: str):
+        """
+        与全局选项不同的配置作为这一项的单独选项传给 loadfile，只在它播放期间生效。
+        预加载的下一项（prefetch）由 mpv 自动切入，来不及再改全局选项，只能这样带上自己的配置。
+        """
+        options = {} if profile == self._applied_profile else mpv_options(get_profile(profile))
+        self._player.loadfile(path, mode, **options)
+
+    def transition_latencies(self):
+        """最近的切换延迟（毫秒）：上一项 EOF（或手动切换请求）到下一项首帧"""
+        return list(self._transitions)
+
+    def _load_current(self):
+        # 还没出首帧的上一次加载被取代，不再单独通知；等待它的一方以更新的编号判断
+        self._load_serial += 1
+        self._load_pending = True
+        self._load_started = False
+        self._load_issued = time.monotonic()
+        self._manual_load = True
+        self._file_started = False
+        self._transition_start = time.monotonic()
+        self._position = None
+        self._player.loop_file = 'inf' if self._playlist.repeat == RepeatMode.ONE else 'no'
+        self._current_profile = self._profile_for(self._playlist.current)
+        self._apply_profile(self._current_profile)
+        self._clear_start_override()
+        self._source = self._playlist.current
+        self._player.loadfile(self._playlist.current, 'replace')
         self._player.pause = False
-        
+        self._preloaded = None
+        self._append_next()
+        self.current_item_changed.emit(self._playlist.current_index, self._playlist.current)
+
+    def _preload_next(self):
+        """重新决定预加载项：清掉 mpv 播放列表里除当前文件外的条目，再追加下一项"""
+        if self._playlist.current is None:
+            return
+        self._player.command('playlist-clear')
+        self._preloaded = None
+        self._append_next()
+
+    def _append_next(self):
+        nxt = self._playlist.peek_next()
+        if nxt is not None:
+            path = self._playlist.items[nxt]
+            self._preloaded_profile = self._profile_for(path)
+            self._loadfile(path, 'append', self._preloaded_profile)
+        self._preloaded = nxt
+
     def close(self):
         """安全终止播放器"""
-        self._player.terminate()
+        self._closed = True
+        applog.pipeline().remove_level_listener(self._sync_log_level)
+        if self._player is not None:
+            self._player.terminate()
+
+    # --- 属性回调（主线程，批量） ---
+    @Slot(dict)
+    def _on_snapshot(self, snapshot: dict):
+        if 'duration' in snapshot:
+            self.on_duration_changed('duration', snapshot['duration'])
+        if 'time-pos' in snapshot:
+            self.on_position_changed('time-pos', snapshot['time-pos'])
+        if 'pause' in snapshot:
+            self.on_pause_state_changed('pause', snapshot['pause'])
+        if 'end-file' in snapshot:
+            reason, t = snapshot['end-file']
+            if reason in ('eof', 'error'):
+                if self._preloaded is None:
+                    self.playback_finished.emit()
+                else:
+                    self._transition_start = t
+        if 'start-file' in snapshot:
+            self._on_start_file(snapshot['start-file'])
+            # 同一批里的 end-file 如果晚于 start-file，说明是这次加载的文件打不开
+            end = snapshot.get('end-file')
+            if self._load_started and end is not None and end[0] == 'error' and end[1] >= snapshot['start-file']:
+                self._finish_load(False)
+        elif self._load_started and snapshot.get('end-file', ('',))[0] == 'error':
+            self._finish_load(False)
+        # 无缝切换时 current_item_changed 在上面的 start-file 里才发出，file-loaded 要排在它之后
+        if 'file-loaded' in snapshot:
+            self.file_loaded.emit()
+        # 被替换的旧文件的 end-file（aborted）会在新文件读取 start 之前到达，只在首帧或加载失败后恢复
+        if 'playback-restart' in snapshot or snapshot.get('end-file', ('',))[0] == 'error':
+            self._clear_start_override()
+        if 'playback-restart' in snapshot:
+            self._file_started = True
+            if self._load_started:
+                self._finish_load(True)
+            if self._transition_start is not None:
+                self._transitions.append((snapshot['playback-restart'] - self._transition_start) * 1000.0)
+                self._transition_start = None
+            if self._resume_at is not None:
+                resume_at, self._resume_at = self._resume_at, None
+                self.seek(resume_at)
+            self.seek_finished.emit(True)
+        if 'seek-error' in snapshot:
+            self.seek_finished.emit(False)
+
+    def _on_start_file(self, t: float):
+        self._file_started = False
+        if self._saved_vid is not None:
+            self._saved_vid = 'auto'  # 换了文件，之前记下的轨道号不再对应
+        if self._load_pending and t >= self._load_issued:
+            self._load_started = True
+        if self._manual_load:
+            self._manual_load = False
+            return
+        if self._preloaded is None:
+            return
+        # mpv 自动进入了预加载的下一项：同步队列位置并预加载再下一项
+        self._playlist.advance()
+        self._source = self._playlist.current
+        self._current_profile = self._preloaded_profile
+        self._player.command('playlist-clear')
+        self._preloaded = None
+        self._append_next()
+        self.current_item_changed.emit(self._playlist.current_index, self._playlist.current)
+
+    def _on_track_id(self, name, value):
+        # inprocess 后端在 mpv 线程调用：只替换字典里的值
+        self._track_ids[name] = value
 
-    # --- 属性观察回调函数 ---
     def on_position_changed(self, name, value):
         if value is not None:
+            self._position = value
             self.position_changed.emit(int(value * 1000))
 
     def on_duration_changed(self, name, value):
@@ -47,8 +653,17 @@ class MediaPlayerService(QObject):
         if is_paused is not None:
             self.playback_state_changed.emit(not is_paused)
 
-    
-    def on_end_file(event):
-        # 3. 在事件发生时，发射我们的自定义信号
-        print("MediaPlayerService: Detected end-file event.")
-        self.playback_finished.emit()
\ No newline at end of file
+    # --- mpv 事件（mpv 线程），带上发生时刻交给属性桥 ---
+    def on_end_file(self, event):
+        # 在 mpv 线程上，只把事件交给属性桥，由主线程发射 playback_finished
+        reason = event.data.reason
+        self._bridge.push('end-file', (_END_FILE_REASONS.get(reason, reason), time.monotonic()))
+
+    def on_start_file(self, event):
+        self._bridge.push('start-file', time.monotonic())
+
+    def on_file_loaded(self, event):
+        self._bridge.push('file-loaded', time.monotonic())
+
+    def on_playback_restart(self, event):
+        self._bridge.push('playback-restart', time.monotonic())
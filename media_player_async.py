@@ -0,0 +1,333 @@
+# media_player_async.py —— MediaPlayerService 的 asyncio 接口：可 await 的加载、seek、属性等待与事件流
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+
+from PySide6.QtCore import QCoreApplication, QMetaObject, QObject, QThread, Qt, Signal, Slot
+
+from media_player import _END_FILE_REASONS, MediaPlayerService
+
+try:
+    import qasync
+except ImportError:  # 可选依赖：没有时 asyncio 循环跑在后台线程
+    qasync = None
+
+# 转发给 events() 的 mpv 事件
+_EVENTS = ('start-file', 'file-loaded', 'end-file', 'playback-restart', 'seek')
+
+
+class LoadError(RuntimeError):
+    pass
+
+
+class SeekError(RuntimeError):
+    pass
+
+
+@dataclass
+class PlayerEvent:
+    name: str                # mpv 事件名，属性变化为 'property-change'
+    data: object = None      # end-file 为原因字符串，属性变化为 (名称, 值)
+    time: float = field(default_factory=time.monotonic)
+
+
+class _LoadWaiter:
+    """load() 的等待状态：serial 是服务为这次加载分配的 load_serial()，在 GUI 线程里填入。"""
+
+    def __init__(self, future):
+        self.future = future
+        self.serial = None
+
+
+class AsyncMediaPlayer(QObject):
+    """
+    把 MediaPlayerService 包装成协程接口：
+
+        player = AsyncMediaPlayer(service)
+        await player.load(path)
+        await player.seek(30.0, exact=True)
+        await player.wait_for_property('pause', lambda v: v is True)
+        async for event in player.events():
+            ...
+
+    Future 直接由 mpv 事件回调解决：回调在 mpv 线程（ipc 后端为 GUI 线程）里按发生顺序
+    调用 loop.call_soon_threadsafe，没有轮询线程，也不经过属性桥的合并。
+    对服务的调用（set_media、seek）总是在 GUI 线程执行：asyncio 循环与 GUI 共用线程时
+    （qasync）直接调用，循环在后台线程时经排队信号转交。
+
+    必须在 GUI 线程创建。第一次调用协程时绑定当时运行的事件循环。
+    """
+    _invoke = Signal(object)
+
+    EVENT_QUEUE_SIZE = 1000
+
+    def __init__(self, service: MediaPlayerService, parent=None):
+        super().__init__(parent)
+        self._service = service
+        self._loop = None
+        self._values = {}        # 属性名 -> 最近的值（mpv 线程写入）
+        self._observed = set()
+        self._watched = {}       # 属性名 -> 正在等待或订阅的数量，为 0 时属性变化不转发
+        self._property_waiters = {}  # 属性名 -> [(predicate, future)]
+        self._load_waiters = []
+        self._restart_waiters = []   # 已被 mpv 受理、等待 playback-restart 的 seek
+        self._queues = []            # [(asyncio.Queue, 名称集合或 None)]
+        self._player = None
+        self._invoke.connect(self._run_invoked, Qt.QueuedConnection)
+        service.load_finished.connect(self._on_load_finished)
+        service.core_ready.connect(self._attach)
+        if service.is_ready():
+            self._attach()
+
+    # --- 线程与循环 ---
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError("AsyncMediaPlayer 只能在一个事件循环中使用")
+        return loop
+
+    def _call_in_gui(self, fn):
+        if QThread.currentThread() == self.thread():
+            fn()
+        else:
+            self._invoke.emit(fn)
+
+    @Slot(object)
+    def _run_invoked(self, fn):
+        fn()
+
+    def _post(self, fn, *args):
+        """mpv 线程（或 GUI 线程）-> asyncio 循环。"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(fn, *args)
+
+    # --- 挂接 mpv 回调（GUI 线程，核心创建或重建后） ---
+
+    @Slot()
+    def _attach(self):
+        player = self._service.get_player_handle()
+        if player is None or player is self._player:
+            return
+        self._player = player
+        for name in _EVENTS:
+            player.event_callback(name)(lambda event, n=name: self._on_mpv_event(n, event))
+        observed, self._observed = self._observed, set()
+        for name in observed:
+            self._observe(name)
+
+    def _observe(self, name: str):
+        if name in self._observed or self._player is None:
+            return
+        self._observed.add(name)
+        self._player.observe_property(name, self._on_mpv_property)
+
+    def _on_mpv_event(self, name: str, event):
+        # mpv 线程
+        data = None
+        if name == 'end-file':
+            reason = event.data.reason
+            data = _END_FILE_REASONS.get(reason, reason)
+        self._post(self._dispatch_event, PlayerEvent(name, data))
+
+    def _on_mpv_property(self, name: str, value):
+        # mpv 线程：总是记下最新值，只有有人在等时才唤醒 asyncio 循环
+        self._values[name] = value
+        if self._watched.get(name):
+            self._post(self._dispatch_property, name, value)
+
+    @Slot(int, bool)
+    def _on_load_finished(self, serial: int, ok: bool):
+        # GUI 线程：服务已经把 start-file / playback-restart / end-file 对应到了具体的加载
+        self._post(self._dispatch_load, serial, ok)
+
+    # --- asyncio 循环中执行 ---
+
+    def _dispatch_load(self, serial: int, ok: bool):
+        remaining = []
+        for waiter in self._load_waiters:
+            if waiter.serial is None or waiter.serial > serial:
+                remaining.append(waiter)
+            elif not waiter.future.done():
+                if waiter.serial < serial:
+                    waiter.future.set_exception(LoadError("加载被之后的请求取代"))
+                elif ok:
+                    waiter.future.set_result(None)
+                else:
+                    waiter.future.set_exception(LoadError("mpv 无法打开文件"))
+        self._load_waiters = remaining
+
+    def _dispatch_event(self, event: PlayerEvent):
+        if event.name == 'playback-restart':
+            waiters, self._restart_waiters = self._restart_waiters, []
+            for future in waiters:
+                if not future.done():
+                    future.set_result(None)
+        self._feed(event)
+
+    def _dispatch_property(self, name: str, value):
+        waiters = self._property_waiters.get(name)
+        if waiters:
+            remaining = []
+            for predicate, future in waiters:
+                if future.done():
+                    continue
+                try:
+                    matched = predicate(value)
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                if matched:
+                    future.set_result(value)
+                else:
+                    remaining.append((predicate, future))
+            self._property_waiters[name] = remaining
+        self._feed(PlayerEvent('property-change', (name, value)))
+
+    def _feed(self, event: PlayerEvent):
+        for queue, names in self._queues:
+            if names is not None and event.name not in names:
+                continue
+            if queue.full():
+                queue.get_nowait()  # 消费太慢时丢弃最旧的事件
+            queue.put_nowait(event)
+
+    def _watch(self, name: str, delta: int):
+        self._watched[name] = self._watched.get(name, 0) + delta
+        if delta > 0:
+            self._call_in_gui(lambda: self._observe(name))
+
+    # --- 协程接口 ---
+
+    async def load(self, path: str, timeout: float = None):
+        """替换当前播放列表并等待第一帧就绪（playback-restart）；打不开时抛出 LoadError。"""
+        loop = self._bind_loop()
+        waiter = _LoadWaiter(loop.create_future())
+        self._load_waiters.append(waiter)
+
+        def start():
+            service = self._service
+            ready = service.is_ready()
+            service.set_media(path)
+            # 核心还没建好时 set_media 排在 core_ready 之后执行，届时分配下一个编号
+            waiter.serial = service.load_serial() + (0 if ready else 1)
+
+        self._call_in_gui(start)
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        finally:
+            if waiter in self._load_waiters:
+                self._load_waiters.remove(waiter)
+
+    async def seek(self, position: float, exact: bool = True, timeout: float = None):
+        """seek 到绝对位置（秒），在对应的 playback-restart 之后返回；失败时抛出 SeekError。"""
+        loop = self._bind_loop()
+        future = loop.create_future()
+
+        def on_reply(error, _result):
+            # mpv 线程：受理后才开始等 playback-restart，不会被更早的 restart 误触发
+            self._post(self._arm_seek, future, error)
+
+        precision = 'exact' if exact else 'keyframes'
+        self._call_in_gui(lambda: self._service.seek(position, precision, callback=on_reply))
+        await asyncio.wait_for(future, timeout)
+
+    def _arm_seek(self, future, error):
+        if future.done():
+            return
+        if error:
+            future.set_exception(SeekError(str(error)))
+        else:
+            self._restart_waiters.append(future)
+
+    async def wait_for_property(self, name: str, predicate=None, timeout: float = None):
+        """
+        等到属性满足 predicate（默认：不为 None），返回当时的值。
+        当前值已经满足时立即返回。
+        """
+        loop = self._bind_loop()
+        predicate = predicate or (lambda v: v is not None)
+        self._watch(name, +1)
+        try:
+            if name in self._values and predicate(self._values[name]):
+                return self._values[name]
+            future = loop.create_future()
+            self._property_waiters.setdefault(name, []).append((predicate, future))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._watch(name, -1)
+
+    def get_property(self, name: str):
+        """最近观察到的值；从未观察过的属性返回 None 并开始观察。"""
+        if name not in self._observed:
+            self._call_in_gui(lambda: self._observe(name))
+        return self._values.get(name)
+
+    async def events(self, *names, properties=()):
+        """
+        异步迭代 mpv 事件。names 为空时包含全部 _EVENTS；
+        properties 中的属性变化以 'property-change' 事件给出。
+        """
+        self._bind_loop()
+        queue = asyncio.Queue(self.EVENT_QUEUE_SIZE)
+        wanted = set(names or _EVENTS)
+        if properties:
+            wanted.add('property-change')
+        entry = (queue, wanted)
+        self._queues.append(entry)
+        for name in properties:
+            self._watch(name, +1)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._queues.remove(entry)
+            for name in properties:
+                self._watch(name, -1)
+
+
+# --- 事件循环集成 ---
+
+def _start_thread_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="asyncio", daemon=True)
+    thread.start()
+    return loop, thread
+
+
+def create_event_loop(app: QCoreApplication = None):
+    """
+    有 qasync 时返回与 Qt 共用 GUI 线程的事件循环（并设为当前循环）；
+    否则在后台线程启动一个 asyncio 循环并返回它，调用会经排队信号转交 GUI 线程。
+    后台循环由调用方负责 call_soon_threadsafe(loop.stop) 停止。
+    """
+    if qasync is not None:
+        loop = qasync.QEventLoop(app or QCoreApplication.instance())
+        asyncio.set_event_loop(loop)
+        return loop
+    return _start_thread_loop()[0]
+
+
+def run(coro, app: QCoreApplication = None):
+    """运行协程直到完成，期间 Qt 事件循环照常处理界面和 mpv 回调。返回协程的结果。"""
+    app = app or QCoreApplication.instance()
+    if qasync is not None:
+        loop = create_event_loop(app)
+        with loop:
+            return loop.run_until_complete(coro)
+    loop, thread = _start_thread_loop()
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    # done 回调在 asyncio 线程，quit 要排队到 GUI 线程；在 exec 之前完成时同样会在 exec 里退出
+    future.add_done_callback(lambda _f: QMetaObject.invokeMethod(app, "quit", Qt.QueuedConnection))
+    app.exec()
+    if not future.done():
+        future.cancel()  # Qt 循环先被别处退出（例如关闭窗口），不再等协程
+    # 每次调用的循环和线程都在这里收尾，反复调用 run() 不会累积
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    return future.result()
@@ -1,12 +1,66 @@
 # media_widgets.py (已重构)
 
-from PySide6.QtWidgets import QWidget, QPushButton, QSlider, QHBoxLayout, QVBoxLayout, QLabel
-from PySide6.QtCore import Qt, QTimer, QEvent
+from dataclasses import dataclass
+
+from PySide6.QtWidgets import QWidget, QPushButton, QSlider, QHBoxLayout, QVBoxLayout, QLabel, QStyle
+from PySide6.QtCore import Qt, QTimer, QEvent, QPoint
+from PySide6.QtGui import QColor, QLinearGradient, QPainter, QPixmap
+
+
+@dataclass
+class OverlayPaintStats:
+    """悬浮控制层各部分的 Paint 事件次数"""
+    layer: int = 0          # 控制层背景
+    current_time: int = 0
+    total_time: int = 0
+    slider: int = 0
+    buttons: int = 0
+    volume: int = 0
+
+
+class _OverlayLayer(QWidget):
+    """
+    悬浮在视频控件上的控制层：作为视频控件的子控件，由 Qt 合成在视频帧之上。
+    背景渐变按尺寸缓存为 QPixmap，只在尺寸变化时重建；子控件只重画自己变化的区域。
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self._background = None
+        self.paints = 0
+
+    def paintEvent(self, event):
+        self.paints += 1
+        if self._background is None or self._background.size() != self.size():
+            self._background = self._build_background()
+        painter = QPainter(self)
+        painter.drawPixmap(event.rect(), self._background, event.rect())
+        painter.end()
+
+    def _build_background(self) -> QPixmap:
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.transparent)
+        gradient = QLinearGradient(0, 0, 0, self.height())
+        gradient.setColorAt(0.0, QColor(0, 0, 0, 0))
+        gradient.setColorAt(1.0, QColor(0, 0, 0, 160))
+        painter = QPainter(pixmap)
+        painter.fillRect(pixmap.rect(), gradient)
+        painter.end()
+        return pixmap
+
 
 class PlayerUI(QWidget):
     def __init__(self, icon_manager, parent=None):
         super().__init__(parent)
         self.icon_manager = icon_manager
+        self._is_playing = False
+        self._is_muted = False
+        self._thumbnails = None
+        self._thumb_popup = None
+        self._video_widget = None
+        self._overlay = None
+        self._waveform = None
+        self._paints = OverlayPaintStats()
 
         # --- 创建控件 ---
         # 视频层是基础
@@ -25,6 +79,8 @@ class PlayerUI(QWidget):
 
         self._setup_widgets_properties()
         self._setup_control_layout()
+        # 主题切换后重新设置按钮图标
+        self.icon_manager.add_theme_listener(self.refresh_icons)
         
 
         # --- 事件处理与定时器 ---
@@ -62,23 +118,36 @@ class PlayerUI(QWidget):
         self.volume_slider.setValue(100)
         self.volume_slider.setFixedWidth(100)
         self.volume_slider.setEnabled(False)
+        # 显示 / 隐藏音量条时保留它的位置，控制栏不用重新布局、整条重画
+        policy = self.volume_slider.sizePolicy()
+        policy.setRetainSizeWhenHidden(True)
+        self.volume_slider.setSizePolicy(policy)
+
+        # 时间标签按最宽的文本固定宽度，文字变化时只重画标签本身
+        for label in (self.current_time_label, self.total_time_label):
+            label.setMinimumWidth(label.fontMetrics().horizontalAdvance("000:00") + 4)
+            label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
 
 
     def _setup_control_layout(self):
         
-        layout = QHBoxLayout(self)
+        layout = QHBoxLayout(self.control_widget)
         layout.addWidget(self.play_button)
         layout.addWidget(self.current_time_label)
         layout.addWidget(self.total_time_label)
         layout.addStretch()
         layout.addWidget(self.volume_slider)
         layout.addWidget(self.mute_button)
-        self.control_widget.setLayout(layout)
 
     def eventFilter(self, watched, event):
         """
         事件过滤器，用于处理静音按钮和音量条的特殊交互
         """
+        if event.type() == QEvent.Type.Paint and self._overlay is not None:
+            self._count_paint(watched)
+        elif watched is self._video_widget and event.type() == QEvent.Type.Resize:
+            self._place_overlay()
+
         if watched is self.mute_button or watched is self.volume_slider:
             if event.type() == QEvent.Type.Enter:
                 # 鼠标进入任一控件，都停止计时器并显示音量条
@@ -90,7 +159,119 @@ class PlayerUI(QWidget):
                 self.volume_hide_timer.start()
                 return True  # 事件已处理
 
+        if watched is self.slider and self._thumbnails is not None:
+            if event.type() == QEvent.Type.MouseMove:
+                self._show_thumbnail(event.position().toPoint().x())
+            elif event.type() == QEvent.Type.Leave:
+                self._thumb_popup.hide()
+
         return super().eventFilter(watched, event)
+
+    # --- 悬浮控制层 ---
+
+    def set_video_widget(self, widget, overlay: bool = True):
+        """
+        用实际的视频控件（MPVWidget / MPVSoftwareWidget）替换占位的 video_frame，只调用一次。
+
+        overlay 时进度条和控制栏移到视频控件上的悬浮控制层里。悬停、音量条显示 / 隐藏、
+        时间标签变化只重画控制层中变化的控件；Qt 重新合成时 MPVWidget 的 paintGL 会被调用，
+        但没有新帧时不调用 ctx.render，直接沿用 FBO 里的上一帧。视频只在 mpv 交付新帧时重画。
+        """
+        layout = self.layout()
+        old = self._video_widget or self.video_frame
+        layout.replaceWidget(old, widget)
+        old.hide()
+        self._video_widget = widget
+        if not overlay:
+            return
+        layout.removeWidget(self.slider)
+        layout.removeWidget(self.control_widget)
+        self._overlay = _OverlayLayer(widget)
+        overlay_layout = QVBoxLayout(self._overlay)
+        overlay_layout.setContentsMargins(8, 16, 8, 4)
+        overlay_layout.setSpacing(0)
+        if self._waveform is not None:
+            # 先绑定的波形条跟着进度条一起移到控制层
+            layout.removeWidget(self._waveform)
+            overlay_layout.addWidget(self._waveform)
+        overlay_layout.addWidget(self.slider)
+        overlay_layout.addWidget(self.control_widget)
+        # 控制层里的控件背景透明，露出缓存的渐变
+        for child in (self.control_widget, self.slider):
+            child.setAutoFillBackground(False)
+        for watched in (self.current_time_label, self.total_time_label, self.slider,
+                        self.play_button):
+            watched.installEventFilter(self)
+        widget.installEventFilter(self)
+        self._overlay.show()
+        self._place_overlay()
+
+    def _place_overlay(self):
+        height = self._overlay.sizeHint().height()
+        video = self._video_widget
+        self._overlay.setGeometry(0, video.height() - height, video.width(), height)
+        self._overlay.raise_()
+
+    def _count_paint(self, watched):
+        paints = self._paints
+        if watched is self.current_time_label:
+            paints.current_time += 1
+        elif watched is self.total_time_label:
+            paints.total_time += 1
+        elif watched is self.slider:
+            paints.slider += 1
+        elif watched is self.volume_slider:
+            paints.volume += 1
+        elif watched is self.play_button or watched is self.mute_button:
+            paints.buttons += 1
+
+    def paint_stats(self) -> OverlayPaintStats:
+        """悬浮控制层各部分的重画次数；与 MPVWidget.render_stats() 对照，确认控件变化没有引起视频重画"""
+        stats = OverlayPaintStats(**vars(self._paints))
+        if self._overlay is not None:
+            stats.layer = self._overlay.paints
+        return stats
+
+    def reset_paint_stats(self):
+        self._paints = OverlayPaintStats()
+        if self._overlay is not None:
+            self._overlay.paints = 0
+
+    def bind_waveform(self, builder):
+        """在进度条上方显示波形 / 响度概览（需要 NumPy，按需导入）"""
+        from waveform import WaveformStrip
+        strip = WaveformStrip(builder, self)
+        # 悬浮控制层模式下进度条已经不在主布局里，插到它当前所在的布局
+        layout = self.slider.parentWidget().layout()
+        layout.insertWidget(layout.indexOf(self.slider), strip)
+        self._waveform = strip
+        if self._overlay is not None:
+            self._place_overlay()
+        return strip
+
+    def bind_thumbnail_provider(self, provider):
+        """悬停进度条时显示缩略图"""
+        self._thumbnails = provider
+        self._thumb_popup = QLabel(self, Qt.ToolTip)
+        self._thumb_popup.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.slider.setMouseTracking(True)
+        self.slider.installEventFilter(self)
+
+    def _show_thumbnail(self, x: int):
+        if self.slider.maximum() <= 0:
+            return
+        ms = QStyle.sliderValueFromPosition(self.slider.minimum(), self.slider.maximum(),
+                                            x, self.slider.width())
+        found = self._thumbnails.thumbnail(ms)
+        if found is None:
+            self._thumb_popup.hide()
+            return
+        sheet, rect = found
+        self._thumb_popup.setPixmap(QPixmap.fromImage(sheet.copy(rect)))
+        self._thumb_popup.adjustSize()
+        pos = self.slider.mapToGlobal(QPoint(x - rect.width() // 2, -rect.height() - 8))
+        self._thumb_popup.move(pos)
+        self._thumb_popup.show()
     
 
 
@@ -102,19 +283,46 @@ class PlayerUI(QWidget):
         seconds = seconds % 60
         return f"{minutes:02d}:{seconds:02d}"
 
+    @staticmethod
+    def _set_label_text(label: QLabel, text: str):
+        # 文本没变时不触发重画
+        if label.text() != text:
+            label.setText(text)
+
     def set_slider_range(self, duration_ms: int):
         self.slider.setRange(0, duration_ms)
-        self.total_time_label.setText(self._format_time(duration_ms))
+        self._set_label_text(self.total_time_label, self._format_time(duration_ms))
         self.play_button.setEnabled(True)
         self.mute_button.setEnabled(True)
         self.volume_slider.setEnabled(True)
 
     def update_slider_position(self, position_ms: int):
-        if not self.slider.isSliderDown():
-            self.slider.setValue(position_ms)
-        self.current_time_label.setText(self._format_time(position_ms))
+        slider = self.slider
+        if not slider.isSliderDown() and self._slider_moves(position_ms):
+            slider.setValue(position_ms)
+        self._set_label_text(self.current_time_label, self._format_time(position_ms))
+
+    def _slider_moves(self, value: int) -> bool:
+        """滑块位置会移动至少一个像素时才更新数值（长视频每秒的位置更新大多落在同一像素上）"""
+        slider = self.slider
+        span = max(1, slider.width())
+        old = QStyle.sliderPositionFromValue(slider.minimum(), slider.maximum(), slider.value(), span)
+        new = QStyle.sliderPositionFromValue(slider.minimum(), slider.maximum(), value, span)
+        return old != new
+
+    def bind_scrub_controller(self, controller):
+        """进度条拖动交给 ScrubController；拖动中时间标签显示画面实际落到的位置"""
+        controller.attach_slider(self.slider)
+        controller.scrub_preview.connect(
+            lambda ms: self._set_label_text(self.current_time_label, self._format_time(ms)))
+
+    def refresh_icons(self, theme_name: str = None):
+        """按当前播放/静音状态重新取图标（IconManager.set_theme 之后调用）"""
+        self.update_play_button_icon(self._is_playing)
+        self.update_mute_button_icon(self._is_muted)
 
     def update_play_button_icon(self, is_playing: bool):
+        self._is_playing = is_playing
         if is_playing:
             self.play_button.setIcon(self.icon_manager.get_pause_icon())
         else:
@@ -125,6 +333,7 @@ class PlayerUI(QWidget):
             self.volume_slider.setValue(volume)
             
     def update_mute_button_icon(self, is_muted: bool):
+        self._is_muted = is_muted
         if is_muted:
             self.mute_button.setIcon(self.icon_manager.get_volume_off_icon())
         else:
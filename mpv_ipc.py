@@ -0,0 +1,389 @@
+# mpv_ipc.py —— 进程外播放核心：子进程 mpv + JSON IPC，接口与 python-mpv 的 MPV 对齐
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal, Slot
+from PySide6.QtNetwork import QLocalSocket
+from PySide6.QtWidgets import QWidget
+
+import applog
+from subprocess_util import NO_WINDOW
+
+_counter = itertools.count(1)
+_log = applog.get_logger("player/ipc")
+
+# 只对 libmpv 渲染 API 有意义的选项，命令行 mpv 不认识
+_RENDER_API_ONLY = {'fbo_format'}
+# 与 libmpv 的默认值保持一致：不读用户配置、不装默认按键和 OSC，由我们的界面负责交互
+_CLI_DEFAULTS = ['--idle=yes', '--no-terminal', '--no-config', '--input-default-bindings=no',
+                 '--input-vo-keyboard=no', '--osc=no']
+
+
+class IpcError(Exception):
+    pass
+
+
+@dataclass
+class IpcStats:
+    commands: int = 0  # 发出的请求数
+    batches: int = 0   # 实际写入套接字的次数（同一轮事件循环里的请求合并成一批）
+    replies: int = 0
+    events: int = 0    # 收到的事件数（含属性变化）
+
+
+class IpcEvent:
+    """与 python-mpv 的事件对象形状一致：event_id 为事件名，data 的字段来自 JSON。"""
+
+    def __init__(self, msg: dict):
+        self.event_id = msg.get('event')
+        self.data = SimpleNamespace(**{k.replace('-', '_'): v for k, v in msg.items() if k != 'event'})
+
+
+def _cli_value(value) -> str:
+    if value is True:
+        return 'yes'
+    if value is False:
+        return 'no'
+    return str(value)
+
+
+def _server_name() -> str:
+    name = f"myplayer-mpv-{os.getpid()}-{next(_counter)}"
+    if sys.platform == "win32":
+        return rf"\\.\pipe\{name}"
+    return os.path.join(tempfile.gettempdir(), name + ".sock")
+
+
+class MpvIpcPlayer(QObject):
+    """
+    在子进程中运行的 mpv，通过 --input-ipc-server 的 JSON 协议控制。
+
+    必须在 GUI 线程创建：套接字的读取和所有回调都发生在 GUI 线程，
+    不再有 mpv 事件线程与界面争抢 GIL；子进程崩溃也只会发射 process_lost。
+
+    命令是流水线式的：任意线程发出的请求先进发件箱，本轮事件循环结束时一次写入；
+    连接建立之前的请求同样排队，连接后一并发出，因此创建后可以立即使用。
+    command() 不等待回复；需要结果时用 command_async() 的 Future 或回调。
+    属性读取优先返回观察到的或最近设置的值，其余情况才会同步往返（会阻塞）。
+    """
+    connected = Signal()
+    process_lost = Signal(int)  # 子进程意外退出，参数为退出码
+    _flush_requested = Signal()
+
+    CONNECT_TIMEOUT = 5.0
+    SYNC_TIMEOUT = 1.0
+
+    def __init__(self, mpv_path: str = None, log_handler=None, loglevel: str = None,
+                 parent=None, **options):
+        super().__init__(parent)
+        d = self.__dict__  # __setattr__ 被重载为设置 mpv 属性，内部状态直接写字典
+        d['_lock'] = threading.Lock()
+        d['_outbox'] = []
+        d['_flush_queued'] = False
+        d['_request_ids'] = itertools.count(1)
+        d['_replies'] = {}      # request_id -> (Future, callback)
+        d['_observers'] = {}    # 属性名 -> [handler]
+        d['_observe_ids'] = itertools.count(1)
+        d['_event_handlers'] = {}
+        d['_values'] = {}       # 观察到的或最近设置的属性值
+        d['_buffer'] = b''
+        d['_terminating'] = False
+        d['_log_handler'] = log_handler
+        d['stats'] = IpcStats()
+
+        d['_server'] = _server_name()
+        args = [mpv_path or os.environ.get("MYPLAYER_MPV", "mpv"), *_CLI_DEFAULTS,
+                f"--input-ipc-server={self._server}"]
+        for name, value in options.items():
+            if name in _RENDER_API_ONLY or (name == 'vo' and value == 'libmpv'):
+                continue  # vo=libmpv 换成命令行 mpv 的默认输出（配合 wid 嵌入窗口）
+            args.append(f"--{name.replace('_', '-')}={_cli_value(value)}")
+        d['_proc'] = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL, creationflags=NO_WINDOW)
+
+        d['_socket'] = QLocalSocket(self)
+        self._socket.connected.connect(self._on_connected)
+        self._socket.readyRead.connect(self._on_ready_read)
+        self._socket.disconnected.connect(self._on_disconnected)
+        self._flush_requested.connect(self._flush, Qt.QueuedConnection)
+        # mpv 启动后才创建管道，在此之前轮询重连
+        d['_connect_deadline'] = time.monotonic() + self.CONNECT_TIMEOUT
+        d['_connect_timer'] = QTimer(self)
+        self._connect_timer.setInterval(20)
+        self._connect_timer.timeout.connect(self._try_connect)
+        self._connect_timer.start()
+        self._try_connect()
+
+        if log_handler is not None:
+            self.command('request_log_messages', loglevel or 'terminal-default')
+
+    # --- 连接 ---
+
+    @Slot()
+    def _try_connect(self):
+        if self._socket.state() != QLocalSocket.UnconnectedState:
+            return
+        if self._proc.poll() is not None or time.monotonic() > self._connect_deadline:
+            self._connect_timer.stop()
+            _log.error("无法连接到 mpv 子进程（%s）", self._server)
+            self._fail_pending(IpcError("mpv 子进程不可用"))
+            self.process_lost.emit(self._proc.poll() or -1)
+            return
+        self._socket.connectToServer(self._server)
+
+    @Slot()
+    def _on_connected(self):
+        self._connect_timer.stop()
+        self.connected.emit()
+        self._flush()
+
+    def is_connected(self) -> bool:
+        return self._socket.state() == QLocalSocket.ConnectedState
+
+    @Slot()
+    def _on_disconnected(self):
+        self._fail_pending(IpcError("与 mpv 子进程的连接已断开"))
+        if self._terminating:
+            return
+        try:
+            code = self._proc.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            code = -1
+        _log.error("mpv 子进程意外退出（%s）", code)
+        self.process_lost.emit(code)
+
+    def _fail_pending(self, error: Exception):
+        with self._lock:
+            replies, self.__dict__['_replies'] = self._replies, {}
+            self._outbox.clear()
+        for future, callback in replies.values():
+            if not future.done():
+                future.set_exception(error)
+            if callback is not None:
+                callback(error, None)
+
+    # --- 发送 ---
+
+    def _send(self, command, callback=None) -> Future:
+        """可在任意线程调用：请求进发件箱，本轮事件循环结束时批量写出。"""
+        future = Future()
+        with self._lock:
+            request_id = next(self._request_ids)
+            self._replies[request_id] = (future, callback)
+            self._outbox.append(json.dumps({'command': command, 'request_id': request_id},
+                                           ensure_ascii=False).encode('utf-8') + b'\n')
+            self.stats.commands += 1
+            if self._flush_queued:
+                return future
+            self.__dict__['_flush_queued'] = True
+        self._flush_requested.emit()
+        return future
+
+    @Slot()
+    def _flush(self):
+        with self._lock:
+            self.__dict__['_flush_queued'] = False
+            if not self._outbox or not self.is_connected():
+                return  # 连接建立后 _on_connected 会再次调用
+            data = b''.join(self._outbox)
+            self._outbox.clear()
+            self.stats.batches += 1
+        self._socket.write(data)
+
+    def _request_sync(self, command: list, timeout: float = None):
+        """同步往返：立即写出并在当前线程等待回复。只用于无法从缓存得到的读取。"""
+        future = self._send(command)
+        deadline = time.monotonic() + (timeout or self.SYNC_TIMEOUT)
+        if not self.is_connected():
+            self._socket.waitForConnected(int((timeout or self.SYNC_TIMEOUT) * 1000))
+        self._flush()
+        while not future.done():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._socket.waitForReadyRead(int(remaining * 1000)):
+                raise TimeoutError(f"mpv 没有回复 {command[0]}")
+            self._on_ready_read()
+        return future.result()
+
+    # --- 接收 ---
+
+    @Slot()
+    def _on_ready_read(self):
+        data = self._buffer + bytes(self._socket.readAll())
+        *lines, rest = data.split(b'\n')
+        self.__dict__['_buffer'] = rest
+        for line in lines:
+            if not line:
+                continue
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            if 'request_id' in msg and 'event' not in msg:
+                self._on_reply(msg)
+            elif 'event' in msg:
+                self._on_event(msg)
+
+    def _on_reply(self, msg: dict):
+        self.stats.replies += 1
+        with self._lock:
+            future, callback = self._replies.pop(msg['request_id'], (None, None))
+        if future is None:
+            return
+        error = msg.get('error', 'success')
+        if error == 'success':
+            future.set_result(msg.get('data'))
+            if callback is not None:
+                callback(None, msg.get('data'))
+        else:
+            future.set_exception(IpcError(error))
+            if callback is not None:
+                callback(IpcError(error), None)
+
+    def _on_event(self, msg: dict):
+        self.stats.events += 1
+        name = msg['event']
+        if name == 'property-change':
+            prop, value = msg.get('name'), msg.get('data')
+            self._values[prop] = value
+            for handler in self._observers.get(prop, ()):
+                handler(prop, value)
+            return
+        if name == 'log-message' and self._log_handler is not None:
+            self._log_handler(msg.get('level'), msg.get('prefix'), msg.get('text', '').rstrip('\n'))
+            return
+        handlers = self._event_handlers.get(name)
+        if handlers:
+            event = IpcEvent(msg)
+            for handler in handlers:
+                handler(event)
+
+    # --- 与 python-mpv 对齐的接口 ---
+
+    def command(self, name: str, *args):
+        """发出命令，不等待结果。"""
+        self._send([name, *args])
+
+    def command_async(self, name: str, *args, callback=None) -> Future:
+        """callback(error, result) 在 GUI 线程调用。"""
+        return self._send([name, *args], callback)
+
+    def loadfile(self, filename: str, mode: str = 'replace', **options):
+        """options 是只对这一项生效的选项；用命名参数发送，不受 mpv 0.38 起 loadfile 多出的 index 参数影响。"""
+        if not options:
+            self.command('loadfile', filename, mode)
+            return
+        self._send({'name': 'loadfile', 'url': filename, 'flags': mode,
+                    'options': {key.replace('_', '-'): str(value) for key, value in options.items()}})
+
+    def seek(self, amount, reference: str = 'relative', precision: str = 'keyframes'):
+        self.command('seek', amount, f'{reference}+{precision}')
+
+    def observe_property(self, name: str, handler):
+        """handler(name, value)；与 python-mpv 不同，在 GUI 线程调用。"""
+        handlers = self._observers.setdefault(name, [])
+        if not handlers:
+            self.command('observe_property', next(self._observe_ids), name)
+        handlers.append(handler)
+
+    def event_callback(self, *event_types):
+        def register(callback):
+            for name in event_types:
+                self._event_handlers.setdefault(name.replace('_', '-'), []).append(callback)
+            return callback
+        return register
+
+    def get_property(self, name: str, timeout: float = None):
+        if name in self._values:
+            return self._values[name]
+        try:
+            return self._request_sync(['get_property', name], timeout)
+        except IpcError:
+            return None
+
+    def get_property_async(self, name: str, callback=None) -> Future:
+        """不阻塞的读取：随本轮批量请求发出，callback(error, value) 在 GUI 线程调用。"""
+        return self._send(['get_property', name], callback)
+
+    def set_property(self, name: str, value):
+        self._values[name] = value
+        self.command('set_property', name, value)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.get_property(name.replace('_', '-'))
+
+    def __setattr__(self, name, value):
+        if name.startswith('_') or name in self.__dict__:
+            super().__setattr__(name, value)
+        else:
+            self.set_property(name.replace('_', '-'), value)
+
+    # python-mpv 中 player[name] 访问的是选项
+    def __getitem__(self, name):
+        return self.get_property(f'options/{name}')
+
+    def __setitem__(self, name, value):
+        self.set_property(f'options/{name}', value)
+
+    def process_id(self) -> int:
+        return self._proc.pid
+
+    def set_loglevel(self, level: str):
+        self.command('request_log_messages', level)
+
+    def terminate(self):
+        self.__dict__['_terminating'] = True
+        self._connect_timer.stop()
+        if self.is_connected():
+            self._send(['quit'])
+            self._flush()
+            self._socket.waitForBytesWritten(500)
+            self._socket.disconnectFromServer()
+        try:
+            self._proc.wait(timeout=2.0)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        if sys.platform != "win32" and os.path.exists(self._server):
+            os.remove(self._server)
+
+
+class MpvIpcWidget(QWidget):
+    """
+    进程外后端的视频区域：一个原生子窗口，子进程 mpv 通过 wid 直接渲染到其中。
+    接口与 MPVWidget 一致（ctx / disable_updates / enable_updates），画面不经过本进程。
+    """
+
+    def __init__(self, player_service, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_NativeWindow)
+        self.setAttribute(Qt.WA_DontCreateNativeAncestors)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setStyleSheet("background: black;")
+        self._service = player_service
+        self.ctx = None
+        if player_service.is_ready():
+            self._attach()
+        # 子进程崩溃重建后 core_ready 会再次发射，需要重新挂上窗口
+        player_service.core_ready.connect(self._attach)
+
+    @Slot()
+    def _attach(self):
+        self.ctx = self._service.get_player_handle()
+        self.ctx['wid'] = int(self.winId())
+
+    def disable_updates(self):
+        pass  # 画面由子进程自己刷新
+
+    def enable_updates(self):
+        pass
@@ -0,0 +1,242 @@
+# mpv_sw_widget.py —— 基于 mpv 'sw' 渲染 API 的软件（CPU）渲染后端
+import ctypes
+import threading
+
+import mpv
+from mpv import MpvRenderContext
+from PySide6.QtCore import QRectF, Qt, Signal
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtWidgets import QWidget
+
+import applog
+
+_log = applog.get_logger("render/sw")
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 只用于可选的数组视图
+    np = None
+
+
+# python-mpv 1.0.x 的 MpvRenderParam 还没有软件渲染参数，按 libmpv/render.h 补上
+class MpvSwSize(ctypes.Structure):
+    _fields_ = [('w', ctypes.c_int), ('h', ctypes.c_int)]
+
+
+class MpvSwStride(ctypes.Structure):
+    _fields_ = [('stride', ctypes.c_size_t)]
+
+
+for _name, _spec in {
+    'sw_size': (17, MpvSwSize),
+    'sw_format': (18, str),
+    'sw_stride': (19, MpvSwStride),
+    'sw_pointer': (20, ctypes.c_void_p),
+}.items():
+    mpv.MpvRenderParam.TYPES.setdefault(_name, _spec)
+
+
+class SwFrameBuffer:
+    """
+    预分配、行跨度按 64 字节对齐的 RGBX 像素缓冲。
+    mpv 直接写入这块内存，QImage 和 NumPy 视图与其零拷贝共享。
+    """
+    ALIGN = 64
+    SW_FORMAT = 'rgb0'  # 字节序 R,G,B,X，对应 QImage.Format_RGBX8888
+
+    def __init__(self, width: int, height: int):
+        self.width = max(1, width)
+        self.height = max(1, height)
+        self.stride = (self.width * 4 + self.ALIGN - 1) // self.ALIGN * self.ALIGN
+        size = self.stride * self.height
+        self._raw = (ctypes.c_ubyte * (size + self.ALIGN))()
+        offset = (-ctypes.addressof(self._raw)) % self.ALIGN
+        self.address = ctypes.addressof(self._raw) + offset
+        self._view = memoryview(self._raw).cast('B')[offset:offset + size]
+        self.image = QImage(self._view, self.width, self.height, self.stride, QImage.Format_RGBX8888)
+
+    def matches(self, width: int, height: int) -> bool:
+        return self.width == width and self.height == height
+
+    def render_params(self) -> dict:
+        return {
+            'sw_size': {'w': self.width, 'h': self.height},
+            'sw_format': self.SW_FORMAT,
+            'sw_stride': {'stride': self.stride},
+            'sw_pointer': self.address,
+        }
+
+    def as_numpy(self):
+        """返回 (height, width, 4) 的 uint8 视图（不拷贝），需要安装 NumPy。"""
+        if np is None:
+            raise RuntimeError("as_numpy() 需要 NumPy")
+        rows = np.frombuffer(self._view, dtype=np.uint8).reshape(self.height, self.stride)
+        return rows[:, :self.width * 4].reshape(self.height, self.width, 4)
+
+
+class SoftwareRenderer:
+    """
+    在独立线程中用 'sw' 渲染上下文把帧画进后缓冲，完成后与前缓冲交换。
+    解码/渲染与 GUI 绘制因此可以重叠；on_frame 在渲染线程被调用。
+    """
+
+    def __init__(self, player, on_frame):
+        self._player = player
+        self._on_frame = on_frame
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._size = (1, 1)
+        self._force = True
+        self._buffers = [SwFrameBuffer(1, 1), SwFrameBuffer(1, 1)]
+        self._front = 0
+        self.ctx = None
+        self.frames_rendered = 0
+
+    def start(self):
+        self.ctx = MpvRenderContext(self._player, 'sw')
+        self.ctx.update_cb = self._wake.set
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mpv-sw-render", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.ctx is None:
+            return
+        self.ctx.update_cb = None
+        self._running = False
+        self._wake.set()
+        self._thread.join()
+        self.ctx.free()
+        self.ctx = None
+
+    def suspend(self):
+        if self.ctx is not None:
+            self.ctx.update_cb = None
+
+    def resume(self):
+        if self.ctx is not None:
+            self.ctx.update_cb = self._wake.set
+            with self._lock:
+                self._force = True
+            self._wake.set()
+
+    def resize(self, width: int, height: int):
+        with self._lock:
+            self._size = (max(1, width), max(1, height))
+            self._force = True
+        self._wake.set()
+
+    def front(self) -> SwFrameBuffer:
+        """GUI 线程调用；返回时持有锁，调用方用完后必须 release()。"""
+        self._lock.acquire()
+        return self._buffers[self._front]
+
+    def release(self):
+        self._lock.release()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if not self._running:
+                return
+            with self._lock:
+                force, self._force = self._force, False
+                width, height = self._size
+            # update() 返回是否有新帧；尺寸变化时即使没有新帧也重画
+            if not self.ctx.update() and not force:
+                continue
+            back_index = 1 - self._front
+            back = self._buffers[back_index]
+            if not back.matches(width, height):
+                back = self._buffers[back_index] = SwFrameBuffer(width, height)
+            self.ctx.render(**back.render_params())
+            # GUI 绘制时持有同一把锁，交换之后旧前缓冲才会被下一帧覆盖
+            with self._lock:
+                self._front = back_index
+            self.frames_rendered += 1
+            self._on_frame()
+
+
+class MPVSoftwareWidget(QWidget):
+    """
+    与 MPVWidget 接口一致的软件渲染控件，不需要 GPU / OpenGL。
+    """
+    frame_ready = Signal()
+
+    def __init__(self, player_service, parent=None):
+        super().__init__(parent)
+        self.player = player_service.get_player_handle()
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.frames_painted = 0
+
+        # frame_ready 从渲染线程发射，排队到 GUI 线程后触发重绘
+        self.frame_ready.connect(self.update)
+        self._service = player_service
+        self._renderer = None
+        self.ctx = None
+        if self.player is None:
+            # lazy 模式：等 mpv 核心创建完成再建渲染上下文
+            player_service.core_ready.connect(self._start_renderer)
+        else:
+            self._start_renderer()
+
+    def _start_renderer(self):
+        self.player = self._service.get_player_handle()
+        self._renderer = SoftwareRenderer(self.player, self.frame_ready.emit)
+        self._renderer.start()
+        self.ctx = self._renderer.ctx
+        dpr = self.devicePixelRatioF()
+        self._renderer.resize(int(self.width() * dpr), int(self.height() * dpr))
+
+    def current_frame(self) -> SwFrameBuffer:
+        """最近一帧的前缓冲（不拷贝）；读取期间渲染线程可能交换缓冲。"""
+        if self._renderer is None:
+            return None
+        buf = self._renderer.front()
+        self._renderer.release()
+        return buf
+
+    def resizeEvent(self, e):
+        if self._renderer is None:
+            return super().resizeEvent(e)
+        dpr = self.devicePixelRatioF()
+        self._renderer.resize(int(self.width() * dpr), int(self.height() * dpr))
+        super().resizeEvent(e)
+
+    def paintEvent(self, e):
+        painter = QPainter(self)
+        if self._renderer is None:
+            painter.fillRect(self.rect(), Qt.black)
+            painter.end()
+            return
+        buf = self._renderer.front()
+        dpr = self.devicePixelRatioF()
+        try:
+            # 缓冲按物理像素分配：目标矩形取它对应的逻辑尺寸，HiDPI 下按 1:1 绘制，不再缩放一次
+            painter.drawImage(QRectF(0, 0, buf.width / dpr, buf.height / dpr), buf.image)
+        finally:
+            self._renderer.release()
+        painter.end()
+        self.frames_painted += 1
+
+    def closeEvent(self, e):
+        if self.ctx:
+            self._renderer.stop()
+            self.ctx = None
+        super().closeEvent(e)
+
+    def disable_updates(self):
+        """
+        取消 update_cb 回调，以防止在播放结束后出现警告。
+        """
+        if self.ctx:
+            _log.debug("Disabling update callback.")
+            self._renderer.suspend()
+
+    def enable_updates(self):
+        """重新挂上 update_cb（开始播放新文件时调用）"""
+        if self.ctx:
+            self._renderer.resume()
@@ -1,67 +1,243 @@
-from mpv import MpvRenderContext, MpvGlGetProcAddressFn
 from PySide6.QtOpenGLWidgets import QOpenGLWidget
-from PySide6.QtGui import QOpenGLContext
+from PySide6.QtCore import QTimer, Signal
+from PySide6.QtGui import QOpenGLContext, QPainter
 from PySide6.QtOpenGL import QOpenGLVersionProfile, QOpenGLDebugLogger, QOpenGLDebugMessage
-from tools.debug_gl import GLDiagnostics
+from tools.debug_gl import DiagLevel, GLDiagnostics
+from tools.frame_timing import FrameTimingRecorder, draw_frame_timing_hud
+from tools.gpu_timer import GpuTimer
+from render_scheduler import RenderScheduler
+import startup_timeline
+import applog
+
+_log = applog.get_logger("render/gl")
+
+# 已解析的 GL 函数地址，按上下文版本/profile 区分。mpv 初始化时会查询数百个符号，
+# 重建渲染上下文或创建多个播放控件时无需再次解析
+_proc_address_cache = {}
+
+
+def _get_proc(_ctx, name):
+    # get_proc 的签名必须是 (ctx, name)；name 为 bytes
+    glctx = QOpenGLContext.currentContext()
+    if glctx is None:
+        return 0
+    fmt = glctx.format()
+    key = (fmt.majorVersion(), fmt.minorVersion(), fmt.profile(), name)
+    address = _proc_address_cache.get(key)
+    if address is None:
+        address = int(glctx.getProcAddress(name.decode('utf-8')))
+        _proc_address_cache[key] = address
+    return address
 
 class MPVWidget(QOpenGLWidget):
-    def __init__(self, player_service, parent=None):
+    # OpenGL 渲染上下文创建失败时发射，调用方可改用 MPVSoftwareWidget
+    gl_init_failed = Signal(str)
+
+    def __init__(self, player_service, parent=None, diag_level: DiagLevel = DiagLevel.OFF):
         self._diag = None
+        self._diag_level = diag_level
         
         super().__init__(parent)
+        # RenderScheduler 判定没有新帧时 paintGL 直接返回，依赖 FBO 保留上一帧
+        # （暂停时的重画、悬浮控件引起的重新合成）。默认的 NoPartialUpdate 下 Qt 合成后可能丢弃 FBO 内容
+        self.setUpdateBehavior(QOpenGLWidget.PartialUpdate)
+        self._service = player_service
         self.player = player_service.get_player_handle()
         self.ctx = None
+        self._gl_ready = False
+        self._first_frame = True
+        self._scheduler = RenderScheduler(self)
+        if self.player is None:
+            player_service.core_ready.connect(self._on_core_ready)
+
+        self._timing = None
+        self._timing_hud = False
+        self._gpu_timer = None
+        self._counter_timer = QTimer(self)
+        self._counter_timer.setInterval(500)
+        self._counter_timer.timeout.connect(self._sample_frame_counters)
 
     def initializeGL(self):
-        # get_proc 的签名必须是 (ctx, name)；name 为 bytes
-        def _get_proc(_ctx, name):
-            glctx = QOpenGLContext.currentContext()
-            address = int(glctx.getProcAddress(name.decode('utf-8'))) if glctx else 0
-            # 打印返回值，验证其是否为有效的非零整数
-            print(f"  -> Returning address: {address}")
-            
-            # 断言检查
-            assert isinstance(name, bytes), "错误：_get_proc 的 name 参数不是 bytes 类型！"
-            if b'gl' in name: # 真正的OpenGL函数地址不应该是0
-                assert address != 0, f"错误：未能找到函数 {name.decode('utf-8')} 的地址！"
-
-            return address
-
-        self.ctx = MpvRenderContext(
-            self.player, 'opengl',
-            opengl_init_params={'get_proc_address': MpvGlGetProcAddressFn(_get_proc)}
-        )
-        # 回调挂在渲染上下文
-        self.ctx.update_cb = self.update
-        self._diag = GLDiagnostics(self.context())
-        self._diag.start()
-        self._diag.check_fbo("after-initializeGL")
+        with startup_timeline.span("GL init"):
+            self._diag = GLDiagnostics(self.context(), self._diag_level)
+            self._diag.start()
+            self._gl_ready = True
+            # lazy 模式下 mpv 核心可能还没建好，届时由 _on_core_ready 补建渲染上下文
+            if self.player is not None:
+                self._create_render_context()
 
-    def paintGL(self):
-        if self._diag:
-            self._diag.check_fbo("before-paint")
+    def _on_core_ready(self):
+        self.player = self._service.get_player_handle()
+        if self._gl_ready and self.ctx is None:
+            self.makeCurrent()
+            try:
+                self._create_render_context()
+            finally:
+                self.doneCurrent()
+            self.update()
 
+    def _create_render_context(self):
+        from mpv import MpvRenderContext, MpvGlGetProcAddressFn
+        try:
+            glctx = self.context()
+            if glctx is None or not glctx.isValid():
+                raise RuntimeError("QOpenGLContext 无效")
+            # 保存回调对象的引用，避免被回收后 mpv 调用悬空指针
+            self._get_proc_fn = MpvGlGetProcAddressFn(_get_proc)
+            self.ctx = MpvRenderContext(
+                self.player, 'opengl',
+                opengl_init_params={'get_proc_address': self._get_proc_fn}
+            )
+        except Exception as e:
+            _log.error("OpenGL 渲染初始化失败：%r", e)
+            self.ctx = None
+            self.gl_init_failed.emit(str(e))
+            return
+        # 回调挂在渲染上下文，由调度器转到 GUI 线程并合并
+        self._scheduler.attach(self.ctx)
+        if self._diag_level != DiagLevel.OFF:
+            self._diag.check_fbo("after-initializeGL")
+
+    def paintGL(self):
         if not self.ctx:
             return
+        # mpv 没有新帧时不渲染，FBO 中保留的上一帧会被直接合成
+        if not self._scheduler.begin_frame():
+            return
         dpr = self.devicePixelRatioF()  # Qt6 推荐
         w, h = int(self.width()*dpr), int(self.height()*dpr)
         fbo = int(self.defaultFramebufferObject())
-        # 打印这些数值，以便观察
-        print(f"paintGL: fbo={fbo}, width={w}, height={h}, dpr={dpr}")
-        
-        # 断言（Assert）是一种更严格的检查，如果条件不满足，程序会直接报错退出
-        # 在窗口可见时，这些值应该是正数
+
+        # 在窗口可见时，这些值应该是正数（python -O 下不产生开销）
         if self.isVisible():
             assert fbo > 0, "错误：Framebuffer ID (fbo) 无效！"
             assert w > 0 and h > 0, "错误：画布尺寸 (width/height) 无效！"
-        # --- 结束调试代码 ---
+
+        timing = self._timing
+        gpu = self._gpu_timer
+        if timing is None:
+            if gpu is not None:
+                gpu.begin()
+            self.ctx.render(opengl_fbo={'fbo': fbo, 'w': w, 'h': h}, flip_y=True)
+            if gpu is not None:
+                gpu.end()
+            self._scheduler.end_frame()
+            self._diag.on_frame()
+            if self._first_frame:
+                self._on_first_frame()
+            return
+
+        timing.begin_frame()
+        if gpu is not None:
+            gpu.begin()
         self.ctx.render(opengl_fbo={'fbo': fbo, 'w': w, 'h': h}, flip_y=True)
-        if self._diag:
-            self._diag.check_fbo("after-paint")
+        if gpu is not None:
+            gpu.end()
+        timing.end_frame()
+        self._scheduler.end_frame()
+        self._diag.on_frame()
+        if self._first_frame:
+            self._on_first_frame()
+        if self._timing_hud:
+            painter = QPainter(self)
+            draw_frame_timing_hud(painter, timing)
+            painter.end()
+
+    def _on_first_frame(self):
+        self._first_frame = False
+        startup_timeline.mark("first paint")
+        startup_timeline.report_once()
+
+    def resizeGL(self, w, h):
+        # QOpenGLWidget 在尺寸变化时会重建 FBO，必须重新渲染
+        self._scheduler.force_render()
+
+    # --- 帧时序统计（默认关闭，关闭时不产生任何每帧开销） ---
+    def enable_frame_timing(self, hud: bool = True, capacity: int = 600):
+        if self._timing is None:
+            self._timing = FrameTimingRecorder(capacity)
+            self.frameSwapped.connect(self._timing.on_present)
+            self._counter_timer.start()
+        self._timing_hud = hud
+        self._scheduler.force_render()
+
+    def disable_frame_timing(self):
+        if self._timing is not None:
+            self._counter_timer.stop()
+            self.frameSwapped.disconnect(self._timing.on_present)
+            self._timing = None
+        self._timing_hud = False
+        self._scheduler.force_render()
+
+    def frame_timing(self):
+        """返回当前的 FrameTimingRecorder；未启用时为 None"""
+        return self._timing
+
+    def dump_frame_timing(self, path: str) -> bool:
+        if self._timing is None:
+            return False
+        self._timing.dump_json(path)
+        return True
+
+    def _sample_frame_counters(self):
+        # 低频读取 mpv 的丢帧计数，避免在 paintGL 中同步查询属性
+        if self._timing is not None:
+            self._timing.update_counters(
+                self.player.frame_drop_count, self.player.vo_delayed_frame_count)
+
+    # --- GPU 耗时（默认关闭） ---
+    def enable_gpu_timing(self):
+        """用计时查询统计每次 ctx.render 的 GPU 耗时；结果晚几帧取回，不会让 CPU 等待 GPU。"""
+        if self._gpu_timer is None:
+            self._gpu_timer = GpuTimer()
+
+    def disable_gpu_timing(self):
+        if self._gpu_timer is not None:
+            self.makeCurrent()
+            try:
+                self._gpu_timer.destroy()
+            finally:
+                self.doneCurrent()
+            self._gpu_timer = None
+
+    def gpu_timing(self):
+        """返回 GpuTimeStats；未启用时为 None"""
+        return self._gpu_timer.stats() if self._gpu_timer is not None else None
+
+    # --- GL 诊断 ---
+    def set_gl_diagnostics_level(self, level: DiagLevel):
+        """运行时切换诊断级别；日志器需要在本控件的上下文中启停。"""
+        self._diag_level = DiagLevel(level)
+        if self._diag is None:
+            return
+        self.makeCurrent()
+        try:
+            self._diag.set_level(self._diag_level)
+        finally:
+            self.doneCurrent()
+
+    def gl_diagnostics_level(self) -> DiagLevel:
+        return self._diag_level
+
+    def gl_diagnostics(self):
+        return self._diag
+
+    def render_stats(self):
+        """
+        返回渲染调度统计（回调/合并/实际渲染次数）。paintGL 调用次数为 renders + skipped，
+        skipped 即没有新帧、只重新合成上一帧的次数（例如悬浮控件重画时）。
+        """
+        return self._scheduler.stats()
 
     def closeEvent(self, e):
         if self.ctx:
+            self._scheduler.detach()
+            # OpenGL 渲染上下文必须在其 GL 上下文为当前时释放
+            self.makeCurrent()
             self.ctx.free()
+            if self._gpu_timer is not None:
+                self._gpu_timer.destroy()
+            self.doneCurrent()
             self.ctx = None
         super().closeEvent(e)
 
@@ -70,5 +246,10 @@ class MPVWidget(QOpenGLWidget):
             取消 update_cb 回调，以防止在播放结束后出现警告。
             """
             if self.ctx:
-                print("MPVWidget: Disabling update callback.")
-                self.ctx.update_cb = None
\ No newline at end of file
+                _log.debug("Disabling update callback.")
+                self._scheduler.suspend()
+
+    def enable_updates(self):
+        """重新挂上 update_cb（开始播放新文件时调用）"""
+        if self.ctx:
+            self._scheduler.resume()
@@ -0,0 +1,319 @@
+# playback_metrics.py —— 定时采样 mpv 性能属性到定长环形缓冲，提供进程内接口与可选的本机 HTTP 端点
+import json
+import math
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PySide6.QtCore import QObject, QTimer, Slot
+
+import applog
+
+_log = applog.get_logger("metrics")
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    prop: str      # mpv 属性名
+    name: str      # 导出名（Prometheus 指标名去掉前缀）
+    kind: str      # 'gauge' / 'counter'
+    help: str
+
+
+# 数值属性；hwdec-current 是字符串，单独记录
+METRICS = (
+    MetricSpec('estimated-vf-fps', 'estimated_vf_fps', 'gauge', "视频滤镜输出的估计帧率"),
+    MetricSpec('frame-drop-count', 'frame_drops_total', 'counter', "视频输出丢弃的帧数（每个文件从零开始）"),
+    MetricSpec('decoder-frame-drop-count', 'decoder_frame_drops_total', 'counter', "解码器丢弃的帧数（每个文件从零开始）"),
+    MetricSpec('demuxer-cache-duration', 'demuxer_cache_seconds', 'gauge', "解复用缓存中可播放的秒数"),
+    MetricSpec('cache-speed', 'cache_speed_bytes_per_second', 'gauge', "缓存填充速度"),
+    MetricSpec('avsync', 'avsync_seconds', 'gauge', "音视频同步偏差（音频 - 视频）"),
+)
+HWDEC_PROP = 'hwdec-current'
+PROMETHEUS_PREFIX = 'myplayer_'
+
+
+class RingBuffer:
+    """定长 float 环形缓冲；写满后覆盖最旧的值。缺失值以 NaN 记录。"""
+
+    def __init__(self, capacity: int):
+        self._data = array('d', bytes(8 * capacity))
+        self._capacity = capacity
+        self._next = 0
+        self._count = 0
+
+    def append(self, value: float):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def last(self) -> float:
+        return self._data[self._next - 1] if self._count else math.nan
+
+    def values(self) -> list:
+        """按时间先后返回缓冲中的全部值。"""
+        if self._count < self._capacity:
+            return self._data[:self._count].tolist()
+        return self._data[self._next:].tolist() + self._data[:self._next].tolist()
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+
+def _to_float(value) -> float:
+    if value is None or isinstance(value, (str, bytes)):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _summary(values: list) -> dict:
+    finite = [v for v in values if not math.isnan(v)]
+    if not finite:
+        return {'min': None, 'avg': None, 'max': None}
+    return {'min': min(finite), 'avg': sum(finite) / len(finite), 'max': max(finite)}
+
+
+@dataclass
+class SamplerStats:
+    samples: int = 0
+    last_cost_s: float = 0.0    # 最近一次采样在 GUI 线程上的耗时
+    max_cost_s: float = 0.0
+    total_cost_s: float = 0.0
+
+    @property
+    def avg_cost_s(self) -> float:
+        return self.total_cost_s / self.samples if self.samples else 0.0
+
+
+class MetricsSampler(QObject):
+    """
+    每 interval_ms 在 GUI 线程读一次 METRICS 与 hwdec-current，写入各自的环形缓冲
+    （capacity 个样本，默认 1 Hz 下保存 10 分钟）。
+
+    采样只由定时器驱动，与帧率无关，不观察会逐帧变化的属性（avsync、estimated-vf-fps），
+    每次采样的工作量固定为 7 次属性读取：
+    - inprocess 后端直接读 libmpv 属性，每次几微秒；
+    - ipc 后端用 get_property_async 随同一批请求发出，回复到达时写入，不做同步往返。
+      上一轮还有未回复的请求时跳过本轮，子进程卡住时请求不会堆积。
+
+    snapshot() / series() / to_json() / to_prometheus() 可在任意线程调用（HTTP 端点线程），
+    与采样之间只用一把锁保护，导出时复制数据后再格式化。
+    """
+
+    def __init__(self, service, interval_ms: int = 1000, capacity: int = 600, parent=None):
+        super().__init__(parent or service)
+        self._service = service
+        self._lock = threading.Lock()
+        self._timestamps = RingBuffer(capacity)
+        self._buffers = {spec.name: RingBuffer(capacity) for spec in METRICS}
+        self._hwdec_active = RingBuffer(capacity)
+        self._hwdec = None
+        self._pending = 0
+        self._interval_ms = interval_ms
+        self.stats = SamplerStats()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.sample)
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def interval_ms(self) -> int:
+        return self._interval_ms
+
+    def set_interval(self, interval_ms: int):
+        self._interval_ms = interval_ms
+        self._timer.setInterval(interval_ms)
+
+    def reset(self):
+        with self._lock:
+            self._timestamps.clear()
+            for buffer in self._buffers.values():
+                buffer.clear()
+            self._hwdec_active.clear()
+            self.stats = SamplerStats()
+
+    # --- 采样 ---
+
+    @Slot()
+    def sample(self):
+        player = self._service.get_player_handle()
+        if player is None:
+            return  # lazy 模式下核心尚未创建
+        started = time.perf_counter()
+        if self._service.backend() == 'ipc':
+            if not self._sample_async(player):
+                return
+        else:
+            # python-mpv 读取不可用的属性返回 None，未知属性抛 AttributeError（例如旧版 libmpv）
+            values = {prop: getattr(player, prop.replace('-', '_'), None)
+                      for prop in [spec.prop for spec in METRICS] + [HWDEC_PROP]}
+            self._record(time.time(), values)
+        cost = time.perf_counter() - started
+        stats = self.stats
+        stats.samples += 1
+        stats.last_cost_s = cost
+        stats.total_cost_s += cost
+        stats.max_cost_s = max(stats.max_cost_s, cost)
+
+    def _sample_async(self, player) -> bool:
+        if self._pending:
+            return False
+        props = [spec.prop for spec in METRICS] + [HWDEC_PROP]
+        values = {}
+        timestamp = time.time()
+        self._pending = len(props)
+
+        def on_reply(prop, error, value):
+            values[prop] = None if error is not None else value
+            self._pending -= 1
+            if not self._pending:
+                self._record(timestamp, values)
+
+        for prop in props:
+            player.get_property_async(prop, lambda error, value, prop=prop: on_reply(prop, error, value))
+        return True
+
+    def _record(self, timestamp: float, values: dict):
+        hwdec = values.get(HWDEC_PROP)
+        hwdec = None if hwdec in (None, '') else str(hwdec)
+        with self._lock:
+            self._timestamps.append(timestamp)
+            for spec in METRICS:
+                self._buffers[spec.name].append(_to_float(values.get(spec.prop)))
+            self._hwdec = hwdec
+            self._hwdec_active.append(0.0 if hwdec in (None, 'no') else 1.0)
+
+    # --- 读取 ---
+
+    def snapshot(self) -> dict:
+        """最近一次样本：{指标名: 值}，不可用的属性为 None；另含 hwdec 与采样开销。"""
+        with self._lock:
+            latest = {name: buffer.last() for name, buffer in self._buffers.items()}
+            timestamp = self._timestamps.last()
+            hwdec = self._hwdec
+        result = {name: (None if math.isnan(v) else v) for name, v in latest.items()}
+        result['hwdec'] = hwdec
+        result['timestamp'] = None if math.isnan(timestamp) else timestamp
+        result['backend'] = self._service.backend()
+        result['sampler'] = {'samples': self.stats.samples, 'interval_ms': self.interval_ms(),
+                             'last_cost_ms': self.stats.last_cost_s * 1000,
+                             'avg_cost_ms': self.stats.avg_cost_s * 1000,
+                             'max_cost_ms': self.stats.max_cost_s * 1000}
+        return result
+
+    def series(self, name: str = None) -> dict:
+        """环形缓冲中的全部样本：{'timestamps': [...], 指标名: [...]}；缺失值为 None。"""
+        with self._lock:
+            data = {'timestamps': self._timestamps.values()}
+            for key, buffer in self._buffers.items():
+                if name is None or key == name:
+                    data[key] = buffer.values()
+            if name is None or name == 'hwdec_active':
+                data['hwdec_active'] = self._hwdec_active.values()
+        return {key: [None if math.isnan(v) else v for v in values] for key, values in data.items()}
+
+    def to_json(self, include_series: bool = False) -> str:
+        with self._lock:
+            windows = {name: buffer.values() for name, buffer in self._buffers.items()}
+        data = self.snapshot()
+        data['window'] = {name: _summary(values) for name, values in windows.items()}
+        if include_series:
+            data['series'] = self.series()
+        return json.dumps(data, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）。尚无数据或属性不可用的指标不输出样本行。"""
+        snap = self.snapshot()
+        backend = snap['backend']
+        lines = []
+        for spec in METRICS:
+            metric = PROMETHEUS_PREFIX + spec.name
+            lines.append(f"# HELP {metric} {spec.help}")
+            lines.append(f"# TYPE {metric} {spec.kind}")
+            value = snap[spec.name]
+            if value is not None:
+                lines.append(f'{metric}{{backend="{backend}"}} {value!r}')
+        metric = PROMETHEUS_PREFIX + 'hwdec_info'
+        lines.append(f"# HELP {metric} 当前使用的硬件解码 API（no 表示软件解码）")
+        lines.append(f"# TYPE {metric} gauge")
+        if snap['hwdec'] is not None:
+            hwdec = snap['hwdec'].replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{metric}{{backend="{backend}",hwdec="{hwdec}"}} 1')
+        sampler = snap['sampler']
+        metric = PROMETHEUS_PREFIX + 'metrics_samples_total'
+        lines.append(f"# HELP {metric} 已完成的采样次数")
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {sampler['samples']}")
+        metric = PROMETHEUS_PREFIX + 'metrics_sample_cost_seconds'
+        lines.append(f"# HELP {metric} 最近一次采样在 GUI 线程上的耗时")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {sampler['last_cost_ms'] / 1000!r}")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    sampler: MetricsSampler = None
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path == '/metrics':
+            body, content_type = self.sampler.to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/metrics.json':
+            body = self.sampler.to_json(include_series='series=1' in query.split('&'))
+            content_type = 'application/json; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        _log.debug("%s - %s", self.address_string(), format % args)
+
+
+class MetricsServer:
+    """
+    在守护线程中提供 GET /metrics（Prometheus 文本）和 /metrics.json（?series=1 附带环形缓冲）。
+    只绑定回环地址；导出内容在请求线程里格式化，不占用 GUI 线程。
+    """
+
+    def __init__(self, sampler: MetricsSampler, port: int = 9464, host: str = '127.0.0.1'):
+        handler = type('MetricsHandler', (_MetricsHandler,), {'sampler': sampler})
+        self._httpd = ThreadingHTTPServer((host, port), handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        _log.info("指标端点：http://%s:%d/metrics", *self._httpd.server_address[:2])
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
@@ -0,0 +1,111 @@
+# playlist.py —— 播放队列（顺序 / 随机 / 循环），不依赖 mpv
+import random
+from enum import IntEnum
+
+
+class RepeatMode(IntEnum):
+    OFF = 0  # 播完最后一项停止
+    ONE = 1  # 单曲循环
+    ALL = 2  # 列表循环
+
+
+class Playlist:
+    """
+    保存条目列表与播放顺序。随机模式下 _order 是条目下标的一个排列，
+    _pos 指向 _order 中的当前位置；顺序模式下 _order 就是 0..n-1。
+    """
+
+    def __init__(self, seed=None):
+        self.items = []
+        self._order = []
+        self._pos = -1
+        self.shuffle = False
+        self.repeat = RepeatMode.OFF
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return len(self.items)
+
+    def set_items(self, items, start: int = 0):
+        self.items = list(items)
+        self._order = list(range(len(self.items)))
+        self._pos = -1
+        if self.shuffle:
+            self._shuffle_keeping(start)
+            self._pos = 0
+        elif self.items:
+            self._pos = max(0, min(start, len(self.items) - 1))
+
+    def extend(self, items):
+        first = len(self.items)
+        self.items.extend(items)
+        new = list(range(first, len(self.items)))
+        if self.shuffle:
+            # 新条目随机插入到尚未播放的部分
+            for idx in new:
+                self._order.insert(self._rng.randint(self._pos + 1, len(self._order)), idx)
+        else:
+            self._order.extend(new)
+        if self._pos < 0 and self.items:
+            self._pos = 0
+
+    def clear(self):
+        self.set_items([])
+
+    @property
+    def current_index(self):
+        return self._order[self._pos] if 0 <= self._pos < len(self._order) else None
+
+    @property
+    def current(self):
+        idx = self.current_index
+        return None if idx is None else self.items[idx]
+
+    def set_shuffle(self, enabled: bool):
+        if enabled == self.shuffle:
+            return
+        self.shuffle = enabled
+        current = self.current_index
+        if enabled:
+            self._shuffle_keeping(current if current is not None else 0)
+            self._pos = 0 if self.items else -1
+        else:
+            self._order = list(range(len(self.items)))
+            self._pos = -1 if current is None else current
+
+    def _shuffle_keeping(self, first: int):
+        rest = [i for i in range(len(self.items)) if i != first]
+        self._rng.shuffle(rest)
+        self._order = ([first] if self.items else []) + rest
+
+    def _step(self, delta: int):
+        if not self._order:
+            return None
+        pos = self._pos + delta
+        if 0 <= pos < len(self._order):
+            return pos
+        if self.repeat == RepeatMode.ALL:
+            return pos % len(self._order)
+        return None
+
+    def peek_next(self):
+        """下一项的条目下标（用于预加载），没有则为 None。单曲循环由 mpv 的 loop-file 处理。"""
+        pos = self._step(1)
+        return None if pos is None else self._order[pos]
+
+    def advance(self):
+        pos = self._step(1)
+        if pos is not None:
+            self._pos = pos
+        return None if pos is None else self._order[pos]
+
+    def previous(self):
+        pos = self._step(-1)
+        if pos is not None:
+            self._pos = pos
+        return None if pos is None else self._order[pos]
+
+    def jump(self, index: int):
+        """跳到指定条目下标。"""
+        self._pos = self._order.index(index)
+        return index
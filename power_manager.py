@@ -0,0 +1,238 @@
+# power_manager.py —— 按窗口可见性与播放状态暂停渲染、切换纯音频解码，并统计各状态的 CPU 时间
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+from PySide6.QtCore import QEvent, QObject, QTimer, Qt, Slot
+
+import applog
+
+_log = applog.get_logger("power")
+
+
+def _child_cpu_seconds(pid: int) -> float:
+    """子进程（ipc 后端的 mpv）已消耗的 CPU 时间；无法读取时返回 0。"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+            if not handle:
+                return 0.0
+            try:
+                times = [wintypes.FILETIME() for _ in range(4)]
+                if not kernel32.GetProcessTimes(handle, *(ctypes.byref(t) for t in times)):
+                    return 0.0
+                kernel, user = times[2], times[3]
+                return ((kernel.dwHighDateTime << 32 | kernel.dwLowDateTime)
+                        + (user.dwHighDateTime << 32 | user.dwLowDateTime)) / 1e7
+            finally:
+                kernel32.CloseHandle(handle)
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rpartition(')')[2].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+@dataclass
+class StateUsage:
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+
+    @property
+    def cpu_percent(self) -> float:
+        """占用一个核心的百分比。"""
+        return 100.0 * self.cpu_s / self.wall_s if self.wall_s > 0 else 0.0
+
+
+class PowerManager(QObject):
+    """
+    监视窗口是否最小化 / 隐藏 / 未暴露、视频控件是否可见（例如在未选中的标签页里），
+    以及是否在播放：
+
+    - 视频看不见时立即暂停渲染（disable_updates），重新可见时 enable_updates，
+      渲染上下文强制重画当前帧，恢复是即时的；
+    - 视频看不见且在播放有音轨的文件超过 AUDIO_ONLY_DELAY 秒时，切换为 vid=no 只解码音频；
+      重新可见时立即恢复视频轨，mpv 重新解码当前位置的一帧。短暂切走不会触发解码器重建；
+    - 暂停时不切换解码（暂停本来就不解码），只暂停看不见的渲染。
+
+    每个状态累计墙钟时间和进程 CPU 时间（ipc 后端再加上子进程），report() 给出各状态的
+    CPU 占用，用于在长时间测试中核对节省效果；enforce=False 时只统计不干预，作为对照。完全被其他窗口遮挡依赖平台的 expose 事件，
+    Windows 上只有最小化和隐藏能可靠检测。
+    """
+    AUDIO_ONLY_DELAY = 3.0
+
+    STATES = ('visible_playing', 'visible_paused', 'hidden_playing', 'audio_only', 'hidden_paused')
+
+    def __init__(self, window, video_widget, service, parent=None, enforce: bool = True):
+        super().__init__(parent or window)
+        self._enforce = enforce
+        self._window = window
+        self._widget = None
+        self._service = service
+        self._playing = False
+        self._visible = True
+        self._rendering = True
+        self._usage = {name: StateUsage() for name in self.STATES}
+        self._state = None
+        self._mark_wall = time.monotonic()
+        self._mark_cpu = self._cpu_seconds()
+
+        self._audio_only_timer = QTimer(self)
+        self._audio_only_timer.setSingleShot(True)
+        self._audio_only_timer.setInterval(int(self.AUDIO_ONLY_DELAY * 1000))
+        self._audio_only_timer.timeout.connect(self._enter_audio_only)
+        # 多个事件（Hide + WindowStateChange + Expose）常常连续到来，合并到下一轮事件循环再判断
+        self._evaluate_timer = QTimer(self)
+        self._evaluate_timer.setSingleShot(True)
+        self._evaluate_timer.setInterval(0)
+        self._evaluate_timer.timeout.connect(self._evaluate)
+
+        window.installEventFilter(self)
+        self._watched_handle = None
+        self._watch_window_handle()
+        self.set_video_widget(video_widget)
+        service.playback_state_changed.connect(self._on_playback_state)
+        service.playback_finished.connect(lambda: self._on_playback_state(False))
+        # 切换条目时窗口会无条件 enable_updates；排队到其后，看不见时重新暂停
+        service.current_item_changed.connect(self._reapply_rendering, Qt.QueuedConnection)
+        self._enter_state(self._current_state())
+
+    def set_video_widget(self, widget):
+        """渲染后端替换控件时（例如 OpenGL 回退到软件渲染）调用。"""
+        if self._widget is not None:
+            self._widget.removeEventFilter(self)
+        self._widget = widget
+        widget.installEventFilter(self)
+        self._rendering = True
+        self._schedule_evaluate()
+
+    # --- 事件 ---
+
+    def _watch_window_handle(self):
+        handle = self._window.windowHandle()
+        if handle is None or handle is self._watched_handle:
+            return
+        # QWindow 才会收到 Expose：窗口被完全遮挡或最小化时 isExposed() 为 False
+        handle.installEventFilter(self)
+        self._watched_handle = handle
+
+    def eventFilter(self, obj, event):
+        kind = event.type()
+        if kind in (QEvent.Show, QEvent.Hide, QEvent.WindowStateChange, QEvent.Expose):
+            if kind == QEvent.Show:
+                self._watch_window_handle()
+            self._schedule_evaluate()
+        return False
+
+    def _schedule_evaluate(self):
+        if not self._evaluate_timer.isActive():
+            self._evaluate_timer.start()
+
+    @Slot(bool)
+    def _on_playback_state(self, playing: bool):
+        self._playing = playing
+        self._schedule_evaluate()
+
+    @Slot()
+    def _reapply_rendering(self):
+        if not self._rendering and self._widget is not None:
+            self._widget.disable_updates()
+
+    def _video_visible(self) -> bool:
+        window = self._window
+        if not window.isVisible() or window.windowState() & Qt.WindowMinimized:
+            return False
+        handle = window.windowHandle()
+        if handle is not None and not handle.isExposed():
+            return False
+        widget = self._widget
+        return widget is not None and widget.isVisible() and not widget.visibleRegion().isEmpty()
+
+    # --- 决策 ---
+
+    @Slot()
+    def _evaluate(self):
+        visible = self._video_visible()
+        self._visible = visible
+        if not self._enforce:
+            self._enter_state(self._current_state())
+            return
+        if visible != self._rendering:
+            self._rendering = visible
+            if visible:
+                self._widget.enable_updates()
+            else:
+                self._widget.disable_updates()
+            _log.debug("渲染%s", "恢复" if visible else "暂停（视频不可见）")
+
+        if visible or not self._playing:
+            self._audio_only_timer.stop()
+            if visible and not self._service.video_decoding():
+                self._service.set_video_decoding(True)
+                _log.info("视频重新可见，恢复视频解码")
+        elif self._service.video_decoding() and not self._audio_only_timer.isActive():
+            self._audio_only_timer.start()
+        self._enter_state(self._current_state())
+
+    @Slot()
+    def _enter_audio_only(self):
+        if self._visible or not self._playing or not self._service.has_audio():
+            return
+        self._service.set_video_decoding(False)
+        _log.info("视频不可见 %.0f 秒，切换为纯音频解码", self.AUDIO_ONLY_DELAY)
+        self._enter_state(self._current_state())
+
+    def _current_state(self) -> str:
+        if self._visible:
+            return 'visible_playing' if self._playing else 'visible_paused'
+        if not self._playing:
+            return 'hidden_paused'
+        return 'hidden_playing' if self._service.video_decoding() else 'audio_only'
+
+    # --- CPU 统计 ---
+
+    def _cpu_seconds(self) -> float:
+        cpu = time.process_time()
+        player = self._service.get_player_handle()
+        process_id = getattr(type(player), 'process_id', None)
+        if process_id is not None:
+            cpu += _child_cpu_seconds(player.process_id())
+        return cpu
+
+    def _close_segment(self):
+        now, cpu = time.monotonic(), self._cpu_seconds()
+        if self._state is not None:
+            usage = self._usage[self._state]
+            usage.wall_s += now - self._mark_wall
+            usage.cpu_s += max(0.0, cpu - self._mark_cpu)
+        self._mark_wall, self._mark_cpu = now, cpu
+
+    def _enter_state(self, state: str):
+        if state == self._state:
+            return
+        self._close_segment()
+        self._state = state
+
+    def state(self) -> str:
+        return self._state
+
+    def report(self) -> dict:
+        """各状态累计的墙钟时间、CPU 时间和 CPU 占用（%，以单核计）。"""
+        self._close_segment()
+        return {name: {'wall_s': u.wall_s, 'cpu_s': u.cpu_s, 'cpu_percent': u.cpu_percent}
+                for name, u in self._usage.items() if u.wall_s > 0}
+
+    def format_report(self) -> str:
+        lines = [f"{'状态':<16}{'时长 s':>10}{'CPU s':>10}{'CPU %':>8}"]
+        for name, r in self.report().items():
+            lines.append(f"{name:<16}{r['wall_s']:>10.1f}{r['cpu_s']:>10.2f}{r['cpu_percent']:>8.1f}")
+        return "\n".join(lines)
+
+    def reset_report(self):
+        self._close_segment()
+        self._usage = {name: StateUsage() for name in self.STATES}
@@ -0,0 +1,72 @@
+# proxies/cache.py —— 代理文件的磁盘缓存（按源文件指纹命名，按大小 LRU 淘汰）
+import os
+import threading
+import time
+
+from app_paths import cache_dir
+
+# 编码参数变化时递增，旧代理自然被淘汰
+CACHE_VERSION = 1
+
+
+class ProxyCache:
+    """
+    每个源文件一个代理：v<版本>_<指纹>_<高度>p.mp4，生成中的文件带 .part 后缀。
+    使用时更新 mtime 作为 LRU 时间，总大小超过上限时删除最久未用的代理。
+    """
+
+    def __init__(self, root: str = None, limit_bytes: int = 20 * 1024 ** 3):
+        self.root = root or cache_dir("proxies")
+        self.limit_bytes = limit_bytes
+        self._lock = threading.Lock()
+        self._total = None  # 第一次淘汰时统计
+
+    def proxy_path(self, key: str, height: int) -> str:
+        return os.path.join(self.root, f"v{CACHE_VERSION}_{key}_{height}p.mp4")
+
+    def lookup(self, key: str, height: int):
+        """已生成时返回代理路径并记为最近使用，否则 None。"""
+        path = self.proxy_path(key, height)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def added(self, nbytes: int):
+        """新写入 nbytes 后调用；超过上限时淘汰。"""
+        with self._lock:
+            if self._total is not None:
+                self._total += nbytes
+            if self._total is None or self._total > self.limit_bytes:
+                self._evict()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_file():
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(e[1] for e in entries)
+        # 最近一分钟内用过或仍在写入的文件（正在播放 / 生成的代理）不删
+        recent = time.time() - 60
+        for used, size, path in entries:
+            if total <= self.limit_bytes:
+                break
+            if used >= recent:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Windows 上正在播放的文件删不掉
+            total -= size
+        self._total = total
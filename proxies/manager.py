@@ -0,0 +1,301 @@
+# proxies/manager.py —— 后台代理生成队列，以及拖动 / 播放 / 暂停时在代理与原片之间切换
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from enum import Enum
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+import applog
+from library.probe import probe_file
+from proxies.cache import ProxyCache
+from proxies.worker import transcode_proxy
+from thumbnails.cache import file_fingerprint
+
+_log = applog.get_logger("proxies")
+
+
+@dataclass
+class ProxyJob:
+    source: str
+    key: str = None          # 源文件指纹；checking 时还没有算出来
+    state: str = 'queued'    # checking / queued / running / ready / failed / cancelled
+    progress: float = 0.0
+    proxy: str = None
+    error: str = None
+
+
+class ProxyManager(QObject):
+    """
+    代理生成队列。同时运行的 ffmpeg 进程不超过 workers 个，每个以低优先级运行；
+    工作线程只负责启动 ffmpeg 并读取它的进度输出。
+
+    jobs() / job() 给出每个文件的状态和进度，job_changed 在状态或进度（每 1%）变化时发射，
+    界面据此显示哪些文件的代理已就绪。
+    """
+    job_changed = Signal(str)        # 源文件路径
+    proxy_ready = Signal(str, str)   # 源文件路径, 代理路径
+    _job_update = Signal(str, str, float, object)  # 源文件, 状态, 进度, 代理路径或错误（工作线程发射）
+    _checked = Signal(str, object, object)          # 源文件, 指纹（非本地文件为 None）, 已有的代理（查询线程发射）
+
+    PROXY_HEIGHT = 540
+    GOP = 12
+
+    def __init__(self, workers: int = 1, cache: ProxyCache = None,
+                 ffmpeg: str = 'ffmpeg', ffprobe: str = 'ffprobe', parent=None):
+        super().__init__(parent)
+        self._workers = max(1, workers)
+        self._cache = cache or ProxyCache()
+        self._ffmpeg = ffmpeg
+        self._ffprobe = ffprobe
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="proxy")
+        # 指纹要读源文件首尾，NAS 上可能很慢：放在单独的线程，不占用转码线程，也不阻塞 GUI
+        self._checker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="proxy-check")
+        self._jobs = {}        # 源文件 -> ProxyJob
+        self._queue = deque()  # 等待中的源文件
+        self._cancel = {}      # 运行中的源文件 -> threading.Event
+        self._urgent = set()   # 检查完成后要排到队首的源文件
+        self._job_update.connect(self._on_job_update)
+        self._checked.connect(self._on_checked)
+
+    # --- 查询 ---
+
+    def job(self, source: str):
+        job = self._jobs.get(source)
+        return replace(job) if job is not None else None
+
+    def jobs(self) -> list:
+        return [replace(job) for job in self._jobs.values()]
+
+    def queue_state(self) -> dict:
+        """各状态的任务数，例如 {'queued': 3, 'running': 1, 'ready': 5}。"""
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
+
+    def proxy_for(self, source: str):
+        """代理已就绪时返回路径（并记为最近使用），否则 None。"""
+        job = self._jobs.get(source)
+        if job is None or job.state != 'ready':
+            return None
+        if self._cache.lookup(job.key, self.PROXY_HEIGHT) is None:
+            del self._jobs[source]  # 已被淘汰
+            self.job_changed.emit(source)
+            return None
+        return job.proxy
+
+    # --- 排队 ---
+
+    def request(self, source: str, urgent: bool = False):
+        """
+        为源文件排队生成代理。urgent 时排到队首（例如正在播放的文件）。
+        先在后台线程计算指纹、查缓存（状态为 checking），已有代理时随后发射 proxy_ready；
+        网络流等非本地文件不生成代理，检查后移除任务。
+        """
+        job = self._jobs.get(source)
+        if job is not None and job.state in ('checking', 'queued', 'running', 'ready'):
+            if urgent and job.state == 'checking':
+                self._urgent.add(source)
+            elif urgent and job.state == 'queued':
+                self._queue.remove(source)
+                self._queue.appendleft(source)
+            return replace(job)
+        job = self._jobs[source] = ProxyJob(source, state='checking')
+        if urgent:
+            self._urgent.add(source)
+        self._checker.submit(self._check, source)
+        self.job_changed.emit(source)
+        return replace(job)
+
+    def cancel(self, source: str):
+        job = self._jobs.get(source)
+        if job is None:
+            return
+        if job.state in ('checking', 'queued'):
+            if job.state == 'queued':
+                self._queue.remove(source)
+            self._urgent.discard(source)
+            job.state = 'cancelled'
+            self.job_changed.emit(source)
+        elif job.state == 'running':
+            self._cancel[source].set()  # 工作线程终止 ffmpeg 后报告 cancelled
+
+    def _schedule(self):
+        while self._queue and len(self._cancel) < self._workers:
+            source = self._queue.popleft()
+            job = self._jobs[source]
+            job.state = 'running'
+            cancel = self._cancel[source] = threading.Event()
+            out = self._cache.proxy_path(job.key, self.PROXY_HEIGHT)
+            self._pool.submit(self._run, source, out, cancel)
+            self.job_changed.emit(source)
+
+    @Slot(str, object, object)
+    def _on_checked(self, source: str, key, cached):
+        job = self._jobs.get(source)
+        if job is None or job.state != 'checking':
+            return  # 检查期间被取消
+        urgent = source in self._urgent
+        self._urgent.discard(source)
+        if key is None:
+            del self._jobs[source]
+            self.job_changed.emit(source)
+            return
+        job.key = key
+        if cached is not None:
+            job.state, job.progress, job.proxy = 'ready', 1.0, cached
+            self.job_changed.emit(source)
+            self.proxy_ready.emit(source, cached)
+            return
+        job.state = 'queued'
+        if urgent:
+            self._queue.appendleft(source)
+        else:
+            self._queue.append(source)
+        self.job_changed.emit(source)
+        self._schedule()
+
+    # --- 工作线程 ---
+
+    def _check(self, source: str):
+        try:
+            if not os.path.isfile(source):
+                self._checked.emit(source, None, None)
+                return
+            key = file_fingerprint(source)
+        except OSError as e:
+            _log.warning("无法读取 %s：%s", source, e)
+            self._checked.emit(source, None, None)
+            return
+        self._checked.emit(source, key, self._cache.lookup(key, self.PROXY_HEIGHT))
+
+    def _run(self, source: str, out: str, cancel: threading.Event):
+        last = [0.0]
+
+        def on_progress(value: float):
+            if value - last[0] >= 0.01:
+                last[0] = value
+                self._job_update.emit(source, 'running', value, None)
+
+        try:
+            duration = probe_file(source, self._ffprobe)['duration']
+            done = transcode_proxy(source, out, self.PROXY_HEIGHT, self.GOP, duration,
+                                   self._ffmpeg, on_progress, cancel)
+        except Exception as e:
+            self._job_update.emit(source, 'failed', last[0], str(e))
+            return
+        if not done:
+            self._job_update.emit(source, 'cancelled', last[0], None)
+            return
+        self._cache.added(os.path.getsize(out))
+        self._job_update.emit(source, 'ready', 1.0, out)
+
+    @Slot(str, str, float, object)
+    def _on_job_update(self, source: str, state: str, progress: float, detail):
+        job = self._jobs.get(source)
+        if job is None:
+            return
+        job.state, job.progress = state, progress
+        if state != 'running':
+            self._cancel.pop(source, None)
+            if state == 'ready':
+                job.proxy = detail
+                _log.info("代理就绪：%s", source)
+            elif state == 'failed':
+                job.error = detail
+                _log.warning("代理生成失败：%s：%s", source, detail)
+            self._schedule()
+        self.job_changed.emit(source)
+        if state == 'ready':
+            self.proxy_ready.emit(source, detail)
+
+    def close(self):
+        self._queue.clear()
+        for cancel in self._cancel.values():
+            cancel.set()
+        self._checker.shutdown(wait=False, cancel_futures=True)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ProxyMode(Enum):
+    OFF = 'off'
+    SCRUB = 'scrub'         # 只在拖动进度条时用代理
+    PLAYBACK = 'playback'   # 播放和拖动时都用代理，暂停时换回原片
+
+
+class ProxySwitcher(QObject):
+    """
+    按状态在代理与原片之间切换当前条目，时间轴位置保持不变（MediaPlayerService.swap_source）：
+
+    - 拖动进度条时（ScrubController.scrubbing_changed）换成代理，松开后回到原片的落点；
+    - PLAYBACK 模式下播放时也用代理，暂停时换回原片，停下来看到的总是全质量画面。
+
+    代理还没生成好时一直播放原片，生成好后按当前状态立即生效。
+    auto_generate 时每切换到一个条目就把它排到代理队列的最前面。
+    """
+
+    def __init__(self, service, manager: ProxyManager, scrub_controller=None,
+                 mode: ProxyMode = ProxyMode.SCRUB, auto_generate: bool = True, parent=None):
+        super().__init__(parent or service)
+        self._service = service
+        self._manager = manager
+        self._mode = ProxyMode(mode)
+        self._auto_generate = auto_generate
+        self._original = None
+        self._playing = False
+        self._scrubbing = False
+        service.current_item_changed.connect(self._on_item_changed)
+        service.playback_state_changed.connect(self._on_playback_state)
+        manager.proxy_ready.connect(self._on_proxy_ready)
+        if scrub_controller is not None:
+            scrub_controller.scrubbing_changed.connect(self._on_scrubbing_changed)
+
+    def mode(self) -> ProxyMode:
+        return self._mode
+
+    def set_mode(self, mode: ProxyMode):
+        self._mode = ProxyMode(mode)
+        self._update()
+
+    def using_proxy(self) -> bool:
+        source = self._service.current_source()
+        return source is not None and source != self._original
+
+    def _wants_proxy(self) -> bool:
+        if self._mode == ProxyMode.OFF:
+            return False
+        return self._scrubbing or (self._mode == ProxyMode.PLAYBACK and self._playing)
+
+    def _update(self, position: float = None):
+        if self._original is None:
+            return
+        target = (self._wants_proxy() and self._manager.proxy_for(self._original)) or self._original
+        if target != self._service.current_source():
+            self._service.swap_source(target, position)
+
+    @Slot(int, str)
+    def _on_item_changed(self, index: int, path: str):
+        self._original = path
+        if self._auto_generate and self._mode != ProxyMode.OFF:
+            self._manager.request(path, urgent=True)
+        self._update()
+
+    @Slot(bool)
+    def _on_playback_state(self, playing: bool):
+        self._playing = playing
+        if not self._scrubbing:
+            self._update()
+
+    @Slot(bool, float)
+    def _on_scrubbing_changed(self, scrubbing: bool, seconds: float):
+        self._scrubbing = scrubbing
+        # 开始拖动时从当前画面位置换过去；松开时直接落到松开的位置
+        self._update(None if scrubbing else seconds)
+
+    @Slot(str, str)
+    def _on_proxy_ready(self, source: str, proxy: str):
+        if source == self._original:
+            self._update()
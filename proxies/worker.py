@@ -0,0 +1,64 @@
+# proxies/worker.py —— 用低优先级的 ffmpeg 子进程把源文件转成低分辨率、短 GOP 的代理
+import os
+import subprocess
+import threading
+from collections import deque
+
+from subprocess_util import popen_low_priority
+
+
+def proxy_command(src: str, out: str, height: int, gop: int, ffmpeg: str = 'ffmpeg') -> list:
+    """
+    H.264 8 bit 4:2:0、每 gop 帧一个关键帧且没有 B 帧：任意位置 seek 最多解码 gop 帧。
+    只缩小不放大；时间轴从 0 开始，与 mpv 默认的 rebase-start-time 一致，位置可以直接换算。
+    """
+    return [ffmpeg, '-nostdin', '-v', 'error', '-y', '-i', src,
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-vf', f"scale=-2:'min({height},ih)',format=yuv420p",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
+            '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0', '-bf', '0',
+            '-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart',
+            '-progress', 'pipe:1', '-nostats', out]
+
+
+def transcode_proxy(src: str, out: str, height: int = 540, gop: int = 12, duration: float = None,
+                    ffmpeg: str = 'ffmpeg', on_progress=None, cancel: threading.Event = None) -> bool:
+    """
+    先写到 out.part 再改名，中途失败或取消不会留下半个代理。
+    on_progress(0..1) 在调用线程中调用（需要 duration）；cancel 被置位时终止 ffmpeg 并返回 False。
+    失败时抛 RuntimeError。
+    """
+    tmp = out + '.part'
+    proc = popen_low_priority(proxy_command(src, tmp, height, gop, ffmpeg),
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # stderr 由单独的线程持续读取、只保留最后几行：损坏的源会让 ffmpeg 每帧报错，
+    # 不及时读取时管道写满，ffmpeg 阻塞，进度读取也随之永远等下去
+    errors = deque(maxlen=20)
+    drain = threading.Thread(target=lambda: errors.extend(proc.stderr), name="proxy-stderr", daemon=True)
+    drain.start()
+    cancelled = False
+    try:
+        for line in proc.stdout:
+            if cancel is not None and cancel.is_set():
+                proc.kill()
+                cancelled = True
+                break
+            key, _, value = line.strip().partition(b'=')
+            if key == b'out_time_us' and on_progress is not None and duration and value.isdigit():
+                on_progress(min(1.0, int(value) / 1e6 / duration))
+        proc.stdout.close()
+    finally:
+        proc.wait()
+        drain.join()
+        proc.stderr.close()
+    if cancelled or proc.returncode != 0:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        if cancelled:
+            return False
+        message = b''.join(errors).decode('utf-8', 'replace').strip()
+        raise RuntimeError(message[-500:] or f"ffmpeg 退出码 {proc.returncode}")
+    os.replace(tmp, out)
+    return True
@@ -0,0 +1,120 @@
+# render_scheduler.py
+import threading
+from dataclasses import dataclass
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+
+@dataclass
+class SchedulerStats:
+    callbacks: int = 0   # mpv update_cb 调用次数
+    collapsed: int = 0   # 已有挂起请求时被合并掉的回调
+    idle: int = 0        # update() 标志显示无新帧的唤醒
+    frames: int = 0      # 有新帧、已请求重绘的次数
+    renders: int = 0     # paintGL 中实际 ctx.render 的次数
+    skipped: int = 0     # paintGL 被调用但无帧可渲染的次数
+    swaps: int = 0       # report_swap 调用次数
+
+
+class RenderScheduler(QObject):
+    """
+    把 MpvRenderContext 的 update_cb 安全地转到 GUI 线程，并按帧节奏调度重绘。
+
+    用法（在 QOpenGLWidget 中）：
+        self._scheduler = RenderScheduler(self)
+        self._scheduler.attach(self.ctx)        # initializeGL
+        if self._scheduler.begin_frame(): ...   # paintGL 中决定是否 render
+        self._scheduler.end_frame()             # render 之后
+    widget.frameSwapped 已自动连接到 report_swap。
+    """
+    _wake = Signal()
+
+    def __init__(self, widget, parent=None):
+        super().__init__(parent or widget)
+        self._widget = widget
+        self._ctx = None
+        self._lock = threading.Lock()
+        self._wake_pending = False
+        self._frame_due = False
+        self._force = True
+        self._rendered = False
+        self._stats = SchedulerStats()
+
+        # mpv 线程发射、GUI 线程接收 → 排队连接
+        self._wake.connect(self._on_wake)
+        widget.frameSwapped.connect(self._on_frame_swapped)
+
+    def attach(self, ctx):
+        self._ctx = ctx
+        self._force = True
+        ctx.update_cb = self.request_update
+
+    def suspend(self):
+        """停止接收 mpv 的更新回调，但保留上下文以便尺寸变化时仍能重画。"""
+        if self._ctx is not None:
+            self._ctx.update_cb = None
+
+    def resume(self):
+        if self._ctx is not None:
+            self._ctx.update_cb = self.request_update
+            self.force_render()
+
+    def detach(self):
+        self.suspend()
+        self._ctx = None
+
+    def force_render(self):
+        """尺寸变化等需要无条件重画时调用。"""
+        self._force = True
+        self._widget.update()
+
+    def request_update(self):
+        """mpv 的 update_cb，运行在 mpv 线程；只负责合并并唤醒 GUI 线程。"""
+        with self._lock:
+            self._stats.callbacks += 1
+            if self._wake_pending:
+                self._stats.collapsed += 1
+                return
+            self._wake_pending = True
+        self._wake.emit()
+
+    @Slot()
+    def _on_wake(self):
+        with self._lock:
+            self._wake_pending = False
+        ctx = self._ctx
+        if ctx is None:
+            return
+        # update() 必须在回调之外调用；只有 MPV_RENDER_UPDATE_FRAME 才需要重绘
+        if ctx.update():
+            self._stats.frames += 1
+            if not self._frame_due:
+                self._frame_due = True
+                self._widget.update()
+        else:
+            self._stats.idle += 1
+
+    def begin_frame(self) -> bool:
+        """paintGL 开头调用，返回本次是否需要调用 ctx.render。"""
+        if self._ctx is None or not (self._frame_due or self._force):
+            self._stats.skipped += 1
+            return False
+        self._frame_due = False
+        self._force = False
+        return True
+
+    def end_frame(self):
+        self._rendered = True
+        self._stats.renders += 1
+
+    @Slot()
+    def _on_frame_swapped(self):
+        # 只有本次交换包含新渲染的帧时才回报给 mpv，供其做显示同步
+        if self._rendered and self._ctx is not None:
+            self._rendered = False
+            self._ctx.report_swap()
+            self._stats.swaps += 1
+
+    def stats(self) -> SchedulerStats:
+        with self._lock:
+            return SchedulerStats(**vars(self._stats))
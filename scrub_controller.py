@@ -0,0 +1,144 @@
+# scrub_controller.py —— 拖动进度条时的合并式 seek（关键帧索引辅助）
+from dataclasses import dataclass
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtWidgets import QAbstractSlider
+
+from keyframe_index import KeyframeIndexer
+
+
+@dataclass
+class ScrubStats:
+    requested: int = 0   # 收到的目标位置数
+    issued: int = 0      # 实际发给 mpv 的 seek 数
+    coalesced: int = 0   # 等待期间被更新目标覆盖掉的 seek 数
+    snapped: int = 0     # 对齐到与上次相同的关键帧而省掉的 seek 数
+
+
+class ScrubController(QObject):
+    """
+    同一时间最多一个 seek 在 mpv 中执行；执行期间只保留最新的目标，
+    完成（playback-restart）后再发出。拖动时做快速 seek，松开时做一次精确 seek。
+
+    有关键帧索引时，拖动目标对齐到最近的关键帧并以 exact 精度 seek 过去——
+    落点就是关键帧本身，只需解码一帧；鼠标在同一个 GOP 内移动不会产生新的 seek。
+    没有索引（仍在构建或不是本地文件）时退回 mpv 的 keyframes 精度。
+    """
+    scrub_preview = Signal(int)  # 拖动中画面将落到的位置（毫秒）
+    scrubbing_changed = Signal(bool, float)  # 开始 / 结束拖动，及当时的位置（秒）
+
+    SEEK_TIMEOUT_MS = 1000  # 没等到完成事件（例如 seek 到文件末尾之后）时放行下一个
+
+    def __init__(self, service, indexer: KeyframeIndexer = None, parent=None):
+        super().__init__(parent)
+        self._service = service
+        self._indexer = indexer or KeyframeIndexer(parent=self)
+        self._path = None
+        self._index = None
+        self._dragging = False
+        self._in_flight = False
+        self._pending = None        # (秒, precision)，只保留最新一个
+        self._last_target = None
+        self._stats = ScrubStats()
+
+        self._timeout = QTimer(self)
+        self._timeout.setSingleShot(True)
+        self._timeout.setInterval(self.SEEK_TIMEOUT_MS)
+        self._timeout.timeout.connect(lambda: self._on_seek_finished(False))
+
+        service.seek_finished.connect(self._on_seek_finished)
+        service.current_item_changed.connect(self._on_item_changed)
+        self._indexer.index_ready.connect(self._on_index_ready)
+
+    def attach_slider(self, slider: QAbstractSlider):
+        """连接一个以毫秒为单位的进度条。"""
+        slider.sliderPressed.connect(self.begin)
+        slider.sliderMoved.connect(lambda ms: self.scrub_to(ms / 1000.0))
+        slider.sliderReleased.connect(lambda: self.end(slider.sliderPosition() / 1000.0))
+        # 点击轨道、键盘翻页：发射时 sliderPosition 已更新；拖动由上面的信号处理
+        slider.actionTriggered.connect(
+            lambda action: action != QAbstractSlider.SliderMove and not slider.isSliderDown()
+            and self.seek_exact(slider.sliderPosition() / 1000.0))
+
+    def keyframe_index(self):
+        return self._index
+
+    def stats(self) -> ScrubStats:
+        return ScrubStats(**vars(self._stats))
+
+    # --- 拖动 ---
+
+    def begin(self):
+        self._dragging = True
+        self._last_target = None
+        self.scrubbing_changed.emit(True, self._service.position() or 0.0)
+
+    def scrub_to(self, seconds: float):
+        self._stats.requested += 1
+        if self._index is not None and len(self._index):
+            target, precision = self._index.nearest(seconds), 'exact'
+        else:
+            target, precision = seconds, 'keyframes'
+        self.scrub_preview.emit(int(target * 1000))
+        if target == self._last_target:
+            self._stats.snapped += 1
+            return
+        self._last_target = target
+        self._request(target, precision)
+
+    def end(self, seconds: float):
+        self._dragging = False
+        self.seek_exact(seconds)
+        self.scrubbing_changed.emit(False, seconds)
+
+    def seek_exact(self, seconds: float):
+        self._stats.requested += 1
+        self._last_target = None
+        self._request(seconds, 'exact')
+
+    def is_scrubbing(self) -> bool:
+        return self._dragging or self._in_flight
+
+    # --- 合并 ---
+
+    def _request(self, seconds: float, precision: str):
+        if self._in_flight:
+            if self._pending is not None:
+                self._stats.coalesced += 1
+            self._pending = (seconds, precision)
+            return
+        self._issue(seconds, precision)
+
+    def _issue(self, seconds: float, precision: str):
+        self._in_flight = True
+        self._stats.issued += 1
+        self._service.seek(seconds, precision)
+        self._timeout.start()
+
+    @Slot(bool)
+    def _on_seek_finished(self, ok: bool):
+        # 加载新文件也会产生 playback-restart，没有进行中的 seek 时忽略
+        if not self._in_flight:
+            return
+        self._in_flight = False
+        self._timeout.stop()
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self._issue(*pending)
+
+    # --- 关键帧索引 ---
+
+    @Slot(int, str)
+    def _on_item_changed(self, index: int, path: str):
+        self._path = path
+        self._index = self._indexer.cached(path)
+        self._in_flight = False
+        self._pending = None
+        self._timeout.stop()
+        if self._index is None:
+            self._indexer.request(path)
+
+    @Slot(str, object)
+    def _on_index_ready(self, path: str, index):
+        if path == self._path:
+            self._index = index
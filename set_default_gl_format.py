@@ -2,12 +2,22 @@
 from PySide6.QtGui import QSurfaceFormat
 from PySide6.QtWidgets import QApplication
 
-def enable_debug_gl_default_format():
+from tools.debug_gl import DiagLevel, diag_level_from_env
+
+def enable_debug_gl_default_format(level: DiagLevel = None) -> DiagLevel:
+    """
+    设置默认 GL 表面格式。只有诊断级别不是 OFF 时才申请 DebugContext，
+    生产环境默认不开启；级别未指定时从环境变量 MYPLAYER_GL_DEBUG 读取。
+    返回最终使用的级别，供 MPVWidget 初始化 GLDiagnostics。
+    """
+    if level is None:
+        level = diag_level_from_env()
     fmt = QSurfaceFormat()
     fmt.setVersion(3, 3)                         # 你也可以按需 4.x
     fmt.setProfile(QSurfaceFormat.CoreProfile)   # 建议 Core Profile
     fmt.setSwapBehavior(QSurfaceFormat.DoubleBuffer)
-    fmt.setOption(QSurfaceFormat.DebugContext, on=True)  # 开启调试上下文
+    fmt.setOption(QSurfaceFormat.DebugContext, on=level != DiagLevel.OFF)  # 按需开启调试上下文
     fmt.setDepthBufferSize(24)
     fmt.setStencilBufferSize(8)
     QSurfaceFormat.setDefaultFormat(fmt)
+    return level
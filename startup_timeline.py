@@ -0,0 +1,71 @@
+# startup_timeline.py —— 启动时间线（导入、QApplication、mpv 创建、GL 初始化、首帧）
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 模块被 main.py 最先导入，以此作为时间零点
+_T0 = time.perf_counter()
+_lock = threading.Lock()
+_events = []          # (名称, 开始毫秒, 结束毫秒, 线程名)
+_reported = False
+
+TIMELINE_ENV = "MYPLAYER_STARTUP_TIMELINE"
+
+
+def _now_ms() -> float:
+    return (time.perf_counter() - _T0) * 1000.0
+
+
+def mark(name: str):
+    """记录一个瞬时事件。"""
+    t = _now_ms()
+    with _lock:
+        _events.append((name, t, t, threading.current_thread().name))
+
+
+@contextmanager
+def span(name: str):
+    """记录一段耗时，可在任意线程使用。"""
+    start = _now_ms()
+    try:
+        yield
+    finally:
+        end = _now_ms()
+        with _lock:
+            _events.append((name, start, end, threading.current_thread().name))
+
+
+def events():
+    with _lock:
+        return sorted(_events, key=lambda e: e[1])
+
+
+def format_timeline() -> str:
+    lines = [f"{'事件':<24} {'开始(ms)':>10} {'耗时(ms)':>10}  线程"]
+    for name, start, end, thread in events():
+        lines.append(f"{name:<24} {start:>10.1f} {end - start:>10.1f}  {thread}")
+    return "\n".join(lines)
+
+
+def to_dict() -> dict:
+    return {'events': [{'name': n, 'start_ms': round(s, 3), 'duration_ms': round(e - s, 3), 'thread': t}
+                       for n, s, e, t in events()]}
+
+
+def report_once():
+    """
+    首帧出现时调用。环境变量 MYPLAYER_STARTUP_TIMELINE=1 时打印时间线，
+    为其他值时当作路径写入 JSON。
+    """
+    global _reported
+    target = os.environ.get(TIMELINE_ENV)
+    if _reported or not target:
+        return
+    _reported = True
+    if target == "1":
+        print(format_timeline())
+    else:
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(to_dict(), f, indent=2, ensure_ascii=False)
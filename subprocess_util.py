@@ -0,0 +1,32 @@
+# subprocess_util.py —— 辅助子进程（ffmpeg / ffprobe / mpv）的公共启动设置与进程优先级
+import os
+import subprocess
+import sys
+
+NO_WINDOW = 0x08000000 if sys.platform == "win32" else 0  # CREATE_NO_WINDOW，Windows 下不弹控制台窗口
+_BELOW_NORMAL = 0x00004000  # BELOW_NORMAL_PRIORITY_CLASS
+
+
+def lower_process_priority():
+    """降低当前进程的优先级，不与播放争抢 CPU；也用作进程池的 initializer。"""
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), _BELOW_NORMAL)
+    else:
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+
+def popen_low_priority(args, **kwargs) -> subprocess.Popen:
+    """以低于正常的优先级启动后台子进程：Windows 用创建标志，其他平台启动后立即 setpriority。"""
+    if sys.platform == "win32":
+        return subprocess.Popen(args, creationflags=NO_WINDOW | _BELOW_NORMAL, **kwargs)
+    proc = subprocess.Popen(args, **kwargs)
+    try:
+        os.setpriority(os.PRIO_PROCESS, proc.pid, 10)
+    except OSError:
+        pass
+    return proc
@@ -0,0 +1,103 @@
+# thumbnails/cache.py —— 缩略图雪碧图的磁盘缓存（按文件指纹分目录，LRU 淘汰）
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from app_paths import cache_dir
+
+# 布局或编码方式变化时递增
+CACHE_VERSION = 1
+_SAMPLE = 64 * 1024
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    文件指纹：大小、mtime 与首尾各 64 KiB 内容的哈希。
+    不读整个文件，几十 GB 的视频也只需两次小读取。
+    """
+    st = os.stat(path)
+    h = hashlib.sha1(f"{st.st_size}|{st.st_mtime_ns}".encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(_SAMPLE))
+        if st.st_size > 2 * _SAMPLE:
+            f.seek(-_SAMPLE, os.SEEK_END)
+            h.update(f.read(_SAMPLE))
+    return h.hexdigest()
+
+
+class ThumbnailCache:
+    """
+    每个媒体文件一个目录：meta.json + sheet_<n>.jpg。
+    访问时更新 meta.json 的 mtime 作为 LRU 时间，总大小超过上限时删除最久未用的目录。
+    """
+
+    def __init__(self, root: str = None, limit_bytes: int = 512 * 1024 * 1024):
+        self.root = root or cache_dir("thumbnails")
+        self.limit_bytes = limit_bytes
+        self._lock = threading.Lock()
+        self._total = None  # 第一次淘汰时统计
+
+    def entry_dir(self, key: str) -> str:
+        path = os.path.join(self.root, f"v{CACHE_VERSION}_{key}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def sheet_path(self, key: str, sheet: int) -> str:
+        return os.path.join(self.entry_dir(key), f"sheet_{sheet}.jpg")
+
+    def load_meta(self, key: str):
+        try:
+            with open(os.path.join(self.entry_dir(key), 'meta.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_meta(self, key: str, meta: dict):
+        with open(os.path.join(self.entry_dir(key), 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def touch(self, key: str):
+        meta = os.path.join(self.entry_dir(key), 'meta.json')
+        if os.path.exists(meta):
+            os.utime(meta)
+
+    def added(self, nbytes: int):
+        """新写入 nbytes 后调用；超过上限时淘汰。"""
+        with self._lock:
+            if self._total is not None:
+                self._total += nbytes
+            if self._total is None or self._total > self.limit_bytes:
+                self._evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                size, used = 0, 0.0
+                with os.scandir(entry.path) as files:
+                    for f in files:
+                        st = f.stat()
+                        size += st.st_size
+                        if f.name == 'meta.json':
+                            used = st.st_mtime
+                entries.append((used, size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(e[1] for e in entries)
+        # 最近一分钟内用过的目录（通常是正在生成的那个）不删
+        recent = time.time() - 60
+        for used, size, path in entries:
+            if total <= self.limit_bytes:
+                break
+            if used >= recent:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        self._total = total
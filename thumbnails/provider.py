@@ -0,0 +1,191 @@
+# thumbnails/provider.py —— 进度条悬停缩略图：调度工作进程、加载雪碧图、O(1) 查找
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PySide6.QtCore import QObject, QRect, Signal, Slot
+from PySide6.QtGui import QImage
+
+import applog
+from subprocess_util import lower_process_priority
+from thumbnails.cache import ThumbnailCache, file_fingerprint
+from thumbnails.worker import render_sheet
+
+_log = applog.get_logger("thumbnails")
+
+
+class ThumbnailProvider(QObject):
+    """
+    按固定间隔为当前文件生成缩略图，每 COLS×ROWS 张拼成一张雪碧图。
+    时刻 t 所在的图和格子可以直接算出，悬停查找是 O(1) 的。
+
+    缺失的雪碧图交给进程池（每个进程一个无界面 mpv），同时运行的任务数不超过进程数；
+    空出槽位时优先生成离当前悬停位置最近的那张。切换文件时取消尚未开始的任务。
+    """
+    sheet_ready = Signal(int)               # 雪碧图序号
+    _sheet_loaded = Signal(int, int, object)  # 代号, 雪碧图序号, QImage（工作线程发射）
+
+    THUMB_W = 160  # 16 的倍数：格子在雪碧图中的字节偏移保持 64 字节对齐
+    THUMB_H = 90
+    COLS = 5
+    ROWS = 5
+    MIN_INTERVAL = 2.0
+    MAX_THUMBS = 400
+
+    def __init__(self, workers: int = 2, cache: ThumbnailCache = None, parent=None):
+        super().__init__(parent)
+        self._workers = max(1, workers)
+        self._cache = cache or ThumbnailCache()
+        self._pool = None
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumb-load")
+        self._generation = 0
+        self._path = None
+        self._key = None
+        self._duration = 0.0
+        self._interval = 0.0
+        self._sheets = {}      # 序号 -> QImage
+        self._missing = set()  # 尚未开始的雪碧图序号
+        self._running = {}     # Future -> 序号
+        self._focus = 0
+        self._sheet_loaded.connect(self._on_sheet_loaded)
+
+    def bind_service(self, service):
+        service.current_item_changed.connect(lambda _i, path: self.set_media(path))
+        service.duration_changed.connect(lambda ms: self.set_duration(ms / 1000.0))
+
+    # --- 布局 ---
+
+    @property
+    def per_sheet(self) -> int:
+        return self.COLS * self.ROWS
+
+    def _sheet_count(self) -> int:
+        thumbs = int(self._duration // self._interval) + 1
+        return (thumbs + self.per_sheet - 1) // self.per_sheet
+
+    def _sheet_times(self, sheet: int):
+        first = sheet * self.per_sheet
+        times = [(first + i) * self._interval for i in range(self.per_sheet)]
+        return [t for t in times if t < self._duration]
+
+    def thumbnail(self, ms: int):
+        """返回 (雪碧图 QImage, 格子 QRect)；还没生成时返回 None 并把这一段提到最前。"""
+        if self._interval <= 0:
+            return None
+        idx = max(0, int(ms / 1000.0 / self._interval))
+        sheet, cell = divmod(idx, self.per_sheet)
+        image = self._sheets.get(sheet)
+        if image is None:
+            self.prioritize(sheet)
+            return None
+        col, row = cell % self.COLS, cell // self.COLS
+        return image, QRect(col * self.THUMB_W, row * self.THUMB_H, self.THUMB_W, self.THUMB_H)
+
+    # --- 调度 ---
+
+    def set_media(self, path: str):
+        if path == self._path:
+            return
+        self._reset()
+        self._path = path
+        if not os.path.isfile(path):  # 网络流不生成缩略图
+            self._path = None
+            return
+        self._key = file_fingerprint(path)
+        self._cache.touch(self._key)
+        if self._duration > 0:
+            self._start()
+
+    def set_duration(self, seconds: float):
+        if seconds <= 0 or abs(seconds - self._duration) < 0.5:
+            return
+        self._duration = seconds
+        if self._path is not None:
+            self._start()
+
+    def _reset(self):
+        self._generation += 1
+        for future in self._running:
+            future.cancel()  # 已在运行的无法取消，结果会被按代号丢弃
+        self._running.clear()
+        self._sheets.clear()
+        self._missing.clear()
+        self._duration = 0.0
+        self._interval = 0.0
+
+    def _start(self):
+        self._interval = max(self.MIN_INTERVAL, self._duration / self.MAX_THUMBS)
+        meta = {'interval': self._interval, 'thumb': [self.THUMB_W, self.THUMB_H],
+                'grid': [self.COLS, self.ROWS]}
+        if self._cache.load_meta(self._key) != meta:
+            self._cache.save_meta(self._key, meta)
+            for sheet in range(self._sheet_count()):
+                path = self._cache.sheet_path(self._key, sheet)
+                if os.path.exists(path):
+                    os.remove(path)
+        self._missing = set(range(self._sheet_count()))
+        self._schedule()
+
+    def prioritize(self, sheet: int):
+        """把悬停位置附近的雪碧图排到最前。"""
+        self._focus = sheet
+        self._schedule()
+
+    def _schedule(self):
+        while self._missing and len(self._running) < self._workers:
+            sheet = min(self._missing, key=lambda s: (abs(s - self._focus), s))
+            self._missing.discard(sheet)
+            out = self._cache.sheet_path(self._key, sheet)
+            if os.path.exists(out):
+                future = self._loader.submit(QImage, out)
+            else:
+                future = self._submit_render(out, sheet)
+            self._running[future] = sheet
+            future.add_done_callback(lambda f, g=self._generation, s=sheet, o=out: self._on_done(f, g, s, o))
+
+    def _submit_render(self, out: str, sheet: int):
+        args = (render_sheet, self._path, out, self._sheet_times(sheet), self.THUMB_W, self.THUMB_H, self.COLS)
+        if self._pool is not None:
+            try:
+                return self._pool.submit(*args)
+            except BrokenProcessPool:
+                # 某个工作进程崩溃（例如解码器出错）后整个池不可用，换一个新池
+                self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = ProcessPoolExecutor(max_workers=self._workers, initializer=lower_process_priority)
+        return self._pool.submit(*args)
+
+    def _on_done(self, future, generation: int, sheet: int, out: str):
+        # 工作线程：把 JPEG 解码成 QImage 后交给 GUI 线程
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            _log.warning("雪碧图 %d 生成失败：%s", sheet, e)
+            result = None
+        image = None
+        if isinstance(result, QImage):
+            image = result
+        elif result is not None and os.path.exists(out):
+            self._cache.added(os.path.getsize(out))
+            image = QImage(out)
+        self._sheet_loaded.emit(generation, sheet, image)
+
+    @Slot(int, int, object)
+    def _on_sheet_loaded(self, generation: int, sheet: int, image):
+        if generation != self._generation:
+            return
+        for future, s in list(self._running.items()):
+            if s == sheet:
+                del self._running[future]
+        if image is not None and not image.isNull():
+            self._sheets[sheet] = image
+            self.sheet_ready.emit(sheet)
+        self._schedule()
+
+    def close(self):
+        self._reset()
+        self._loader.shutdown(wait=False, cancel_futures=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,77 @@
+# thumbnails/worker.py —— 在独立进程中用无界面 mpv 抽取缩略图并拼成雪碧图
+import os
+import threading
+
+# 每个工作进程复用一个 mpv 实例和软件渲染上下文
+_player = None
+_ctx = None
+_frame = threading.Event()
+_current_path = None
+
+
+def _ensure_player():
+    global _player, _ctx
+    if _player is not None:
+        return
+    import mpv
+    import mpv_sw_widget  # noqa: F401  注册 sw 渲染参数
+    _player = mpv.MPV(
+        vo='libmpv', aid='no', sid='no', pause=True, hwdec='no', ytdl=False,
+        msg_level='all=no', keep_open='yes',
+        demuxer_readahead_secs=0,
+        # 缩略图只有 160 像素宽，跳过环路滤波、允许不严格的解码
+        vd_lavc_skiploopfilter='all', vd_lavc_fast=True,
+    )
+    _ctx = mpv.MpvRenderContext(_player, 'sw')
+    _ctx.update_cb = _frame.set
+
+
+def _wait_frame(timeout: float) -> bool:
+    """等待渲染上下文报告有新帧。"""
+    while _frame.wait(timeout):
+        _frame.clear()
+        if _ctx.update():
+            return True
+    return False
+
+
+def render_sheet(path: str, out_path: str, times, thumb_w: int, thumb_h: int, cols: int,
+                 timeout: float = 10.0) -> int:
+    """
+    依次 seek 到 times 中的每个时刻，把画面直接渲染进雪碧图对应的格子，保存为 JPEG。
+    返回成功渲染的格子数。在进程池工作进程中运行。
+    """
+    global _current_path
+    from PySide6.QtGui import QImage
+    from mpv_sw_widget import SwFrameBuffer
+
+    _ensure_player()
+    if path != _current_path:
+        with _player.prepare_and_wait_for_event('playback_restart', timeout=timeout):
+            _player.loadfile(path, 'replace')
+        _current_path = path
+
+    rows = (len(times) + cols - 1) // cols
+    sheet = SwFrameBuffer(cols * thumb_w, rows * thumb_h)
+    rendered = 0
+    for i, t in enumerate(times):
+        x, y = (i % cols) * thumb_w, (i // cols) * thumb_h
+        try:
+            _frame.clear()
+            with _player.prepare_and_wait_for_event('playback_restart', timeout=timeout):
+                _player.seek(t, reference='absolute', precision='keyframes')
+        except TimeoutError:
+            continue
+        if not _wait_frame(1.0):
+            continue
+        # 指针直接指向雪碧图中的格子，行跨度用整张图的；格宽是 16 像素的倍数，保持 64 字节对齐
+        _ctx.render(sw_size={'w': thumb_w, 'h': thumb_h}, sw_format=SwFrameBuffer.SW_FORMAT,
+                    sw_stride={'stride': sheet.stride},
+                    sw_pointer=sheet.address + y * sheet.stride + x * 4)
+        rendered += 1
+
+    image = sheet.image.convertToFormat(QImage.Format_RGB888)
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    if image.save(tmp, "JPEG", 85):
+        os.replace(tmp, out_path)
+    return rendered
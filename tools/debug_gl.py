@@ -1,11 +1,19 @@
 # tools/debug_gl.py  —— 仅 PySide6
+import os
+from collections import deque
 from dataclasses import dataclass
+from enum import IntEnum
 from typing import Optional
 
 from PySide6.QtCore import QObject, Slot
 from PySide6.QtGui import QOpenGLExtraFunctions
 from PySide6.QtOpenGL import QOpenGLDebugLogger, QOpenGLDebugMessage
 
+import applog
+
+# KHR_debug 回调可能在驱动线程里同步触发，输出一律走非阻塞日志管线
+_log = applog.get_logger("gl")
+
 # 常量（避免引 PyOpenGL）
 GL_FRAMEBUFFER = 0x8D40
 GL_FRAMEBUFFER_BINDING = 0x8CA6
@@ -22,6 +30,36 @@ _STATUS_NAME = {
     0x8D56: "GL_FRAMEBUFFER_INCOMPLETE_LAYER_TARGETS",
 }
 
+
+class DiagLevel(IntEnum):
+    OFF = 0      # 不创建日志器，不做任何 FBO 查询
+    SAMPLED = 1  # 每 N 帧检查一次 FBO，异步日志 + 按 id 去重计数
+    FULL = 2     # 每帧检查 FBO，同步日志并立即打印（仅用于定位问题）
+
+
+GL_DEBUG_ENV = "MYPLAYER_GL_DEBUG"
+
+
+def diag_level_from_env(default: DiagLevel = DiagLevel.OFF) -> DiagLevel:
+    """从环境变量 MYPLAYER_GL_DEBUG（off / sampled / full）读取诊断级别。"""
+    value = os.environ.get(GL_DEBUG_ENV, "").strip().upper()
+    try:
+        return DiagLevel[value] if value else default
+    except KeyError:
+        _log.warning("未知的 %s=%r，使用 %s", GL_DEBUG_ENV, value, default.name)
+        return default
+
+
+@dataclass
+class GLDebugRecord:
+    id: int
+    source: str
+    type: str
+    severity: str
+    text: str
+    count: int = 1
+
+
 @dataclass
 class GLDiagHandles:
     logger: Optional[QOpenGLDebugLogger]
@@ -30,38 +68,95 @@ class GLDiagHandles:
 class GLDiagnostics(QObject):
     """
     用法（在 QOpenGLWidget.initializeGL() 里）：
-        self._diag = GLDiagnostics(self.context())
+        self._diag = GLDiagnostics(self.context(), DiagLevel.SAMPLED)
         self._diag.start()
         self._diag.check_fbo("after-init")
-    然后在 paintGL() 前后各调一次 check_fbo()。
+    然后在 paintGL() 末尾调用 on_frame()，由级别决定是否真正检查。
+    set_level() 可在运行时切换级别，调用时上下文必须是当前上下文。
     """
 
-    def __init__(self, gl_context):
+    def __init__(self, gl_context, level: DiagLevel = DiagLevel.SAMPLED,
+                 sample_every: int = 120, max_messages: int = 256):
         super().__init__()
         self._ctx = gl_context
         self._logger: Optional[QOpenGLDebugLogger] = None
         self._funcs = QOpenGLExtraFunctions(self._ctx)
         self._funcs.initializeOpenGLFunctions()
+        self.level = DiagLevel(level)
+        self.sample_every = max(1, sample_every)
+        self._frame = 0
+        # 按消息 id 去重：第一次出现时保存记录，之后只累加计数
+        self._records = {}
+        self._recent = deque(maxlen=max_messages)
+        self._last_fbo_status = None
 
     def start(self) -> GLDiagHandles:
-        # 需要 DebugContext 已启用；此时当前上下文就是 QOpenGLWidget 的 context()
-        self._logger = QOpenGLDebugLogger(self._ctx)
-        if not self._logger.initialize():
-            print("[GLDiag] QOpenGLDebugLogger.initialize() 失败（可能未启用 DebugContext）")
+        if self.level == DiagLevel.OFF:
             return GLDiagHandles(None, self._funcs)
+        # 需要 DebugContext 已启用；此时当前上下文就是 QOpenGLWidget 的 context()
+        if self._logger is None:
+            self._logger = QOpenGLDebugLogger(self._ctx)
+            if not self._logger.initialize():
+                _log.warning("QOpenGLDebugLogger.initialize() 失败（可能未启用 DebugContext）")
+                self._logger = None
+                return GLDiagHandles(None, self._funcs)
+            self._logger.messageLogged.connect(self._on_message)
 
-        self._logger.messageLogged.connect(self._on_message)
-        # 同步模式：哪条 gl* 语句触发，立即打印
-        self._logger.startLogging(QOpenGLDebugLogger.LoggingMode.SynchronousLogging)
-        print("[GLDiag] KHR_debug 已启动（同步模式）")
+        if self.level == DiagLevel.FULL:
+            # 同步模式：哪条 gl* 语句触发，立即打印
+            self._logger.startLogging(QOpenGLDebugLogger.LoggingMode.SynchronousLogging)
+            _log.info("KHR_debug 已启动（同步模式）")
+        else:
+            # 异步模式不会让驱动串行化 GL 管线，消息进入内存队列
+            self._logger.startLogging(QOpenGLDebugLogger.LoggingMode.AsynchronousLogging)
         return GLDiagHandles(self._logger, self._funcs)
 
+    def stop(self):
+        if self._logger is not None and self._logger.isLogging():
+            self._logger.stopLogging()
+
+    def set_level(self, level: DiagLevel):
+        level = DiagLevel(level)
+        if level == self.level:
+            return
+        self.stop()
+        self.level = level
+        self._frame = 0
+        self.start()
+
+    def on_frame(self, tag: str = "frame"):
+        """每帧调用一次；OFF 下直接返回，SAMPLED 下每 sample_every 帧检查一次。"""
+        if self.level == DiagLevel.OFF:
+            return
+        self._frame += 1
+        if self.level == DiagLevel.FULL or self._frame % self.sample_every == 0:
+            self.check_fbo(tag)
+
     @Slot(QOpenGLDebugMessage)
     def _on_message(self, msg: QOpenGLDebugMessage):
-        print(
-            f"[KHR] id={msg.id()} src={msg.source().name} "
-            f"type={msg.type().name} sev={msg.severity().name} :: {msg.message()}"
-        )
+        msg_id = msg.id()
+        record = self._records.get(msg_id)
+        if record is not None:
+            record.count += 1
+        else:
+            record = GLDebugRecord(msg_id, msg.source().name, msg.type().name,
+                                   msg.severity().name, msg.message())
+            # 队列满时淘汰最早的记录，字典与队列保持同样的上限
+            if len(self._recent) == self._recent.maxlen:
+                self._records.pop(self._recent[0].id, None)
+            self._records[msg_id] = record
+            self._recent.append(record)
+
+        if self.level == DiagLevel.FULL:
+            _log.info("[KHR] id=%s src=%s type=%s sev=%s :: %s",
+                      msg_id, record.source, record.type, record.severity, record.text)
+
+    def messages(self):
+        """返回去重后的调试消息（按首次出现顺序），每条带累计次数。"""
+        return list(self._recent)
+
+    def summary(self) -> str:
+        return "\n".join(f"[KHR] id={r.id} x{r.count} sev={r.severity} :: {r.text}" for r in self._recent)
 
     def check_fbo(self, tag: str = ""):
         f = self._funcs
@@ -79,11 +174,17 @@ class GLDiagnostics(QObject):
         try:
             status = int(f.glCheckFramebufferStatus(GL_FRAMEBUFFER))
         except Exception as e:
-            print(f"[GLDiag] glCheckFramebufferStatus 失败: {e!r}")
+            _log.error("glCheckFramebufferStatus 失败: %r", e)
+            return
+
+        # SAMPLED 下只在状态变化时输出
+        changed = status != self._last_fbo_status
+        self._last_fbo_status = status
+        if self.level != DiagLevel.FULL and not changed:
             return
 
         status_name = _STATUS_NAME.get(status, hex(status))
         prefix = f"[FBO] {tag} " if tag else "[FBO] "
-        print(f"{prefix}bound={bound}, status={status_name}")
+        _log.info("%sbound=%s, status=%s", prefix, bound, status_name)
         if status != GL_FRAMEBUFFER_COMPLETE:
-            print("[FBO] ⚠️ 不完整 —— 请核对附件/DrawBuffers/多重采样/层目标等。")
+            _log.warning("[FBO] ⚠️ 不完整 —— 请核对附件/DrawBuffers/多重采样/层目标等。")
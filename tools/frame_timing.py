@@ -0,0 +1,123 @@
+# tools/frame_timing.py  —— 渲染帧时序统计与 HUD
+import json
+import time
+from array import array
+
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QColor, QFont, QPainter
+
+
+class FrameTimingRecorder:
+    """
+    固定容量的环形缓冲区，记录每帧的 CPU 渲染耗时和相邻两次 present 的间隔（毫秒），
+    以及从 mpv 采样得到的丢帧 / 延迟帧计数。
+
+    用法（MPVWidget 中）：
+        rec.begin_frame(); ctx.render(...); rec.end_frame()
+        frameSwapped -> rec.on_present()
+    禁用时 MPVWidget 不持有 recorder，paintGL 里只有一次 None 判断。
+    """
+
+    def __init__(self, capacity: int = 600):
+        self.capacity = capacity
+        self._render_ms = array('d', [0.0]) * capacity
+        self._present_ms = array('d', [0.0]) * capacity
+        self._render_n = 0      # 累计写入次数，取模得到写指针
+        self._present_n = 0
+        self._t0 = 0.0
+        self._last_present = None
+        self.dropped_frames = 0
+        self.delayed_frames = 0
+
+    # --- 采集 ---
+    def begin_frame(self):
+        self._t0 = time.perf_counter()
+
+    def end_frame(self):
+        self._render_ms[self._render_n % self.capacity] = (time.perf_counter() - self._t0) * 1000.0
+        self._render_n += 1
+
+    def on_present(self):
+        now = time.perf_counter()
+        if self._last_present is not None:
+            self._present_ms[self._present_n % self.capacity] = (now - self._last_present) * 1000.0
+            self._present_n += 1
+        self._last_present = now
+
+    def update_counters(self, dropped, delayed):
+        if dropped is not None:
+            self.dropped_frames = int(dropped)
+        if delayed is not None:
+            self.delayed_frames = int(delayed)
+
+    def reset(self):
+        self._render_n = self._present_n = 0
+        self._last_present = None
+
+    # --- 汇总 ---
+    @staticmethod
+    def _window(buf, n, capacity):
+        if n <= capacity:
+            return list(buf[:n])
+        i = n % capacity
+        return list(buf[i:]) + list(buf[:i])  # 按时间顺序
+
+    def render_times(self):
+        return self._window(self._render_ms, self._render_n, self.capacity)
+
+    def present_intervals(self):
+        return self._window(self._present_ms, self._present_n, self.capacity)
+
+    @staticmethod
+    def _describe(values):
+        if not values:
+            return {'count': 0, 'avg': 0.0, 'p95': 0.0, 'max': 0.0}
+        ordered = sorted(values)
+        return {
+            'count': len(values),
+            'avg': sum(values) / len(values),
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            'max': ordered[-1],
+        }
+
+    def summary(self) -> dict:
+        present = self._describe(self.present_intervals())
+        return {
+            'frames': self._render_n,
+            'render_ms': self._describe(self.render_times()),
+            'present_interval_ms': present,
+            'fps': 1000.0 / present['avg'] if present['avg'] else 0.0,
+            'dropped_frames': self.dropped_frames,
+            'delayed_frames': self.delayed_frames,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'summary': self.summary(),
+            'render_ms': self.render_times(),
+            'present_interval_ms': self.present_intervals(),
+        }
+
+    def dump_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def draw_frame_timing_hud(painter: QPainter, recorder: FrameTimingRecorder):
+    """在视频左上角绘制帧时序摘要，需在 mpv 渲染之后调用。"""
+    s = recorder.summary()
+    lines = [
+        f"fps {s['fps']:.1f}",
+        f"render {s['render_ms']['avg']:.2f} / p95 {s['render_ms']['p95']:.2f} ms",
+        f"present {s['present_interval_ms']['avg']:.2f} / max {s['present_interval_ms']['max']:.2f} ms",
+        f"drop {s['dropped_frames']}  delayed {s['delayed_frames']}",
+    ]
+    font = QFont("monospace")
+    font.setStyleHint(QFont.Monospace)
+    font.setPointSize(9)
+    painter.setFont(font)
+    line_h = painter.fontMetrics().height()
+    rect = QRectF(8, 8, 300, line_h * len(lines) + 8)
+    painter.fillRect(rect, QColor(0, 0, 0, 160))
+    painter.setPen(QColor("#00ff7f"))
+    painter.drawText(rect.adjusted(6, 4, -6, -4), Qt.AlignLeft | Qt.AlignTop, "\n".join(lines))
@@ -0,0 +1,83 @@
+# tools/gpu_timer.py  —— 用 GL_TIME_ELAPSED 查询统计渲染的 GPU 耗时，不阻塞渲染线程
+from collections import deque
+from dataclasses import dataclass
+
+from PySide6.QtOpenGL import QOpenGLTimerQuery
+
+
+@dataclass
+class GpuTimeStats:
+    frames: int = 0        # 已取回结果的帧数
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+    dropped: int = 0       # 查询全部在途、本帧没有计时的次数
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.frames if self.frames else 0.0
+
+
+class GpuTimer:
+    """
+    一组轮转使用的计时查询：begin()/end() 包住一次 ctx.render，结果在之后几帧 GPU 完成时
+    由 begin() 顺带取回，从不调用 glFinish 或等待查询。所有方法都要在 GL 上下文为当前时调用。
+    驱动不支持计时查询（GL < 3.3 且无 ARB_timer_query）时 supported 为 False，begin/end 什么都不做。
+    """
+    RING = 4
+
+    def __init__(self):
+        self._free = []
+        self._pending = deque()
+        self._active = None
+        self._created = 0
+        self.supported = True
+        self._stats = GpuTimeStats()
+
+    def begin(self):
+        if not self.supported:
+            return
+        self.poll()
+        if self._free:
+            query = self._free.pop()
+        elif self._created < self.RING:
+            query = QOpenGLTimerQuery()
+            if not query.create():
+                self.supported = False
+                return
+            self._created += 1
+        else:
+            self._stats.dropped += 1
+            return
+        query.begin()
+        self._active = query
+
+    def end(self):
+        if self._active is not None:
+            self._active.end()
+            self._pending.append(self._active)
+            self._active = None
+
+    def poll(self):
+        while self._pending and self._pending[0].isResultAvailable():
+            query = self._pending.popleft()
+            ms = query.waitForResult() / 1e6  # 纳秒
+            stats = self._stats
+            stats.frames += 1
+            stats.total_ms += ms
+            stats.last_ms = ms
+            stats.max_ms = max(stats.max_ms, ms)
+            self._free.append(query)
+
+    def stats(self) -> GpuTimeStats:
+        return GpuTimeStats(**vars(self._stats))
+
+    def reset(self):
+        self._stats = GpuTimeStats()
+
+    def destroy(self):
+        for query in list(self._free) + list(self._pending):
+            query.destroy()
+        self._free.clear()
+        self._pending.clear()
+        self._created = 0
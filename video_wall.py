@@ -0,0 +1,352 @@
+# video_wall.py —— 多路视频墙：共享一个 GL 上下文和合成表面，单一调度节拍渲染所有流
+import json
+import math
+import threading
+import time
+from enum import IntEnum
+
+from PySide6.QtCore import QRect, QRectF, QSize, QTimer, Signal, Slot
+from PySide6.QtGui import QColor, QPainter, QPen
+from PySide6.QtOpenGL import QOpenGLFramebufferObject
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
+
+from media_player import MediaPlayerService
+from mpv_widget import _get_proc
+from tools.frame_timing import FrameTimingRecorder
+
+# PySide6 没有导出这些 GL 枚举
+GL_FRAMEBUFFER = 0x8D40
+GL_READ_FRAMEBUFFER = 0x8CA8
+GL_DRAW_FRAMEBUFFER = 0x8CA9
+GL_COLOR_BUFFER_BIT = 0x4000
+GL_NEAREST = 0x2600
+
+
+class TileQuality(IntEnum):
+    FULL = 0     # 默认解码
+    REDUCED = 1  # 小格子或非焦点：跳过非参考帧与环路滤波，渲染限帧
+
+
+# mpv 解码选项；修改后重新加载视频轨才会生效
+_QUALITY_OPTIONS = {
+    TileQuality.FULL: {'vd-lavc-skipframe': 'default', 'vd-lavc-skiploopfilter': 'default',
+                       'vd-lavc-fast': 'no'},
+    TileQuality.REDUCED: {'vd-lavc-skipframe': 'nonref', 'vd-lavc-skiploopfilter': 'all',
+                          'vd-lavc-fast': 'yes'},
+}
+
+
+class WallTile:
+    """一路流：播放服务、渲染上下文、离屏 FBO 和各自的帧时序。"""
+
+    def __init__(self, index: int, service: MediaPlayerService):
+        self.index = index
+        self.service = service
+        self.ctx = None
+        self.fbo = None
+        self.rect = QRect()        # 在控件中的位置（设备像素，左上角为原点）
+        self.frame_due = False
+        self.force = True
+        self.rendered = False
+        self.last_render = 0.0
+        self.quality = None
+        self.timing = FrameTimingRecorder(300)
+
+
+class VideoWall(QOpenGLWidget):
+    """
+    在一个窗口里承载 N 路播放。所有 mpv 渲染上下文建在同一个 GL 上下文中，
+    每路先渲染到自己的 FBO，再 blit 到控件的合成表面。
+
+    调度：各路的 update_cb 只在 mpv 线程里登记“有更新”并最多唤醒 GUI 一次；
+    GUI 线程统一查询新帧，然后只请求一次重绘，一个 paintGL 节拍内渲染所有到期的流。
+    降级的格子按 REDUCED_FPS 限制渲染频率。
+    """
+    tile_focused = Signal(int)
+    _wake = Signal()
+
+    REDUCED_FPS = 15
+    SMALL_TILE_PIXELS = 640 * 360  # 小于此面积的格子自动降级
+    BORDER = 2
+
+    def __init__(self, count: int = 9, columns: int = None, parent=None, **mpv_options):
+        super().__init__(parent)
+        # paintGL 只 blit 本节拍更新过的格子，依赖控件 FBO 保留上一次的内容；
+        # 默认的 NoPartialUpdate 下 Qt 合成后可能丢弃或清空 FBO，未重画的格子会变黑
+        self.setUpdateBehavior(QOpenGLWidget.PartialUpdate)
+        self._columns = columns
+        self._focus = None
+        self._gl_ready = False
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._wake_pending = False
+        self._repaint_all = True
+        self._get_proc_fn = None
+        self.timing = FrameTimingRecorder(600)  # 整个节拍（渲染 + 合成）
+
+        options = {'mute': True, 'msg_level': 'all=warn'}
+        options.update(mpv_options)
+        self.tiles = []
+        for i in range(count):
+            service = MediaPlayerService(parent=self, lazy=True, **options)
+            tile = WallTile(i, service)
+            service.core_ready.connect(lambda t=tile: self._on_core_ready(t))
+            self.tiles.append(tile)
+
+        self._wake.connect(self._on_wake)
+        self.frameSwapped.connect(self._on_frame_swapped)
+        # 降级格子被限帧时，到点后再补一个节拍
+        self._throttle_timer = QTimer(self)
+        self._throttle_timer.setSingleShot(True)
+        self._throttle_timer.timeout.connect(self.update)
+        self._counter_timer = QTimer(self)
+        self._counter_timer.setInterval(500)
+        self._counter_timer.timeout.connect(self._sample_frame_counters)
+        self._counter_timer.start()
+
+        for tile in self.tiles:
+            tile.service.start()
+
+    # --- 播放 ---
+
+    def set_sources(self, paths):
+        """按顺序把源分配给各个格子；源少于格子数时循环使用。"""
+        if not paths:
+            return
+        for tile in self.tiles:
+            tile.service.set_media(paths[tile.index % len(paths)])
+
+    def set_focus(self, index):
+        """焦点格子全质量解码并开声音，其余静音、按尺寸降级。None 取消焦点。"""
+        self._focus = index
+        for tile in self.tiles:
+            if tile.service.is_ready():
+                tile.service.get_player_handle().mute = tile.index != index
+        self._update_quality()
+        self._repaint_all = True
+        self.update()
+        if index is not None:
+            self.tile_focused.emit(index)
+
+    # --- 渲染上下文 ---
+
+    def initializeGL(self):
+        self._gl_ready = True
+        for tile in self.tiles:
+            if tile.service.is_ready():
+                self._create_render_context(tile)
+
+    def _on_core_ready(self, tile: WallTile):
+        if tile.index != self._focus:
+            tile.service.get_player_handle().mute = True
+        self._apply_quality(tile, self._quality_for(tile), reload=False)
+        if self._gl_ready and tile.ctx is None:
+            self.makeCurrent()
+            try:
+                self._create_render_context(tile)
+            finally:
+                self.doneCurrent()
+
+    def _create_render_context(self, tile: WallTile):
+        from mpv import MpvGlGetProcAddressFn, MpvRenderContext
+        if self._get_proc_fn is None:
+            self._get_proc_fn = MpvGlGetProcAddressFn(_get_proc)
+        tile.ctx = MpvRenderContext(tile.service.get_player_handle(), 'opengl',
+                                    opengl_init_params={'get_proc_address': self._get_proc_fn})
+        tile.force = True
+        tile.ctx.update_cb = lambda i=tile.index: self._request_update(i)
+
+    # --- 调度 ---
+
+    def _request_update(self, index: int):
+        # mpv 线程：登记并合并唤醒
+        with self._lock:
+            self._dirty.add(index)
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+        self._wake.emit()
+
+    @Slot()
+    def _on_wake(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            self._wake_pending = False
+        due = False
+        for index in dirty:
+            tile = self.tiles[index]
+            if tile.ctx is not None and tile.ctx.update():
+                tile.frame_due = True
+                due = True
+        if due:
+            self.update()
+
+    # --- 布局与质量 ---
+
+    def _grid(self):
+        n = len(self.tiles)
+        cols = self._columns or math.ceil(math.sqrt(n))
+        return cols, math.ceil(n / cols)
+
+    def resizeGL(self, w, h):
+        # 格子位置按设备像素计算，与 FBO 尺寸一致
+        dpr = self.devicePixelRatioF()
+        w, h = int(w * dpr), int(h * dpr)
+        cols, rows = self._grid()
+        for tile in self.tiles:
+            col, row = tile.index % cols, tile.index // cols
+            x0, x1 = w * col // cols, w * (col + 1) // cols
+            y0, y1 = h * row // rows, h * (row + 1) // rows
+            tile.rect = QRect(x0, y0, x1 - x0, y1 - y0)
+            tile.force = True
+        self._repaint_all = True
+        self._update_quality()
+
+    def _quality_for(self, tile: WallTile) -> TileQuality:
+        if tile.index == self._focus:
+            return TileQuality.FULL
+        small = tile.rect.width() * tile.rect.height() < self.SMALL_TILE_PIXELS
+        return TileQuality.REDUCED if small or self._focus is not None else TileQuality.FULL
+
+    def _update_quality(self):
+        for tile in self.tiles:
+            if tile.service.is_ready():
+                self._apply_quality(tile, self._quality_for(tile))
+
+    def _apply_quality(self, tile: WallTile, quality: TileQuality, reload: bool = True):
+        if quality == tile.quality:
+            return
+        tile.quality = quality
+        player = tile.service.get_player_handle()
+        for name, value in _QUALITY_OPTIONS[quality].items():
+            player[name] = value
+        if reload:
+            # 解码器选项只在解码器初始化时读取
+            vid = player.vid  # 当前视频轨编号；没有文件时为 'no' 等字符串
+            if isinstance(vid, int):
+                player.command_async('video-reload', vid)
+
+    # --- 绘制 ---
+
+    def paintGL(self):
+        self.timing.begin_frame()
+        f = self.context().extraFunctions()
+        dpr = self.devicePixelRatioF()
+        target = int(self.defaultFramebufferObject())
+        now = time.perf_counter()
+        min_interval = 1.0 / self.REDUCED_FPS
+        next_due = None
+
+        blits = []
+        for tile in self.tiles:
+            if tile.ctx is None:
+                continue
+            due = tile.force or tile.frame_due
+            if due and not tile.force and tile.quality == TileQuality.REDUCED:
+                wait = tile.last_render + min_interval - now
+                if wait > 0:
+                    next_due = wait if next_due is None else min(next_due, wait)
+                    continue
+            if due:
+                self._render_tile(tile)
+                tile.last_render = now
+                blits.append(tile)
+
+        if self._repaint_all:
+            f.glBindFramebuffer(GL_FRAMEBUFFER, target)
+            f.glClearColor(0.0, 0.0, 0.0, 1.0)
+            f.glClear(GL_COLOR_BUFFER_BIT)
+            blits = [t for t in self.tiles if t.fbo is not None]
+
+        # 控件的 FBO 在两次绘制之间保留内容，只需 blit 本节拍更新过的格子
+        height = int(self.height() * dpr)
+        for tile in blits:
+            r = tile.rect
+            size = tile.fbo.size()
+            f.glBindFramebuffer(GL_READ_FRAMEBUFFER, tile.fbo.handle())
+            f.glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target)
+            # GL 的原点在左下角
+            f.glBlitFramebuffer(0, 0, size.width(), size.height(),
+                                r.x(), height - r.y() - r.height(), r.x() + r.width(), height - r.y(),
+                                GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        f.glBindFramebuffer(GL_FRAMEBUFFER, target)
+
+        # 焦点边框画在格子内侧，该格子被重新 blit 后要补画
+        self._repaint_all = False
+        if self._focus is not None and self.tiles[self._focus] in blits:
+            rect = self.tiles[self._focus].rect
+            painter = QPainter(self)
+            painter.setPen(QPen(QColor("#ffd740"), self.BORDER))
+            painter.drawRect(QRectF(rect.x() / dpr, rect.y() / dpr, rect.width() / dpr,
+                                    rect.height() / dpr).adjusted(1, 1, -1, -1))
+            painter.end()
+
+        self.timing.end_frame()
+        if next_due is not None and not self._throttle_timer.isActive():
+            self._throttle_timer.start(max(1, int(next_due * 1000)))
+
+    def _render_tile(self, tile: WallTile):
+        size = QSize(max(1, tile.rect.width()), max(1, tile.rect.height()))
+        if tile.fbo is None or tile.fbo.size() != size:
+            tile.fbo = QOpenGLFramebufferObject(size)
+        tile.timing.begin_frame()
+        tile.ctx.render(opengl_fbo={'fbo': tile.fbo.handle(), 'w': size.width(), 'h': size.height()},
+                        flip_y=True)
+        tile.timing.end_frame()
+        tile.frame_due = False
+        tile.force = False
+        tile.rendered = True
+
+    @Slot()
+    def _on_frame_swapped(self):
+        self.timing.on_present()
+        for tile in self.tiles:
+            if tile.rendered and tile.ctx is not None:
+                tile.rendered = False
+                tile.ctx.report_swap()
+                tile.timing.on_present()
+
+    def mousePressEvent(self, e):
+        dpr = self.devicePixelRatioF()
+        pos = e.position().toPoint() * dpr
+        for tile in self.tiles:
+            if tile.rect.contains(pos):
+                self.set_focus(None if tile.index == self._focus else tile.index)
+                return
+        super().mousePressEvent(e)
+
+    # --- 统计 ---
+
+    def _sample_frame_counters(self):
+        for tile in self.tiles:
+            player = tile.service.get_player_handle()
+            if player is not None:
+                tile.timing.update_counters(player.frame_drop_count, player.vo_delayed_frame_count)
+
+    def timings(self) -> dict:
+        """整体节拍与每个格子的帧时序摘要。"""
+        tiles = []
+        for tile in self.tiles:
+            entry = {'index': tile.index, 'size': [tile.rect.width(), tile.rect.height()],
+                     'quality': None if tile.quality is None else tile.quality.name.lower()}
+            entry.update(tile.timing.summary())
+            tiles.append(entry)
+        return {'tiles': len(self.tiles), 'aggregate': self.timing.summary(), 'per_tile': tiles}
+
+    def dump_timings(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.timings(), f, indent=2)
+
+    def closeEvent(self, e):
+        self._counter_timer.stop()
+        self.makeCurrent()
+        for tile in self.tiles:
+            if tile.ctx is not None:
+                tile.ctx.update_cb = None
+                tile.ctx.free()
+                tile.ctx = None
+            tile.fbo = None
+        self.doneCurrent()
+        for tile in self.tiles:
+            tile.service.close()
+        super().closeEvent(e)
@@ -0,0 +1,378 @@
+# watch_history.py —— 观看记录：续播位置、音轨 / 字幕轨与音量，SQLite 后写式持久化
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+import applog
+from app_paths import data_dir
+
+_log = applog.get_logger("history")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    fingerprint TEXT PRIMARY KEY,
+    path        TEXT NOT NULL,
+    position    REAL,
+    duration    REAL,
+    aid         TEXT,
+    sid         TEXT,
+    volume      REAL,
+    updated_at  REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS history_updated ON history(updated_at);
+"""
+
+COLUMNS = ('fingerprint', 'path', 'position', 'duration', 'aid', 'sid', 'volume', 'updated_at')
+
+_SAMPLE = 64 * 1024
+
+
+def content_fingerprint(path: str) -> str:
+    """
+    内容指纹：大小与首尾各 64 KiB 的哈希。与 thumbnails.cache.file_fingerprint 不同，
+    不含路径和 mtime，文件改名、移动或复制到别处后仍然能找到记录。网络地址按 URL 本身计算。
+    """
+    if not os.path.isfile(path):
+        return "url:" + hashlib.sha1(path.encode('utf-8', 'surrogatepass')).hexdigest()
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(_SAMPLE))
+        if size > 2 * _SAMPLE:
+            f.seek(-_SAMPLE, os.SEEK_END)
+            h.update(f.read(_SAMPLE))
+    return h.hexdigest()
+
+
+def default_history_path() -> str:
+    return os.path.join(data_dir(), "history.sqlite3")
+
+
+@dataclass
+class HistoryEntry:
+    fingerprint: str
+    path: str
+    position: float = None   # None 表示已看完，下次从头播放
+    duration: float = None
+    aid: str = None
+    sid: str = None
+    volume: float = None
+    updated_at: float = 0.0
+
+
+@dataclass
+class HistoryStats:
+    lookups: int = 0
+    submitted: int = 0   # 交给写线程的条目数
+    written: int = 0     # 合并后实际写入的行数
+    batches: int = 0     # 写事务数
+    write_s: float = 0.0
+
+
+class HistoryStore:
+    """
+    SQLite 连接只属于一个后台线程，查询和写入都排进同一个队列：调用方线程（GUI）只做入队，
+    不接触磁盘。写入在队列里积累的条目按指纹合并（后到的覆盖先到的），一批一个事务。
+    """
+    _STOP = object()
+
+    def __init__(self, path: str = None, trace=None):
+        self.path = path or default_history_path()
+        self.stats = HistoryStats()
+        self._trace = trace  # sqlite3 set_trace_callback，基准测试用来核对语句在哪个线程执行
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="history-db", daemon=True)
+        self._thread.start()
+
+    def lookup(self, path: str, callback):
+        """在存储线程计算指纹并查询，callback(path, fingerprint, HistoryEntry 或 None) 在存储线程调用。"""
+        self._queue.put(('lookup', path, callback))
+
+    def write(self, entries):
+        self.stats.submitted += len(entries)
+        self._queue.put(('write', list(entries), None))
+
+    def recent(self, limit: int, callback):
+        """最近播放的 limit 条记录，callback(list) 在存储线程调用。"""
+        self._queue.put(('recent', limit, callback))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待此前入队的操作全部完成。只在退出或测试时使用。"""
+        done = threading.Event()
+        self._queue.put(('barrier', done, None))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        self._queue.put((self._STOP, None, None))
+        self._thread.join(timeout)
+
+    # --- 存储线程 ---
+
+    def _run(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        if self._trace is not None:
+            conn.set_trace_callback(self._trace)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        try:
+            while True:
+                op, arg, callback = self._queue.get()
+                if op is self._STOP:
+                    return
+                pending = {}
+                # 把已经排队的写入一起取出来，合并成一个事务
+                while op == 'write':
+                    for entry in arg:
+                        pending[entry.fingerprint] = entry
+                    try:
+                        op, arg, callback = self._queue.get_nowait()
+                    except queue.Empty:
+                        op = None
+                if pending:
+                    self._write(conn, pending.values())
+                if op is self._STOP:
+                    return
+                if op == 'lookup':
+                    self._lookup(conn, arg, callback)
+                elif op == 'recent':
+                    rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM history "
+                                        "ORDER BY updated_at DESC LIMIT ?", (arg,))
+                    callback([HistoryEntry(*row) for row in rows])
+                elif op == 'barrier':
+                    arg.set()
+        finally:
+            conn.close()
+
+    def _write(self, conn, entries):
+        started = time.perf_counter()
+        rows = [tuple(getattr(e, name) for name in COLUMNS) for e in entries]
+        try:
+            with conn:
+                conn.executemany(f"""
+                    INSERT INTO history ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})
+                    ON CONFLICT(fingerprint) DO UPDATE SET
+                        path=excluded.path, position=excluded.position, duration=excluded.duration,
+                        aid=excluded.aid, sid=excluded.sid, volume=excluded.volume,
+                        updated_at=excluded.updated_at
+                """, rows)
+        except sqlite3.Error as e:
+            _log.error("写入观看记录失败：%s", e)
+            return
+        self.stats.batches += 1
+        self.stats.written += len(rows)
+        self.stats.write_s += time.perf_counter() - started
+
+    def _lookup(self, conn, path: str, callback):
+        self.stats.lookups += 1
+        try:
+            fingerprint = content_fingerprint(path)
+        except OSError as e:
+            _log.warning("无法读取 %s：%s", path, e)
+            callback(path, None, None)
+            return
+        row = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM history WHERE fingerprint = ?",
+                           (fingerprint,)).fetchone()
+        callback(path, fingerprint, HistoryEntry(*row) if row else None)
+
+
+# 记录 aid / sid 选项而不是属性：属性在没有选中轨道时也是 no，选项只有用户明确关闭时才是 no，
+# 没有指定时为 auto，不需要恢复
+_TRACK_OPTIONS = {'aid': 'options/aid', 'sid': 'options/sid'}
+_TRACK_TYPES = {'aid': 'audio', 'sid': 'sub'}
+
+
+def _track_value(value):
+    """mpv 的 aid / sid 选项：整数轨道号，或 False（no）/ 'auto'。"""
+    if value is False or value is None:
+        return 'no'
+    return str(value)
+
+
+def _track_exists(tracks, kind: str, value: str) -> bool:
+    return any(t.get('type') == kind and str(t.get('id')) == value for t in tracks or ())
+
+
+class WatchHistory(QObject):
+    """
+    跟踪当前条目的播放位置、音轨 / 字幕轨和音量，打开文件时恢复。
+
+    position_changed（10 Hz）只更新内存中的当前条目；每 FLUSH_INTERVAL_MS、暂停、切换条目
+    和 close() 时才把它交给 HistoryStore 的写线程。打开文件时指纹计算和查询也在存储线程里，
+    GUI 线程不做任何磁盘 I/O。位置在开头 MIN_RESUME 秒内或离结尾不到 END_MARGIN 秒时不续播。
+    """
+    resumed = Signal(str, float)                 # 路径, 续播位置（秒）
+    _lookup_done = Signal(str, object, object)   # 路径, 指纹, HistoryEntry（存储线程发射）
+
+    FLUSH_INTERVAL_MS = 5000
+    MIN_RESUME = 5.0
+    END_MARGIN = 10.0
+
+    def __init__(self, service, store: HistoryStore = None, auto_resume: bool = True, parent=None):
+        super().__init__(parent or service)
+        self._service = service
+        self._store = store or HistoryStore()
+        self._auto_resume = auto_resume
+        self._path = None
+        self._entry = None      # 当前条目；指纹查出来之前为 None
+        self._dirty = False
+        self._tracks = {}       # mpv 属性名 -> 最近的值（observe_property 回调写入）
+        self._observed = None
+        self._loaded = False    # 当前条目的 file-loaded 已经到达，轨道列表可用
+        self._pending_tracks = {}  # 查到的记录里等文件加载完再恢复的 aid / sid
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+        self._lookup_done.connect(self._on_lookup_done)
+        service.current_item_changed.connect(self._on_item_changed)
+        service.position_changed.connect(self._on_position)
+        service.duration_changed.connect(self._on_duration)
+        service.playback_state_changed.connect(self._on_playback_state)
+        service.playback_finished.connect(self._on_finished)
+        service.file_loaded.connect(self._on_file_loaded)
+        service.core_ready.connect(self._observe_tracks)
+        if service.is_ready():
+            self._observe_tracks()
+
+    def store(self) -> HistoryStore:
+        return self._store
+
+    @Slot()
+    def _observe_tracks(self):
+        player = self._service.get_player_handle()
+        if player is None or player is self._observed:
+            return
+        self._observed = player
+        for name in (*_TRACK_OPTIONS.values(), 'volume'):
+            player.observe_property(name, self._on_track)
+
+    def _on_track(self, name, value):
+        # inprocess 后端在 mpv 线程调用：只替换字典里的值
+        self._tracks[name] = value
+        self._dirty = self._entry is not None
+
+    # --- 条目 ---
+
+    @Slot(int, str)
+    def _on_item_changed(self, index: int, path: str):
+        if path == self._path:
+            return  # 同一条目重新加载（例如子进程后端崩溃后重建），位置由服务自己恢复
+        self.flush()
+        self._path = path
+        self._entry = None
+        self._loaded = False
+        self._pending_tracks = {}
+        self._store.lookup(path, self._lookup_done.emit)
+
+    @Slot(str, object, object)
+    def _on_lookup_done(self, path: str, fingerprint, entry):
+        if path != self._path or fingerprint is None:
+            return
+        if entry is not None and self._auto_resume:
+            self._restore(entry)
+        self._entry = replace(entry, path=path) if entry is not None else HistoryEntry(fingerprint, path)
+        self._dirty = True
+
+    def _restore(self, entry: HistoryEntry):
+        player = self._service.get_player_handle()
+        if player is not None and entry.volume is not None:
+            player.volume = entry.volume
+        self._pending_tracks = {name: value for name, value in (('aid', entry.aid), ('sid', entry.sid))
+                                if value not in (None, 'auto')}
+        if self._loaded:
+            self._request_track_list()
+        position = entry.position
+        if position is None or position < self.MIN_RESUME:
+            return
+        if entry.duration and position > entry.duration - self.END_MARGIN:
+            return
+        self._service.resume_at(position)
+        self.resumed.emit(entry.path, position)
+        _log.info("从 %.1f 秒续播 %s", position, entry.path)
+
+    # --- 轨道 ---
+
+    @Slot()
+    def _on_file_loaded(self):
+        self._loaded = True
+        if self._pending_tracks:
+            self._request_track_list()
+
+    def _request_track_list(self):
+        player = self._service.get_player_handle()
+        if player is None:
+            return
+        path = self._path
+        if self._service.backend() == 'ipc':
+            player.get_property_async('track-list', lambda error, tracks: self._restore_tracks(path, tracks))
+        else:
+            self._restore_tracks(path, player.track_list)
+
+    def _restore_tracks(self, path: str, tracks):
+        """
+        以文件局部选项恢复 aid / sid，只对这个文件生效，不会带到之后播放的文件；
+        记录里的轨道号在这个文件里不存在时（例如内容换过）不恢复。
+        """
+        player = self._service.get_player_handle()
+        if path != self._path or player is None:
+            return
+        pending, self._pending_tracks = self._pending_tracks, {}
+        for name, value in pending.items():
+            if value == 'no' or _track_exists(tracks, _TRACK_TYPES[name], value):
+                player.command('set', f'file-local-options/{name}', value)
+
+    # --- 播放状态 ---
+
+    @Slot(int)
+    def _on_position(self, ms: int):
+        if self._entry is not None:
+            self._entry.position = ms / 1000.0
+            self._dirty = True
+
+    @Slot(int)
+    def _on_duration(self, ms: int):
+        if self._entry is not None:
+            self._entry.duration = ms / 1000.0
+            self._dirty = True
+
+    @Slot(bool)
+    def _on_playback_state(self, playing: bool):
+        if not playing:
+            self.flush()
+
+    @Slot()
+    def _on_finished(self):
+        if self._entry is not None:
+            self._entry.position = None
+            self._dirty = True
+            self.flush()
+
+    def flush(self):
+        """把当前条目交给写线程（只入队，不等待）。"""
+        if not self._dirty or self._entry is None:
+            return
+        entry = self._entry
+        tracks = self._tracks
+        for name, option in _TRACK_OPTIONS.items():
+            if option in tracks:
+                setattr(entry, name, _track_value(tracks[option]))
+        if tracks.get('volume') is not None:
+            entry.volume = float(tracks['volume'])
+        entry.updated_at = time.time()
+        self._store.write([replace(entry)])
+        self._dirty = False
+
+    def close(self):
+        """退出时调用：写出最后的位置并等待写线程结束。"""
+        self._timer.stop()
+        self.flush()
+        self._store.close()
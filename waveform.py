@@ -0,0 +1,281 @@
+# waveform.py —— 整个文件的音频波形 / 响度概览：流式解码、NumPy 分箱、磁盘缓存
+import os
+import struct
+import subprocess
+import threading
+import time
+
+import numpy as np
+from PySide6.QtCore import QLineF, QObject, Signal, Slot
+from PySide6.QtGui import QColor, QPainter, QPen
+from PySide6.QtWidgets import QSizePolicy, QWidget
+
+import applog
+from app_paths import cache_dir
+from subprocess_util import NO_WINDOW
+from thumbnails.cache import file_fingerprint
+
+_log = applog.get_logger("waveform")
+
+# 概览不需要高采样率：ffmpeg 直接降到 8 kHz 单声道，管道数据量是 48 kHz 立体声的 1/12
+SAMPLE_RATE = 8000
+BINS_PER_SECOND = 10
+CHUNK_SAMPLES = 1 << 18  # 每次从管道读取的采样数（1 MiB float32）
+
+# 缓存文件：固定头 + float16 的 (min, max, rms) 三列
+_MAGIC = b'MPWF'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHIQ')  # magic, version, bins_per_second, sample_rate, count
+
+
+class WaveformData:
+    """
+    按时间顺序的 (min, max, rms) 分箱，float16 存储（每箱 6 字节）。
+    构建线程只追加；filled 在数据写入之后才增加，GUI 线程读取 view() 是安全的。
+    """
+
+    def __init__(self, bins_per_second: int = BINS_PER_SECOND, expected: int = 0):
+        self.bins_per_second = bins_per_second
+        self.expected = expected  # 预计总箱数（由时长得出），用于进度显示时的横向比例
+        self.bins = np.zeros((max(expected, 1024), 3), dtype=np.float16)
+        self.filled = 0
+
+    def append(self, block: np.ndarray):
+        n = len(block)
+        if self.filled + n > len(self.bins):
+            grown = np.zeros((max(len(self.bins) * 2, self.filled + n), 3), dtype=np.float16)
+            grown[:self.filled] = self.bins[:self.filled]
+            self.bins = grown
+        self.bins[self.filled:self.filled + n] = block
+        self.filled += n
+
+    def view(self) -> np.ndarray:
+        filled = self.filled
+        return self.bins[:filled]
+
+    def total_bins(self) -> int:
+        return max(self.expected, self.filled)
+
+    def columns(self, width: int):
+        """
+        把分箱聚合到 width 个像素列：每列取 min 的最小值、max 的最大值、rms 的最大值。
+        返回 (列数, mins, maxs, rms)，列数只覆盖已经算出的部分。
+        """
+        data = self.view()
+        total = self.total_bins()
+        if not len(data) or width <= 0 or total <= 0:
+            return 0, None, None, None
+        cols = min(width, int(np.ceil(len(data) * width / total)))
+        starts = (np.arange(cols) * total / width).astype(np.int64)
+        starts = np.minimum(starts, len(data) - 1)
+        as32 = data.astype(np.float32)
+        return (cols, np.minimum.reduceat(as32[:, 0], starts), np.maximum.reduceat(as32[:, 1], starts),
+                np.maximum.reduceat(as32[:, 2], starts))
+
+    def save(self, path: str, sample_rate: int = SAMPLE_RATE):
+        data = np.ascontiguousarray(self.view(), dtype='<f2')
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.bins_per_second, sample_rate, len(data)))
+            f.write(data.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str):
+        try:
+            with open(path, 'rb') as f:
+                magic, version, bps, _rate, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or version != _VERSION:
+                    return None
+                bins = np.frombuffer(f.read(count * 6), dtype='<f2').reshape(-1, 3)
+        except (OSError, struct.error, ValueError):
+            return None
+        data = cls(bps, len(bins))
+        data.append(bins)
+        return data
+
+
+class BinReducer:
+    """把连续的采样块归约成固定长度的分箱，块边界处不足一箱的采样留到下一块。"""
+
+    def __init__(self, bin_samples: int):
+        self.bin_samples = bin_samples
+        self._carry = np.zeros(0, dtype=np.float32)
+
+    def feed(self, samples: np.ndarray) -> np.ndarray:
+        if self._carry.size:
+            samples = np.concatenate((self._carry, samples))
+        n = len(samples) // self.bin_samples
+        self._carry = samples[n * self.bin_samples:].copy()
+        return self._reduce(samples[:n * self.bin_samples].reshape(n, self.bin_samples))
+
+    def flush(self) -> np.ndarray:
+        if not self._carry.size:
+            return np.zeros((0, 3), dtype=np.float32)
+        frames, self._carry = self._carry.reshape(1, -1), np.zeros(0, dtype=np.float32)
+        return self._reduce(frames)
+
+    @staticmethod
+    def _reduce(frames: np.ndarray) -> np.ndarray:
+        out = np.empty((len(frames), 3), dtype=np.float32)
+        if len(frames):
+            out[:, 0] = frames.min(axis=1)
+            out[:, 1] = frames.max(axis=1)
+            out[:, 2] = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frames.shape[1])
+        return out
+
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE, cancel: threading.Event = None,
+                 ffmpeg: str = 'ffmpeg'):
+    """用 ffmpeg 把第一条音轨解码成单声道 float32，按块产出，不把整条音频读进内存。"""
+    cmd = [ffmpeg, '-nostdin', '-v', 'error', '-i', path, '-map', '0:a:0', '-vn',
+           '-ac', '1', '-ar', str(sample_rate), '-f', 'f32le', '-']
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            creationflags=NO_WINDOW)
+    try:
+        while True:
+            if cancel is not None and cancel.is_set():
+                proc.kill()
+                return
+            raw = proc.stdout.read(CHUNK_SAMPLES * 4)
+            if not raw:
+                break
+            yield np.frombuffer(raw[:len(raw) // 4 * 4], dtype='<f4')
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def build_waveform(path: str, data: WaveformData, cancel: threading.Event = None,
+                   on_progress=None, sample_rate: int = SAMPLE_RATE) -> WaveformData:
+    """流式解码并分箱，结果追加到 data。on_progress(filled) 在每块之后调用。"""
+    reducer = BinReducer(sample_rate // data.bins_per_second)
+    for samples in decode_audio(path, sample_rate, cancel):
+        data.append(reducer.feed(samples))
+        if on_progress is not None:
+            on_progress(data.filled)
+    if cancel is None or not cancel.is_set():
+        data.append(reducer.flush())
+    return data
+
+
+def cache_path(path: str) -> str:
+    return os.path.join(cache_dir("waveforms"),
+                        f"{file_fingerprint(path)}_{SAMPLE_RATE}_{BINS_PER_SECOND}.wfm")
+
+
+class WaveformBuilder(QObject):
+    """
+    为当前文件构建波形概览：命中缓存时立即完成，否则在后台线程流式计算，
+    期间按 UPDATE_INTERVAL 节流发射 updated，界面可以边算边画。
+    """
+    updated = Signal(int)       # 已算出的箱数
+    finished = Signal(object)   # WaveformData
+    failed = Signal(str)
+
+    UPDATE_INTERVAL = 0.2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.data = None
+        self._path = None
+        self._thread = None
+        self._cancel = threading.Event()
+
+    def bind_service(self, service):
+        service.current_item_changed.connect(lambda _i, path: self.build(path))
+        service.duration_changed.connect(lambda ms: self.set_duration(ms / 1000.0))
+
+    def set_duration(self, seconds: float):
+        if self.data is not None and seconds > 0:
+            self.data.expected = int(seconds * self.data.bins_per_second)
+            self.updated.emit(self.data.filled)
+
+    def build(self, path: str):
+        if path == self._path:
+            return
+        self.cancel()
+        self._path = path
+        self.data = None
+        if not os.path.isfile(path):
+            return
+        cached = WaveformData.load(cache_path(path))
+        if cached is not None:
+            self.data = cached
+            self.updated.emit(cached.filled)
+            self.finished.emit(cached)
+            return
+        self.data = WaveformData()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(path, self.data, self._cancel),
+                                        name="waveform", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self, path: str, data: WaveformData, cancel: threading.Event):
+        last = [0.0]
+
+        def progress(filled):
+            now = time.monotonic()
+            if now - last[0] >= self.UPDATE_INTERVAL:
+                last[0] = now
+                self.updated.emit(filled)
+
+        try:
+            build_waveform(path, data, cancel, progress)
+        except OSError as e:
+            self.failed.emit(f"无法运行 ffmpeg：{e}")
+            return
+        if cancel.is_set():
+            return
+        try:
+            data.save(cache_path(path))
+        except OSError as e:
+            _log.warning("写入缓存失败：%s", e)
+        self.updated.emit(data.filled)
+        self.finished.emit(data)
+
+
+class WaveformStrip(QWidget):
+    """进度条上方的波形条：浅色为峰值范围，深色为 RMS 响度。"""
+
+    def __init__(self, builder: WaveformBuilder, parent=None):
+        super().__init__(parent)
+        self._builder = builder
+        self._columns = None
+        self._key = None
+        self.setFixedHeight(32)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        builder.updated.connect(self._on_updated)
+
+    @Slot(int)
+    def _on_updated(self, _filled: int):
+        self.update()
+
+    def paintEvent(self, e):
+        data = self._builder.data
+        painter = QPainter(self)
+        if data is None:
+            painter.end()
+            return
+        # 只有宽度或数据变化时才重新聚合
+        key = (self.width(), data.filled, data.expected, id(data))
+        if key != self._key:
+            self._key = key
+            self._columns = data.columns(self.width())
+        cols, mins, maxs, rms = self._columns
+        if cols:
+            mid = self.height() / 2.0
+            half = mid - 1
+            xs = np.arange(cols) + 0.5
+            peak = [QLineF(x, mid - hi * half, x, mid - lo * half)
+                    for x, lo, hi in zip(xs.tolist(), mins.tolist(), maxs.tolist())]
+            loud = [QLineF(x, mid - r * half, x, mid + r * half)
+                    for x, r in zip(xs.tolist(), rms.tolist())]
+            painter.setPen(QPen(QColor(120, 160, 220), 1))
+            painter.drawLines(peak)
+            painter.setPen(QPen(QColor(40, 90, 170), 1))
+            painter.drawLines(loud)
+        painter.end()